@@ -0,0 +1,250 @@
+import atexit
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, UserLog
+
+# ---------- WRITE-BEHIND COUNTERS ----------
+# Counters are summed in memory per key (e.g. user + day) and written to their
+# table in one bulk transaction every few seconds, when the buffer gets big,
+# or at shutdown — instead of one INSERT + COMMIT per event. The table needs
+# an `id` primary key and a unique index over the key columns; an optional
+# `version` column is bumped on every write, so readers can tell a row changed.
+
+METRICS = ("diet_visits", "symptoms_analyzed", "mental_visits")
+
+
+def today():
+    return datetime.utcnow().date()
+
+
+class CounterBuffer:
+    def __init__(self, app=None, model=None, keys=(), metrics=(), config_prefix="ACTIVITY",
+                 flush_interval=5.0, max_pending=500, buffered=True, version=None):
+        self.app = app
+        self.model = model
+        self.keys = keys                    # key column names, in the order add() gets them
+        self.metrics = metrics              # integer columns that are incremented
+        self.version = version              # integer column bumped once per flush that touches the row
+        self.config_prefix = config_prefix  # <prefix>_FLUSH_INTERVAL, _FLUSH_SIZE, _BUFFERED
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.buffered = buffered
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counts = defaultdict(self._zeros)  # key tuple -> {metric: increment}
+        self._pid = None
+        self._stop = threading.Event()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.app is not None and self.app is not app:
+            self.flush()  # counters buffered for the previous app go to its database
+        self.app = app
+        self.flush_interval = app.config.get(f"{self.config_prefix}_FLUSH_INTERVAL", self.flush_interval)
+        self.max_pending = app.config.get(f"{self.config_prefix}_FLUSH_SIZE", self.max_pending)
+        self.buffered = app.config.get(f"{self.config_prefix}_BUFFERED", self.buffered)
+        atexit.unregister(self.shutdown)
+        atexit.register(self.shutdown)
+
+    def _zeros(self):
+        return dict.fromkeys(self.metrics, 0)
+
+    # ----- background flusher (one per process, started lazily so forked workers get their own) -----
+    def _ensure_flusher(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name=f"{self.model.__tablename__}-flusher", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.warning("%s flush failed: %s", self.model.__tablename__, e)
+
+    # ----- public -----
+    def add(self, key, increments):
+        with self._lock:
+            counts = self._counts[key]
+            for metric, n in increments.items():
+                counts[metric] += n
+            pending = len(self._counts)
+
+        if not self.buffered or pending >= self.max_pending:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    def pending(self):
+        with self._lock:
+            return len(self._counts)
+
+    def flush(self):
+        """Write every buffered counter in one transaction. Returns the number of keys written."""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, defaultdict(self._zeros)
+            if not counts:
+                return 0
+
+            try:
+                with self.app.app_context():
+                    self._apply(counts)
+            except Exception:
+                # Put the counts back so the next flush retries them
+                with self._lock:
+                    for key, inc in counts.items():
+                        for metric, n in inc.items():
+                            self._counts[key][metric] += n
+                raise
+            return len(counts)
+
+    def shutdown(self):
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception as e:
+            self.app.logger.warning("Could not flush %s counters at shutdown: %s", self.model.__tablename__, e)
+
+    # ----- bulk upsert -----
+    def _apply(self, counts):
+        session = db.session
+        table = self.model.__table__
+        dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(db.engine.dialect.name)
+        try:
+            if dialect is not None:
+                # The key columns are unique, so one INSERT ... ON CONFLICT DO UPDATE does it all
+                stmt = dialect.insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(self.keys),
+                    set_={**{m: db.func.coalesce(table.c[m], 0) + stmt.excluded[m] for m in self.metrics},
+                          **self._bump(table)},
+                )
+                session.execute(stmt, [self._new_row(key, inc) for key, inc in counts.items()])
+            else:
+                self._apply_portable(session, table, counts)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+    def _bump(self, table):
+        return {self.version: db.func.coalesce(table.c[self.version], 0) + 1} if self.version else {}
+
+    def _new_row(self, key, inc):
+        row = {**dict(zip(self.keys, key)), **inc}
+        if self.version:
+            row[self.version] = 1
+        return row
+
+    def _apply_portable(self, session, table, counts):
+        key_columns = [table.c[k] for k in self.keys]
+        rows = session.execute(
+            db.select(*key_columns, table.c.id).where(tuple_(*key_columns).in_(list(counts)))
+        )
+        existing = {tuple(row[:-1]): row[-1] for row in rows}
+
+        updates = [
+            {"row_id": existing[key], **{f"inc_{m}": inc[m] for m in self.metrics}}
+            for key, inc in counts.items() if key in existing
+        ]
+        inserts = [self._new_row(key, inc) for key, inc in counts.items() if key not in existing]
+        if updates:
+            session.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values({**{m: db.func.coalesce(table.c[m], 0) + bindparam(f"inc_{m}") for m in self.metrics},
+                         **self._bump(table)}),
+                updates,
+            )
+        if inserts:
+            session.execute(insert(table), inserts)
+
+
+# ---------- ACTIVITY (health dashboard) ----------
+class ActivityBuffer(CounterBuffer):
+    def __init__(self, app=None, **kwargs):
+        super().__init__(app, UserLog, keys=("user_id", "date"), metrics=METRICS, config_prefix="ACTIVITY",
+                         version="version", **kwargs)
+
+    def record(self, user_id, metric, amount=1, day=None):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown activity metric: {metric}")
+        self.add((user_id, day or today()), {metric: amount})
+
+
+# ---------- DASHBOARD SERIES ----------
+WINDOWS = (7, 30, 90)
+
+
+def _day_rows(user_id, start, end):
+    """{day: (diet, symptoms, mental, version)} for the user's rows in [start, end]."""
+    # No GROUP BY / SUM: the unique (user_id, date) index (migrations.upgrade_user_log
+    # merges older duplicate rows before creating it) guarantees one row per day.
+    rows = db.session.execute(
+        db.select(
+            UserLog.date,
+            db.func.coalesce(UserLog.diet_visits, 0),
+            db.func.coalesce(UserLog.symptoms_analyzed, 0),
+            db.func.coalesce(UserLog.mental_visits, 0),
+            db.func.coalesce(UserLog.version, 0),
+        )
+        .where(UserLog.user_id == user_id, UserLog.date >= start, UserLog.date <= end)
+    ).all()
+    return {day: tuple(rest) for day, *rest in rows}
+
+
+def _fill(by_day, start, end, label):
+    """Zero-filled columns from start to end, one entry per day."""
+    series = {"dates": [], "iso_dates": [], "diet_visits": [], "symptom_uses": [], "mental_visits": []}
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        diet, symptoms, mental, _ = by_day.get(day, (0, 0, 0, 0))
+        series["dates"].append(day.strftime(label))
+        series["iso_dates"].append(day.isoformat())
+        series["diet_visits"].append(diet)
+        series["symptom_uses"].append(symptoms)
+        series["mental_visits"].append(mental)
+    return series
+
+
+def _label(days):
+    return "%a" if days <= 7 else "%d %b"
+
+
+def daily_series(user_id, days=7, end=None):
+    """Per-day chart series for the last `days` days, zero-filled (one indexed row per day)."""
+    end = end or today()
+    start = end - timedelta(days=days - 1)
+    return _fill(_day_rows(user_id, start, end), start, end, _label(days))
+
+
+def series_since(user_id, days=7, since=None, end=None):
+    """Like daily_series, but only from `since` (clamped to the window) to `end`.
+
+    Returns (series, tag). The tag hashes the range and every row's version,
+    so it changes whenever a counter in the range is written — an ETag that
+    doesn't need the counts themselves.
+    """
+    end = end or today()
+    start = end - timedelta(days=days - 1)
+    if since is not None:
+        start = min(max(since, start), end)
+    by_day = _day_rows(user_id, start, end)
+    versions = ",".join(f"{day.toordinal()}:{by_day[day][3]}" for day in sorted(by_day))
+    tag = hashlib.sha1(f"{user_id}|{days}|{start}|{end}|{versions}".encode()).hexdigest()[:20]
+    return _fill(by_day, start, end, _label(days)), tag
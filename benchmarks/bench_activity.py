@@ -0,0 +1,66 @@
+"""Page-view throughput with and without write-behind activity buffering.
+
+Runs against a throwaway SQLite DB in a temp directory:
+
+    python benchmarks/bench_activity.py [views] [threads]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, UserLog, activity  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+
+def setup(n_users):
+    with app.app_context():
+        for i in range(n_users):
+            db.session.add(User(name=f"u{i}", email=f"u{i}@bench.local",
+                                password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        db.session.commit()
+
+
+def run(views, threads, buffered):
+    activity.buffered = buffered
+    per_thread = views // threads
+
+    def worker(i):
+        client = app.test_client()
+        client.post("/login", data={"email": f"u{i}@bench.local", "password": "pw"})
+        for _ in range(per_thread):
+            client.get("/diet_nutrition")
+
+    start = time.perf_counter()
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    [t.start() for t in ts]
+    [t.join() for t in ts]
+    activity.flush()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        rows = db.session.query(UserLog).count()
+        total = db.session.query(db.func.sum(UserLog.diet_visits)).scalar()
+        db.session.query(UserLog).delete()
+        db.session.commit()
+    return per_thread * threads / elapsed, rows, total
+
+
+if __name__ == "__main__":
+    views = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    setup(threads)
+
+    for buffered in (False, True):
+        rate, rows, total = run(views, threads, buffered)
+        label = "buffered     " if buffered else "write-through"
+        print(f"{label} {rate:8,.0f} views/s  ({threads} threads, {rows} UserLog rows for {total} views)")
@@ -0,0 +1,120 @@
+"""Admission control under an LLM spike, and the cost of the per-user rate limiter.
+
+A burst of concurrent /analyze requests (distinct prompts, so no cache hits)
+hits the stub backend with and without the upstream concurrency limit.
+Reports how many calls reached "Gemini" at once, latency of the answered
+requests and how quickly the rejected ones got their 429. Then times
+/predict with rate limiting off, with in-memory buckets and with the
+shared DB buckets.
+
+    python benchmarks/bench_admission.py [burst] [stub_latency_s]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, llm, llm_slots, rate_limiter  # noqa: E402
+from rate_limit import MemoryBucketStore, SQLBucketStore  # noqa: E402
+from models import RateLimitBucket  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+
+class CountingBackend:
+    """Wraps the stub to record how many upstream calls run at once."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout, max_tokens=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return self.backend.generate(prompt, timeout, max_tokens)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def setup(n):
+    with app.app_context():
+        hashed = generate_password_hash("pw", "pbkdf2:sha256:1000")
+        db.session.add_all([User(name=f"u{i}", email=f"u{i}@bench.local", password=hashed) for i in range(n)])
+        db.session.commit()
+    clients = []
+    for i in range(n):
+        client = app.test_client()
+        client.post("/login", data={"email": f"u{i}@bench.local", "password": "pw"})
+        clients.append(client)
+    return clients
+
+
+def spike(clients, label):
+    barrier = threading.Barrier(len(clients))
+    results = []
+
+    def run(i, client):
+        barrier.wait()
+        start = time.perf_counter()
+        status = client.post("/analyze", data={"symptoms": f"{label} spike {i}"}).status_code
+        results.append((status, (time.perf_counter() - start) * 1000))
+
+    threads = [threading.Thread(target=run, args=(i, c)) for i, c in enumerate(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ok = sorted(ms for status, ms in results if status == 200)
+    rejected = sorted(ms for status, ms in results if status == 429)
+    return ok, rejected
+
+
+def per_request_us(client, n=2000):
+    start = time.perf_counter()
+    for _ in range(n):
+        client.post("/predict", json={"message": "hello"})
+    return (time.perf_counter() - start) / n * 1e6
+
+
+if __name__ == "__main__":
+    burst = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    llm.backend.latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    counting = llm.backend = CountingBackend(llm.backend)
+    clients = setup(burst)
+    rate_limiter.enabled = False
+
+    print(f"{burst} concurrent /analyze, stub latency {counting.backend.latency * 1000:.0f} ms")
+    for label, limit, waiting, timeout in (("no limit        ", burst, 0, 0.0),
+                                           ("limit 8, queue 16", 8, 16, 2.0)):
+        llm_slots.limit, llm_slots.max_waiting, llm_slots.wait_timeout = limit, waiting, timeout
+        counting.peak = 0
+        ok, rejected = spike(clients, label)
+        pct = lambda xs, q: xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+        print(f"  {label}  upstream peak {counting.peak:3}   answered {len(ok):3}  "
+              f"p50 {statistics.median(ok):6.0f} ms  p99 {pct(ok, 0.99):6.0f} ms   "
+              f"429 {len(rejected):3}  p99 {pct(rejected, 0.99):5.1f} ms")
+
+    print("/predict per request:")
+    rate_limiter.enabled = False
+    off = per_request_us(clients[0])
+    rate_limiter.enabled, rate_limiter.rules["predict"] = True, (1e6, 1e6)  # never actually limited
+    memory = per_request_us(clients[0])
+    rate_limiter.store = SQLBucketStore(db, RateLimitBucket)
+    shared = per_request_us(clients[0])
+    rate_limiter.store = MemoryBucketStore()
+    print(f"  no limiter {off:6.0f} us   memory buckets {memory:6.0f} us ({memory - off:+.0f})   "
+          f"shared DB buckets {shared:6.0f} us ({shared - off:+.0f})")
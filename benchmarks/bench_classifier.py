@@ -0,0 +1,79 @@
+"""Latency of the torch-free intent classifier vs. a torch forward pass.
+
+    python benchmarks/bench_classifier.py
+
+torch is only needed for the comparison column.
+"""
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np  # noqa: E402
+
+from intent_model import WEIGHTS_PATH, export_checkpoint, load_classifier  # noqa: E402
+from nltk_utils import bag_of_words_batch  # noqa: E402
+
+MESSAGES = [
+    "hi there", "thanks a lot", "tell me a joke", "see you later",
+    "do you accept mastercard", "how long does delivery take", "good morning", "bye",
+]
+
+
+def per_call_us(fn, repeat=2000):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def load_torch_model():
+    try:
+        import torch
+        from model import NeuralNet
+    except ImportError:
+        return None
+    data = torch.load("data.pth", map_location="cpu")
+    net = NeuralNet(data["input_size"], data["hidden_size"], data["output_size"])
+    net.load_state_dict(data["model_state"])
+    net.eval()
+    return torch, net
+
+
+if __name__ == "__main__":
+    if not os.path.exists(WEIGHTS_PATH):
+        export_checkpoint()  # needs torch
+    clf = load_classifier(WEIGHTS_PATH)  # the float32 export of data.pth, to check against torch
+    tm = load_torch_model()
+
+    for size in (1, 32, 256):
+        batch = (MESSAGES * (size // len(MESSAGES) + 1))[:size]
+        bags = bag_of_words_batch(batch, clf.word_index)
+
+        end_to_end = per_call_us(lambda: clf.predict_batch(batch), repeat=max(20, 2000 // size))
+        np_fwd = per_call_us(lambda: clf.forward(bags))
+        line = (f"batch {size:4}  numpy end-to-end {end_to_end:9.1f} us "
+                f"({end_to_end / size:6.1f} us/msg)   numpy forward {np_fwd:7.1f} us")
+
+        if tm:
+            torch, net = tm
+            x = torch.from_numpy(bags)
+
+            def torch_fwd():
+                with torch.no_grad():
+                    torch.softmax(net(x), dim=1)
+
+            line += f"   torch forward {per_call_us(torch_fwd):7.1f} us"
+            with torch.no_grad():
+                assert np.allclose(net(x).numpy(), clf.forward(bags), atol=1e-5)
+        print(line)
+
+    for mod in ("intent_model", "torch"):
+        code = f"import time; t = time.perf_counter(); import {mod}; print(time.perf_counter() - t)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if out.returncode == 0:
+            print(f"cold import {mod:12} {float(out.stdout) * 1000:7.0f} ms")
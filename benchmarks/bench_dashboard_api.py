@@ -0,0 +1,71 @@
+"""Dashboard refresh: full page render vs. /api/activity (full, since-cursor, 304).
+
+One user with a year of daily activity in a throwaway SQLite DB; each variant
+is timed over many requests with the buffer already flushed.
+
+    python benchmarks/bench_dashboard_api.py [requests]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, UserLog  # noqa: E402
+from activity import today  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+
+def setup():
+    with app.app_context():
+        db.session.add(User(name="bench", email="bench@bench.local",
+                            password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        db.session.commit()
+        end = today()
+        db.session.execute(UserLog.__table__.insert(), [
+            {"user_id": 1, "date": end - timedelta(days=i), "diet_visits": i % 5, "symptoms_analyzed": i % 3,
+             "mental_visits": i % 4, "version": 1}
+            for i in range(365)])
+        db.session.commit()
+    client = app.test_client()
+    client.post("/login", data={"email": "bench@bench.local", "password": "pw"})
+    return client
+
+
+def timed(client, url, n, headers=None):
+    times, size = [], 0
+    for _ in range(n):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        times.append(time.perf_counter() - start)
+        size = len(response.data)
+    return statistics.median(times) * 1000, size, response.status_code
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    client = setup()
+    print(f"median of {n} requests")
+    for days in (7, 90):
+        api = client.get(f"/api/activity?days={days}")
+        cursor, etag = api.get_json()["cursor"], api.headers["ETag"]
+        variants = [
+            ("GET /user_dashboard (full render)", f"/user_dashboard?days={days}", None),
+            ("GET /api/activity (whole window)", f"/api/activity?days={days}", None),
+            ("GET /api/activity?since=<cursor>", f"/api/activity?days={days}&since={cursor}", None),
+            ("... same, If-None-Match -> 304", f"/api/activity?days={days}", {"If-None-Match": etag}),
+        ]
+        print(f"  {days}-day window")
+        for label, url, headers in variants:
+            ms, size, status = timed(client, url, n, headers)
+            print(f"    {label:36} {ms:6.2f} ms  {size:6,} B  ({status})")
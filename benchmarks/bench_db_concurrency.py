@@ -0,0 +1,127 @@
+"""Multi-process read/write load on the SQLite database, default settings vs tuned engine.
+
+Each worker process imports its own copy of the app (like a gunicorn worker),
+logs in as its own user and loops over real routes: feedback posts and
+write-through activity counters (writes) mixed with the dashboard pages
+(reads). Reports throughput and "database is locked" failures.
+
+    python benchmarks/bench_db_concurrency.py [processes] [seconds]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def boot(workdir, tuned):
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    os.environ["CURA_LLM_BACKEND"] = "stub"
+    os.environ["CURA_ACTIVITY_BUFFERED"] = "0"  # one commit per page view: worst case for locking
+    os.environ["CURA_SQLITE_TUNED"] = "1" if tuned else "0"
+    import cura_app
+    return cura_app, cura_app.create_app({"WARMUP": []})  # also creates the schema
+
+
+def setup(workdir, tuned, processes):
+    cura_app, app = boot(workdir, tuned)
+    from werkzeug.security import generate_password_hash
+
+    with app.app_context():
+        for i in range(processes):
+            cura_app.db.session.add(cura_app.User(
+                name=f"w{i}", email=f"w{i}@bench.local",
+                password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        cura_app.db.session.commit()
+
+
+def worker(workdir, tuned, index, seconds, raw, results):
+    cura_app, app = boot(workdir, tuned)
+    from flask import got_request_exception
+
+    errors = {"locked": 0, "other": 0}
+
+    def on_error(sender, exception, **extra):
+        errors["locked" if "database is locked" in str(exception) else "other"] += 1
+
+    got_request_exception.connect(on_error, app)
+    app.logger.disabled = True
+
+    client = app.test_client()
+    client.post("/login", data={"email": f"w{index}@bench.local", "password": "pw"})
+    steps = [
+        ("write", lambda: client.post("/dashboard", data={"message": "bench feedback"}).status_code < 500),
+        ("write", lambda: client.get("/diet_nutrition").status_code < 500),
+        ("read", lambda: client.get("/dashboard").status_code < 500),
+        ("read", lambda: client.get("/user_dashboard?days=30").status_code < 500),
+    ]
+    if raw:
+        steps = [("write", lambda: direct(cura_app, app, errors, write=True, user_id=index + 1)),
+                 ("read", lambda: direct(cura_app, app, errors, write=False, user_id=index + 1))]
+
+    done = {"write": 0, "read": 0}
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        kind, step = steps[i % len(steps)]
+        start = time.perf_counter()
+        ok = step()
+        latencies.append(time.perf_counter() - start)
+        if ok:
+            done[kind] += 1
+        i += 1
+    results.put((done, errors, max(latencies)))
+
+
+def direct(cura_app, app, errors, write, user_id):
+    """Same DB work as the routes (commit per counter, GROUP BY read) without the HTTP layer."""
+    try:
+        with app.app_context():
+            if write:
+                cura_app.activity.record(user_id, "diet_visits")
+            else:
+                cura_app.daily_series(user_id, 30)
+        return True
+    except Exception as e:
+        errors["locked" if "database is locked" in str(e) else "other"] += 1
+        return False
+
+
+def run(processes, seconds, tuned, raw=False):
+    workdir = tempfile.mkdtemp(prefix="cura-bench-")
+    ctx = multiprocessing.get_context("spawn")
+    p = ctx.Process(target=setup, args=(workdir, tuned, processes))
+    p.start()
+    p.join()
+
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(workdir, tuned, i, seconds, raw, results)) for i in range(processes)]
+    [p.start() for p in procs]
+    totals = {"write": 0, "read": 0, "locked": 0, "other": 0, "max_latency": 0.0}
+    for _ in procs:
+        done, errors, worst = results.get()
+        totals["write"] += done["write"]
+        totals["read"] += done["read"]
+        totals["locked"] += errors["locked"]
+        totals["other"] += errors["other"]
+        totals["max_latency"] = max(totals["max_latency"], worst)
+    [p.join() for p in procs]
+    return totals
+
+
+if __name__ == "__main__":
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for raw in (False, True):
+        print("DB calls only (no HTTP layer):" if raw else "Full requests through the Flask app:")
+        for tuned in (False, True):
+            t = run(processes, seconds, tuned, raw)
+            label = "WAL + pragmas" if tuned else "default      "
+            print(f"  {label} writes {t['write'] / seconds:7,.0f}/s  reads {t['read'] / seconds:7,.0f}/s  "
+                  f"locked errors {t['locked']:5}  other errors {t['other']:3}  "
+                  f"worst call {t['max_latency'] * 1000:7.0f} ms   ({processes} processes)")
@@ -0,0 +1,107 @@
+"""Streaming exports and bulk review at growing table sizes.
+
+For each size: time and peak Python memory of streaming /admin/export/feedback
+as CSV and JSONL (consumed chunk by chunk, like a download), against loading
+the same rows with .all() the way the HTML tables do. Then marks 1000 pending
+items reviewed one POST at a time vs. one /reviewer/bulk POST.
+
+    python benchmarks/bench_export.py [sizes...]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, Feedback  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+MESSAGE = "Loved the symptom checker, but the diet plan page was slow to load on my phone. " * 2
+
+
+def setup():
+    with app.app_context():
+        db.session.add(User(name="bench", email="bench@bench.local", role="reviewer",
+                            password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        db.session.commit()
+    client = app.test_client()
+    client.post("/login", data={"email": "bench@bench.local", "password": "pw"})
+    return client
+
+
+def grow(total, have):
+    with app.app_context():
+        now = datetime.utcnow()
+        for start in range(have, total, 50000):
+            db.session.execute(Feedback.__table__.insert(), [
+                {"user_id": i % 7, "message": f"{MESSAGE}#{i}", "reviewed": False, "date_submitted": now}
+                for i in range(start, min(total, start + 50000))])
+            db.session.commit()
+
+
+def measured(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def stream(client, fmt):
+    response = client.get(f"/admin/export/feedback.{fmt}", buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+
+def load_all():
+    with app.app_context():
+        return len(Feedback.query.order_by(Feedback.id).all())
+
+
+def review(client, size):
+    with app.app_context():
+        db.session.execute(Feedback.__table__.update().values(reviewed=False))
+        db.session.commit()
+    ids = [str(i) for i in range(1, min(size, 1000) + 1)]
+    headers = {"X-Requested-With": "fetch"}
+    start = time.perf_counter()
+    for fid in ids:
+        client.post("/reviewer", data={"feedback_id": fid}, headers=headers)
+    one_by_one = time.perf_counter() - start
+    with app.app_context():
+        db.session.execute(Feedback.__table__.update().values(reviewed=False))
+        db.session.commit()
+    start = time.perf_counter()
+    client.post("/reviewer/bulk", data={"feedback_id": ids}, headers=headers)
+    return len(ids), one_by_one, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    client = setup()
+    have = 0
+    for size in sizes:
+        grow(size, have)
+        have = size
+        print(f"{size:>9,} feedback rows")
+        for fmt in ("csv", "jsonl"):
+            nbytes, seconds, peak = measured(lambda: stream(client, fmt))
+            print(f"    stream {fmt:5}  {nbytes / 2**20:7.1f} MB in {seconds:6.2f} s  "
+                  f"({size / seconds:,.0f} rows/s)  peak memory {peak:6.1f} MB")
+        _, seconds, peak = measured(load_all)
+        print(f"    .all() ORM   {'':10} in {seconds:6.2f} s  {'':18}  peak memory {peak:6.1f} MB")
+        n, slow, fast = review(client, size)
+        print(f"    mark {n} reviewed: one POST each {slow * 1000:7.0f} ms   one bulk UPDATE {fast * 1000:5.1f} ms")
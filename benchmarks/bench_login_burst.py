@@ -0,0 +1,96 @@
+"""Tail latency of /predict while a burst of logins hits the server.
+
+Models a threaded server: a fixed pool of request threads (like gunicorn
+--threads) takes requests in arrival order. A burst of logins arrives at
+once while /predict probes keep arriving every 10 ms; probe latency
+includes time spent queued behind the logins.
+
+    python benchmarks/bench_login_burst.py [logins] [server_threads]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")  # one client, thousands of requests
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, passwords  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+
+def setup(n):
+    with app.app_context():
+        hashed = generate_password_hash("pw", passwords.method)
+        db.session.add_all([User(name=f"u{i}", email=f"u{i}@bench.local", password=hashed) for i in range(n)])
+        db.session.commit()
+
+
+def configure(workers, max_pending, max_waiting):
+    passwords.shutdown()
+    passwords.workers = workers
+    passwords.max_pending = max_pending
+    passwords.max_waiting = max_waiting
+    passwords._slots = threading.BoundedSemaphore(max_pending)
+    passwords._pid = None
+    if workers:
+        passwords.verify(generate_password_hash("x", "pbkdf2:sha256:1"), "x")  # start the pool outside the timing
+
+
+def run(logins, server_threads):
+    server = ThreadPoolExecutor(max_workers=server_threads)
+    probe_client = app.test_client()
+
+    def login(i):
+        response = app.test_client().post("/login", data={"email": f"u{i}@bench.local", "password": "pw"})
+        return response.status_code
+
+    def predict(queued_at):
+        probe_client.post("/predict", json={"message": "hello"})
+        return time.perf_counter() - queued_at
+
+    start = time.perf_counter()
+    burst = [server.submit(login, i) for i in range(logins)]
+    probes = []
+    while not all(f.done() for f in burst):
+        probes.append(server.submit(predict, time.perf_counter()))
+        time.sleep(0.01)
+    burst_seconds = time.perf_counter() - start
+
+    latencies = sorted(f.result() * 1000 for f in probes)
+    statuses = [f.result() for f in burst]
+    server.shutdown()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return {
+        "ok": statuses.count(302), "busy": statuses.count(503), "burst_s": burst_seconds,
+        "p50": statistics.median(latencies), "p95": pct(0.95), "p99": pct(0.99), "max": latencies[-1],
+    }
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    server_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    setup(logins)
+    print(f"{logins} logins ({passwords.method}) against {server_threads} request threads, "
+          f"{os.cpu_count()} CPU(s); /predict latency during the burst:")
+
+    waiting = app.config['PASSWORD_HASH_MAX_WAITING']
+    for label, workers, max_pending, max_waiting in (
+            ("inline hashing             ", 0, logins, 0),
+            ("pool, cap 4, no queue      ", 2, 4, 0),
+            (f"pool, cap 4, {waiting} wait {passwords.queue_timeout:.0f}s".ljust(27), 2, 4, waiting),
+            ("pool, cap = threads        ", 2, 8, 0)):
+        configure(workers, max_pending, max_waiting)
+        r = run(logins, server_threads)
+        print(f"  {label}  p50 {r['p50']:7.1f} ms  p95 {r['p95']:7.1f} ms  p99 {r['p99']:7.1f} ms  "
+              f"max {r['max']:7.1f} ms   logins ok {r['ok']:3} / 503 {r['busy']:3}  burst {r['burst_s']:.1f}s")
+    passwords.shutdown()
@@ -0,0 +1,62 @@
+"""Per-request overhead of the /metrics instrumentation (and of opt-in profiling).
+
+    python benchmarks/bench_metrics.py [requests]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")  # one client, thousands of requests
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, metrics  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+
+def setup():
+    with app.app_context():
+        db.session.add(User(name="bench", email="bench@bench.local",
+                            password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        db.session.commit()
+    client = app.test_client()
+    client.post("/login", data={"email": "bench@bench.local", "password": "pw"})
+    return client
+
+
+def per_request_us(client, call, n, rounds=5):
+    call(client)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(n):
+            call(client)
+        samples.append((time.perf_counter() - start) / n * 1e6)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    client = setup()
+    routes = [
+        ("POST /predict", lambda c: c.post("/predict", json={"message": "hello"})),
+        ("GET  /dashboard", lambda c: c.get("/dashboard")),
+        ("GET  /user_dashboard", lambda c: c.get("/user_dashboard?days=30")),
+    ]
+    print(f"{'route':22} {'off':>9} {'metrics':>9} {'overhead':>9} {'+profile':>9}")
+    for label, call in routes:
+        metrics.enabled, metrics.slow_ms = False, None
+        off = per_request_us(client, call, n)
+        metrics.enabled = True
+        on = per_request_us(client, call, n)
+        metrics.slow_ms = 1e9  # profile every request, never dump
+        profiled = per_request_us(client, call, n // 4)
+        metrics.slow_ms = None
+        print(f"{label:22} {off:7.0f}us {on:7.0f}us {on - off:+7.0f}us {profiled:7.0f}us")
@@ -0,0 +1,98 @@
+"""Micro-benchmark for the /predict chatbot matcher.
+
+Compares the old per-request keyword scan with the precompiled rule matcher
+in chat_rules.py, for short, long (~1 KB) and pasted (~5 KB) messages.
+
+    python benchmarks/bench_predict.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chat_rules import match_rule  # noqa: E402
+
+
+# ---------- OLD IMPLEMENTATION (before the rule table) ----------
+def legacy_answer(user_msg, role):
+    first_aid_tips = {
+        "burn": "burn-tip", "bleeding": "bleeding-tip", "choking": "choking-tip",
+        "fracture": "fracture-tip", "faint": "faint-tip", "snake": "snake-tip",
+        "asthma": "asthma-tip", "heart attack": "heart-tip",
+    }
+    for keyword, tip in first_aid_tips.items():
+        if keyword in user_msg:
+            return tip
+
+    restricted_keywords = ["diet", "nutrition", "mental", "health hub", "symptom", "analyze", "checker"]
+    if role == "guest" and any(k in user_msg for k in restricted_keywords):
+        return "guest"
+
+    if any(w in user_msg for w in ["who created", "developer", "made cura"]):
+        return "creators"
+    elif any(w in user_msg for w in ["what is cura", "about cura", "tell me about cura"]):
+        return "about"
+    elif any(w in user_msg for w in ["patient tools", "features", "help", "what can you do"]):
+        return "features"
+    elif any(w in user_msg for w in ["diet", "nutrition"]):
+        return "diet"
+    elif any(w in user_msg for w in ["symptom", "doctor", "analyze"]):
+        return "symptoms"
+    elif any(w in user_msg for w in ["mental", "stress", "mood"]):
+        return "mental"
+    elif any(w in user_msg for w in ["wellness tip", "health tip", "motivate", "daily tip"]):
+        return random.choice(["a", "b", "c"])
+    elif any(w in user_msg for w in ["contact", "help center", "support"]):
+        return "contact"
+    elif "register" in user_msg or "sign up" in user_msg:
+        return "register"
+    return "default"
+
+
+SHORT = [
+    "hi", "how do i treat a burn", "show me diet plans", "i feel stressed",
+    "give me a wellness tip", "who created cura", "contact support", "thanks",
+]
+
+_FILLER = ("i have been feeling a little off lately and wanted to ask a few "
+           "questions about my routine, sleep and general wellbeing ")
+LONG = [_FILLER * 8 + msg for msg in SHORT]
+PASTED = [_FILLER * 40 + msg for msg in SHORT]
+
+
+def rate(fn, messages, role, seconds=1.0):
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for msg in messages:
+            fn(msg, role)
+        n += len(messages)
+    return n / (time.perf_counter() - start)
+
+
+def bench_endpoint(messages, seconds=1.0):
+    from cura_app import create_app
+
+    app = create_app({"DATABASE_DIR": tempfile.mkdtemp(prefix="cura-bench-"), "LLM_BACKEND": "stub",
+                      "RATE_LIMIT_ENABLED": False, "WARMUP": []})  # one client, thousands of requests
+    client = app.test_client()
+    n, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for msg in messages:
+            client.post("/predict", json={"message": msg})
+        n += len(messages)
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    for label, msgs in (("short", SHORT), ("long", LONG), ("pasted", PASTED)):
+        for role in ("guest", "user"):
+            before = rate(legacy_answer, msgs, role)
+            after = rate(match_rule, msgs, role)
+            print(f"{label:6} {role:5}  before {before:>10,.0f}/s  after {after:>10,.0f}/s  "
+                  f"x{after / before:.2f}")
+
+    for label, msgs in (("short", SHORT), ("long", LONG), ("pasted", PASTED)):
+        print(f"/predict {label:6}  {bench_endpoint(msgs):,.0f} req/s (Flask test client)")
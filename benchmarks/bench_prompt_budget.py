@@ -0,0 +1,80 @@
+"""Prompt budgets and usage accounting.
+
+For user inputs of growing size: tokens sent to the model with the raw text
+interpolated (as before) vs. through the prompt builder, the build time, and
+the input cost per 1000 calls at LLM_PRICES. Then the per-call cost of
+recording usage and of flushing a day's worth of counters.
+
+    python benchmarks/bench_prompt_budget.py [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")
+
+from cura_app import create_app, db, User, llm_usage, symptom_prompt, SYMPTOM_PROMPT  # noqa: E402
+from llm_provider import Usage  # noqa: E402
+from prompts import estimate_tokens  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+SENTENCE = "I have had a throbbing headache behind my eyes and a mild fever since yesterday evening. "
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def budgets(model="gemini-2.0-flash"):
+    input_price = app.config['LLM_PRICES'][model][0]
+    budget = app.config['PROMPT_INPUT_TOKENS']['analyze']
+    print(f"/analyze prompt, input budget {budget} tokens, {model} input ${input_price}/1M tokens")
+    print(f"  {'user text':>12} {'raw prompt':>12} {'budgeted':>10} {'build':>10} {'input $ / 1000 calls':>24}")
+    for chars in (80, 1_000, 10_000, 100_000, 1_000_000):
+        text = (SENTENCE * (chars // len(SENTENCE) + 1))[:chars]
+        raw = estimate_tokens(SYMPTOM_PROMPT.format(text=text))
+        prompt = symptom_prompt(text)
+        sent = estimate_tokens(prompt.text)
+        build = per_call_us(lambda: symptom_prompt(text), max(5, 2_000_000 // chars))
+        print(f"  {chars:>8,} ch {raw:>9,} tk {sent:>7,} tk {build:>7.0f} us "
+              f"   ${raw * input_price / 1000:>8.4f} -> ${sent * input_price / 1000:.4f}")
+
+
+def accounting(calls):
+    with app.app_context():
+        db.session.add_all([User(name=f"u{i}", email=f"u{i}@bench.local", password="x") for i in range(100)])
+        db.session.commit()
+
+    usage = Usage(180, 240)
+    llm_usage.flush_interval = 3600  # flush by hand below
+    record = per_call_us(lambda: llm_usage.record(1, "analyze", "gemini-2.0-flash", usage, 1.5), calls)
+    llm_usage.flush()
+
+    for i in range(calls):
+        llm_usage.record(i % 100 + 1, ("analyze", "mental")[i % 2], "gemini-2.0-flash", usage, 1.5)
+    keys = llm_usage.pending()
+    start = time.perf_counter()
+    llm_usage.flush()
+    flush = time.perf_counter() - start
+    with app.app_context():
+        start = time.perf_counter()
+        llm_usage.report(30)
+        report = time.perf_counter() - start
+    print(f"\nusage accounting: record() {record:.1f} us per call; flush of {calls:,} calls "
+          f"({keys} day/user/endpoint rows) {flush * 1000:.1f} ms; 30-day report {report * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with app.test_request_context():
+        budgets()
+    accounting(calls)
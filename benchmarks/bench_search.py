@@ -0,0 +1,78 @@
+"""Reviewer search latency over a synthetic feedback corpus (SQLite FTS5).
+
+    python benchmarks/bench_search.py [messages]     # default 1,000,000
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+
+from cura_app import create_app, db  # noqa: E402
+from feedback_search import search_feedback  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+WORDS = ("headache fever cough diet plan nutrition stress anxiety sleep chatbot page broken "
+         "slow login password register dashboard chart symptom analyzer mental health hub "
+         "great love thanks please help error water walk tips doctor asthma burn").split()
+NAMES = ["Priya", "Ravi", "Arjun", "Meena", "Sara", "John", "Aisha", "Wei", "Luis", "Fatima"]
+QUERIES = ["headache", "diet plan", "priya", "login password", "asthma burn doctor", "chart", "zzzz"]
+
+
+def seed(n, batch=50_000):
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    with app.app_context():
+        conn = db.engine.raw_connection()
+        cur = conn.cursor()
+        for offset in range(0, n, batch):
+            rows = []
+            for i in range(offset, min(n, offset + batch)):
+                body = " ".join(rng.choices(WORDS, k=rng.randint(6, 30)))
+                date = (start + timedelta(seconds=i * 30)).strftime("%Y-%m-%d %H:%M:%S")
+                if i % 4 == 0:
+                    name = rng.choice(NAMES)
+                    email = f"{name.lower()}{i}@example.com"
+                    rows.append((0, f"📩 Contact Form Submission\nName: {name}\nEmail: {email}\n"
+                                    f"Phone: 9{i:09d}\n\nMessage: {body}", 0, date, name, email, f"9{i:09d}"))
+                else:
+                    rows.append((1 + i % 500, body, i % 3 == 0, date, None, None, None))
+            cur.executemany(
+                "INSERT INTO feedback (user_id, message, reviewed, date_submitted, "
+                "contact_name, contact_email, contact_phone) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.commit()
+        conn.close()
+
+
+def bench(repeat=20):
+    with app.app_context():
+        for q in QUERIES:
+            times, hits = [], 0
+            for _ in range(repeat):
+                t = time.perf_counter()
+                page = search_feedback(q, size=25)
+                times.append((time.perf_counter() - t) * 1000)
+                hits = len(page.items)
+            # second page via the keyset cursor
+            t = time.perf_counter()
+            if page.next_cursor:
+                search_feedback(q, cursor=page.next_cursor, size=25)
+            nxt = (time.perf_counter() - t) * 1000
+            print(f"{q!r:22} p50 {statistics.median(times):8.1f} ms  max {max(times):8.1f} ms  "
+                  f"page 2 {nxt:8.1f} ms  ({hits} on page 1)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    t = time.perf_counter()
+    seed(n)
+    print(f"seeded {n:,} messages (+ FTS index via triggers) in {time.perf_counter() - t:.1f}s")
+    bench()
@@ -0,0 +1,134 @@
+"""Hit rate and lookup latency of the semantic symptom cache at 10k / 100k / 1M entries.
+
+Entries are synthetic symptom descriptions (2-4 symptoms, a severity and a
+duration, in varying templates). Queries are either rewordings of a stored
+entry (same symptoms, shuffled, different filler; should hit) or symptom
+combinations that were never stored (should miss). A hit counts as correct
+when the returned answer belongs to the same symptom set.
+
+    python benchmarks/bench_semantic_cache.py [sizes...] [--thresholds 0.85 0.9 0.95]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+SYMPTOMS = """headache|fever|sore throat|dry cough|wet cough|runny nose|blocked nose|sneezing|chills|night sweats
+fatigue|dizziness|nausea|vomiting|diarrhea|constipation|stomach cramps|bloating|heartburn|loss of appetite
+back pain|neck pain|knee pain|joint pain|muscle aches|chest tightness|shortness of breath|wheezing|palpitations
+itchy skin|skin rash|hives|dry skin|swollen ankles|blurred vision|red eyes|itchy eyes|ear pain|ringing ears
+toothache|mouth ulcers|hoarse voice|insomnia|anxiety|low mood|brain fog|hair loss|weight gain|weight loss
+frequent urination|burning urination|lower back ache|pelvic pain|irregular periods|hot flushes|cold hands
+numb fingers|tingling feet|leg cramps|heel pain|wrist pain|shoulder stiffness|jaw clicking|nosebleeds|bruising
+swollen glands|sinus pressure|post nasal drip|loss of smell|loss of taste|dry mouth|excessive thirst|sweating
+tremor|fainting|migraine aura|light sensitivity|noise sensitivity|restless legs|snoring|sleepiness""".replace("\n", "|").split("|")
+SEVERITY = ["", "mild", "bad", "severe", "constant", "on and off"]
+DURATION = ["", "for two days", "since yesterday", "for a week", "for a few hours", "since last month"]
+TEMPLATES = [
+    "I have {s}{d}",
+    "{s}{d}",
+    "I've been having {s}{d}",
+    "My symptoms are {s}{d}",
+    "Suffering from {s}{d}, what could it be?",
+    "I feel {s}{d}",
+]
+
+
+def describe(rng, symptoms):
+    symptoms = list(symptoms)
+    rng.shuffle(symptoms)
+    severity = rng.choice(SEVERITY)
+    listed = ", ".join(symptoms[:-1]) + " and " + symptoms[-1] if len(symptoms) > 1 else symptoms[0]
+    duration = rng.choice(DURATION)
+    return rng.choice(TEMPLATES).format(s=(severity + " " if severity else "") + listed,
+                                        d=(" " + duration if duration else ""))
+
+
+def symptom_sets(rng, n, taken=None):
+    taken = set() if taken is None else taken
+    sets = []
+    while len(sets) < n:
+        key = frozenset(rng.sample(SYMPTOMS, rng.choice((2, 3, 3, 4))))
+        if key not in taken:
+            taken.add(key)
+            sets.append(key)
+    return sets, taken
+
+
+def answer_for(key):
+    return "|".join(sorted(key))
+
+
+def run(size, thresholds, queries, seed=0):
+    rng = random.Random(seed)
+    directory = tempfile.mkdtemp(prefix="cura-semantic-")
+    cache = SemanticCache(model_name="bench", directory=directory, capacity=size)
+    stored, taken = symptom_sets(rng, size)
+
+    cache.rebuild_every = size + 1  # bulk load, one index build at the end
+    start = time.perf_counter()
+    for key in stored:
+        cache.add(describe(rng, key), answer_for(key))
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    cache._rebuild(wait=True)
+    rebuild_s = time.perf_counter() - start
+    cache.rebuild_every = 2048
+
+    reworded = [(key, describe(rng, key)) for key in rng.sample(stored, queries)]
+    novel, _ = symptom_sets(rng, queries, taken)
+    novel = [(key, describe(rng, key)) for key in novel]
+
+    results = {}
+    for threshold in thresholds:
+        cache.threshold = threshold
+        results[threshold] = measure(cache, reworded, novel)
+
+    cache.close()
+    disk = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    shutil.rmtree(directory, ignore_errors=True)
+    return load_s, rebuild_s, disk, results
+
+
+def measure(cache, reworded, novel):
+    results = {}
+    for label, batch in (("reworded", reworded), ("novel", novel)):
+        latencies, hits, correct = [], 0, 0
+        for key, text in batch:
+            t = time.perf_counter()
+            answer = cache.lookup(text)
+            latencies.append((time.perf_counter() - t) * 1000)
+            if answer is not None:
+                hits += 1
+                correct += answer == answer_for(key)
+        latencies.sort()
+        results[label] = (hits / len(batch), correct / max(hits, 1),
+                          statistics.median(latencies), latencies[int(0.99 * len(latencies))])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.85, 0.9, 0.95])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.queries} reworded + {args.queries} novel queries per size and threshold")
+    for size in args.sizes:
+        load_s, rebuild_s, disk, results = run(size, args.thresholds, args.queries)
+        print(f"{size:>9,} entries  load {size / load_s:,.0f} adds/s  index build {rebuild_s * 1000:,.0f} ms  "
+              f"files {disk / 2**20:,.0f} MB (allocated size)")
+        for threshold, by_kind in results.items():
+            for label, (hit_rate, precision, p50, p99) in by_kind.items():
+                print(f"    {threshold:.2f} {label:9} hit rate {hit_rate:6.1%}  correct {precision:6.1%}  "
+                      f"lookup p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
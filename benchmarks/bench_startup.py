@@ -0,0 +1,137 @@
+"""Cold start: import-time profile and time to first response of a fresh worker.
+
+Every run is a new Python process against the same throwaway SQLite DB (stub
+LLM with no latency, so only startup costs show). A worker started with
+create_app() runs the WARMUP steps before it reports ready; a "cold" one
+(CURA_WARMUP="") leaves every one-time cost to the first requests.
+
+    python benchmarks/bench_startup.py [runs] [--imports 20]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+REQUESTS = [
+    ("GET /", "get", "/", {}),
+    ("POST /predict", "post", "/predict", {"json": {"message": "hello there"}}),
+    ("GET /login", "get", "/login", {}),
+    ("POST /login", "post", "/login", {"data": {"email": "bench@bench.local", "password": "pw"}}),
+    ("GET /dashboard", "get", "/dashboard", {}),
+    ("POST /analyze", "post", "/analyze", {"data": {"symptoms": "headache and a mild fever since yesterday"}}),
+]
+
+
+def child_env(warm):
+    env = dict(os.environ, PYTHONPATH=ROOT, CURA_LLM_BACKEND="stub", CURA_STUB_LATENCY="0", CURA_RATE_LIMIT="0")
+    if not warm:
+        env["CURA_WARMUP"] = ""
+    return env
+
+
+# ---------- runs inside the fresh worker process ----------
+def child_setup():
+    from cura_app import create_app, db, User, passwords
+
+    app = create_app({"WARMUP": []})  # also creates the schema
+    with app.app_context():
+        db.session.add(User(name="bench", email="bench@bench.local", password=passwords.hash("pw")))
+        db.session.commit()
+    passwords.shutdown()
+
+
+def child_run(launched):
+    started = time.perf_counter()
+    import cura_app
+    imported = time.perf_counter()
+    app = cura_app.create_app()
+    ready = time.perf_counter()
+
+    client = app.test_client()
+    report = {"import": imported - started, "create_app": ready - imported, "first": {}, "second": {}}
+    for round_ in ("first", "second"):
+        for label, method, path, kwargs in REQUESTS:
+            t = time.perf_counter()
+            status = getattr(client, method)(path, **kwargs).status_code
+            assert status < 500, f"{label} -> {status}"
+            report[round_][label] = time.perf_counter() - t
+        if round_ == "first":
+            report["launch_to_ready"] = time.time() - launched - (time.perf_counter() - ready)
+            report["launch_to_all_first"] = time.time() - launched
+    cura_app.passwords.shutdown()
+    print(json.dumps(report))
+
+
+# ---------- parent ----------
+def import_profile(workdir, top):
+    """Top modules by cumulative and by self import time (python -X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import cura_app"], cwd=workdir,
+                          env=child_env(warm=False), capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if m:
+            rows.append((int(m.group(1)) / 1000, int(m.group(2)) / 1000, len(m.group(3)) // 2, m.group(4)))
+    total = next(cum for self_, cum, depth, name in rows if name == "cura_app")
+    print(f"import cura_app: {total:.0f} ms (python -X importtime, one run)")
+    direct = sorted((r for r in rows if r[2] == 1), key=lambda r: -r[1])[:top]
+    print("  imported directly by cura_app, by cumulative time:")
+    for self_, cum, _, name in direct:
+        print(f"    {cum:7.1f} ms  {name}")
+    print("  any module, by its own (self) time:")
+    for self_, cum, _, name in sorted(rows, key=lambda r: -r[0])[:top]:
+        print(f"    {self_:7.1f} ms  {name}")
+
+
+def run_worker(workdir, warm):
+    env = child_env(warm)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(time.time())],
+                          cwd=workdir, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("runs", nargs="?", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=15, help="modules to list in the import profile")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--setup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.setup:
+        return child_setup()
+    if args.child:
+        return child_run(float(args.child))
+
+    workdir = tempfile.mkdtemp(prefix="cura-bench-")
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--setup"], cwd=workdir,
+                   env=child_env(warm=False), check=True, capture_output=True)
+    import_profile(workdir, args.imports)
+
+    ms = lambda xs: statistics.median(xs) * 1000
+    print(f"\nfresh worker, median of {args.runs} runs (ms)")
+    runs = {False: [], True: []}
+    for _ in range(args.runs):  # interleaved, so disk cache effects hit both alike
+        for warm in runs:
+            runs[warm].append(run_worker(workdir, warm))
+    for warm, reports in runs.items():
+        print(f"  {'create_app() + warm-up' if warm else 'no warm-up (cold)'}")
+        print(f"    import {ms([r['import'] for r in reports]):6.0f}   warm-up {ms([r['create_app'] for r in reports]):6.0f}"
+              f"   launch -> ready {ms([r['launch_to_ready'] for r in reports]):6.0f}"
+              f"   launch -> all first responses {ms([r['launch_to_all_first'] for r in reports]):6.0f}")
+        for label, *_ in REQUESTS:
+            print(f"    {label:16} first {ms([r['first'][label] for r in reports]):7.1f}"
+                  f"   second {ms([r['second'][label] for r in reports]):6.1f}")
+
+
+if __name__ == "__main__":
+    main()
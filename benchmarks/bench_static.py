@@ -0,0 +1,108 @@
+"""Bytes on the wire and time for a cold and a repeat page load, before/after HTTP caching.
+
+A tiny browser model: a cold load fetches the page plus every asset it
+references; a repeat load revalidates with ETags and skips assets whose
+Cache-Control says they are still fresh.
+
+    python benchmarks/bench_static.py [pages...]     # default: / /about /faq /privacy
+"""
+import gzip
+import os
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+
+from cura_app import create_app, page_cache, static_assets  # noqa: E402
+from http_cache import brotli  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+ASSET_RE = re.compile(r"""(?:href|src)=["'](/static/[^"']+)|url\(["']?(/static/[^"')]+)""")
+ACCEPT = {"Accept-Encoding": "gzip, deflate, br" if brotli else "gzip, deflate"}
+
+
+class Browser:
+    def __init__(self):
+        self.client = app.test_client()
+        self.cache = {}  # url -> (etag, fresh, decoded body)
+
+    def fetch(self, url):
+        """Return (bytes on the wire, requests made, decoded body)."""
+        cached = self.cache.get(url)
+        if cached and cached[1]:
+            return 0, 0, cached[2]  # still fresh in the browser cache: no request at all
+        headers = dict(ACCEPT)
+        if cached and cached[0]:
+            headers["If-None-Match"] = cached[0]
+
+        response = self.client.get(url, headers=headers)
+        raw = response.get_data()
+        wire = len(raw) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        if response.status_code == 304:
+            body = cached[2]
+        elif response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(raw)
+        elif response.headers.get("Content-Encoding") == "br":
+            body = brotli.decompress(raw)
+        else:
+            body = raw
+
+        control = response.headers.get("Cache-Control", "")
+        fresh = "immutable" in control or re.search(r"max-age=[1-9]", control) is not None
+        self.cache[url] = (response.headers.get("ETag"), fresh, body)
+        return wire, 1, body
+
+    def load(self, path):
+        wire, requests, html = self.fetch(path)
+        urls = [m.group(1) or m.group(2) for m in ASSET_RE.finditer(html.decode("utf-8", "replace"))]
+        for url in dict.fromkeys(urls):
+            w, r, _ = self.fetch(url)
+            wire += w
+            requests += r
+        return wire, requests
+
+
+def set_mode(optimized):
+    page_cache.enabled = optimized
+    page_cache.clear()
+    app.config["COMPRESS_MIN_SIZE"] = 500 if optimized else sys.maxsize
+    if optimized:
+        static_assets.manifest = set_mode.manifest
+    else:
+        set_mode.manifest, static_assets.manifest = static_assets.manifest, {}
+
+
+def measure(pages, optimized, repeat=50):
+    set_mode(optimized)
+    results = {}
+    for kind in ("cold", "repeat"):
+        wire = requests = elapsed = 0
+        for _ in range(repeat):
+            browser = Browser()
+            for path in pages:
+                if kind == "repeat":
+                    browser.load(path)  # first visit fills the browser cache
+                start = time.perf_counter()
+                w, r = browser.load(path)
+                elapsed += time.perf_counter() - start
+                wire += w
+                requests += r
+        results[kind] = (wire / repeat, requests / repeat, elapsed / repeat * 1000)
+    return results
+
+
+if __name__ == "__main__":
+    pages = sys.argv[1:] or ["/", "/about", "/faq", "/privacy"]
+    before = measure(pages, optimized=False)
+    after = measure(pages, optimized=True)
+    print(f"pages: {' '.join(pages)}")
+    for kind in ("cold", "repeat"):
+        (bw, br, bt), (aw, ar, at) = before[kind], after[kind]
+        print(f"{kind:6} load  bytes {bw:10,.0f} -> {aw:10,.0f}   requests {br:4.0f} -> {ar:4.0f}   "
+              f"time {bt:6.1f} -> {at:6.1f} ms")
@@ -0,0 +1,70 @@
+"""DB queries and latency per authenticated request, with and without the user cache.
+
+Runs against a throwaway SQLite DB in a temp directory:
+
+    python benchmarks/bench_user_cache.py [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="cura-bench-"))
+os.environ.setdefault("CURA_LLM_BACKEND", "stub")
+os.environ.setdefault("CURA_RATE_LIMIT", "0")  # one client, thousands of requests
+
+from sqlalchemy import event  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from cura_app import create_app, db, User, user_cache  # noqa: E402
+
+app = create_app({"WARMUP": []})  # also creates the schema
+
+queries = 0
+
+
+def count_query(*args):
+    global queries
+    queries += 1
+
+
+def setup():
+    with app.app_context():
+        db.session.add(User(name="bench", email="bench@bench.local",
+                            password=generate_password_hash("pw", method="pbkdf2:sha256:1000")))
+        db.session.commit()
+        event.listen(db.engine, "before_cursor_execute", count_query)
+
+
+def run(n, ttl, path, method="get", **kwargs):
+    global queries
+    user_cache.ttl = ttl
+    user_cache.clear()
+    client = app.test_client()
+    client.post("/login", data={"email": "bench@bench.local", "password": "pw"})
+    getattr(client, method)(path, **kwargs)  # warm-up
+
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(n):
+        getattr(client, method)(path, **kwargs)
+    elapsed = time.perf_counter() - start
+    return queries / n, elapsed / n * 1000
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    setup()
+
+    routes = [
+        ("POST /predict", "/predict", "post", {"json": {"message": "hello"}}),
+        ("GET  /", "/", "get", {}),
+        ("GET  /dashboard", "/dashboard", "get", {}),
+    ]
+    for label, path, method, kwargs in routes:
+        before_q, before_ms = run(n, 0, path, method, **kwargs)
+        after_q, after_ms = run(n, 60, path, method, **kwargs)
+        print(f"{label:17} queries/request {before_q:.2f} -> {after_q:.2f} "
+              f"(saved {before_q - after_q:.2f})   latency {before_ms:.3f} -> {after_ms:.3f} ms")
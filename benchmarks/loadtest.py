@@ -0,0 +1,319 @@
+"""Offline load test over every main route, in one process and across worker processes.
+
+Creates the app against a throwaway SQLite DB, seeds users / feedback / a
+90-day activity history, and swaps Gemini for the local stub backend
+(CURA_LLM_BACKEND=stub), so it runs with no network or API key.
+
+Each route is driven on its own (one phase per route), then as a realistic
+mix. Every phase reports p50/p95/p99 latency, throughput, 5xx errors and
+the peak RSS during that phase, first with threads in one process, then
+with N spawned worker processes sharing the DB (like gunicorn workers).
+Results are written as JSON (benchmarks/results/, not committed); --compare
+prints the change against an earlier run.
+
+    python benchmarks/loadtest.py --requests 200 --workers 4
+    python benchmarks/loadtest.py --compare benchmarks/results/loadtest-<stamp>.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PASSWORD = "loadtest-pw"
+
+MESSAGES = ["hello", "hi there", "what is cura", "how do I treat a burn", "asthma attack help",
+            "i have a headache", "diet plan please", "thanks!", "bye", "tell me a joke",
+            "what should I eat for breakfast", "can you help me sleep better"]
+SYMPTOMS = ["fever and cough for two days", "headache behind the eyes", "sore throat",
+            "stomach ache after meals", "back pain when sitting", "rash on my arm",
+            "feeling dizzy in the morning", "runny nose and sneezing"]
+FEELINGS = ["a bit stressed about exams", "tired all the time", "anxious before meetings",
+            "lonely since moving", "happy today", "overwhelmed at work"]
+
+# route -> (weight in the mix, role needed, request)
+ROUTES = {
+    "/predict": (40, "user", lambda c, r: c.post("/predict", json={"message": r.choice(MESSAGES)})),
+    "/login": (5, None, lambda c, r: c.post("/login", data={"email": c.email, "password": PASSWORD})),
+    "/analyze": (10, "user", lambda c, r: c.post("/analyze", data={"symptoms": r.choice(SYMPTOMS)})),
+    "/mental": (10, "user", lambda c, r: c.post("/mental", data={"feeling": r.choice(FEELINGS)})),
+    "/diet_nutrition": (15, "user", lambda c, r: c.get("/diet_nutrition")),
+    "/user_dashboard": (10, "user", lambda c, r: c.get(f"/user_dashboard?days={r.choice((7, 30, 90))}")),
+    "/reviewer": (5, "reviewer", lambda c, r: c.get("/reviewer")),
+    "/admin": (5, "reviewer", lambda c, r: c.get("/admin")),
+}
+
+
+def boot(workdir, llm_latency):
+    sys.path.insert(0, ROOT)
+    os.chdir(workdir)
+    os.environ["CURA_LLM_BACKEND"] = "stub"
+    os.environ["CURA_STUB_LATENCY"] = str(llm_latency)
+    os.environ["CURA_RATE_LIMIT"] = "0"  # measure capacity, not the per-user limits
+    import cura_app
+    app = cura_app.create_app({"WARMUP": []})  # also creates the schema
+    app.logger.disabled = True
+    return cura_app, app
+
+
+# ---------- SEEDING ----------
+def seed(cura_app, app, users, feedback, days):
+    from werkzeug.security import generate_password_hash
+
+    db = cura_app.db
+    with app.app_context():
+        hashed = generate_password_hash(PASSWORD)  # one real hash, shared: seeding stays fast
+        conn = db.engine.raw_connection()
+        cur = conn.cursor()
+        cur.executemany(
+            "INSERT INTO user (name, email, password, role) VALUES (?, ?, ?, ?)",
+            [(f"user{i}", f"user{i}@load.test", hashed, "reviewer" if i % 10 == 0 else "user")
+             for i in range(users)])
+
+        rng = random.Random(7)
+        start = datetime.utcnow() - timedelta(days=days)
+        cur.executemany(
+            "INSERT INTO feedback (user_id, message, reviewed, date_submitted) VALUES (?, ?, ?, ?)",
+            [(rng.randint(0, users), " ".join(rng.choices(MESSAGES + SYMPTOMS, k=4)), rng.random() < 0.5,
+              (start + timedelta(seconds=rng.randint(0, days * 86400))).strftime("%Y-%m-%d %H:%M:%S"))
+             for _ in range(feedback)])
+
+        today = datetime.utcnow().date()
+        cur.executemany(
+            "INSERT INTO user_log (user_id, date, diet_visits, symptoms_analyzed, mental_visits) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(u, (today - timedelta(days=d)).isoformat(), rng.randint(0, 5), rng.randint(0, 3), rng.randint(0, 3))
+             for u in range(1, users + 1) for d in range(days) if rng.random() < 0.6])
+        conn.commit()
+        conn.close()
+
+
+# ---------- DRIVING TRAFFIC ----------
+def make_client(app, user_index):
+    client = app.test_client()
+    client.email = f"user{user_index}@load.test"
+    client.post("/login", data={"email": client.email, "password": PASSWORD})
+    return client
+
+
+def run_phase(app, routes, requests, threads, users, seed_value):
+    """Run `requests` calls spread over `threads`; return {route: [latency, ...]}, errors, wall time."""
+    latencies = {route: [] for route in routes}
+    errors = {route: 0 for route in routes}
+    lock = threading.Lock()
+    weights = [ROUTES[route][0] for route in routes]
+
+    # Log every thread's clients in before the clock starts
+    sessions = []
+    for t in range(threads):
+        rng = random.Random(seed_value * 1000 + t)
+        user = make_client(app, rng.choice([i for i in range(users) if i % 10]))
+        reviewer = make_client(app, rng.choice(range(0, users, 10)))
+        sessions.append((rng, {"user": user, "reviewer": reviewer, None: user}))
+    reset_peak_rss()
+
+    def worker(t):
+        rng, clients = sessions[t]
+        local = {route: [] for route in routes}
+        local_errors = {route: 0 for route in routes}
+        for _ in range(requests // threads):
+            route = rng.choices(routes, weights)[0]
+            _, role, call = ROUTES[route]
+            start = time.perf_counter()
+            response = call(clients[role], rng)
+            local[route].append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                local_errors[route] += 1
+        with lock:
+            for route in routes:
+                latencies[route].extend(local[route])
+                errors[route] += local_errors[route]
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    [t.start() for t in pool]
+    [t.join() for t in pool]
+    return latencies, errors, time.perf_counter() - start
+
+
+def reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux >= 4.0), so each
+    # phase reports its own peak instead of the process's, which the seeding dominates
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass  # elsewhere the figure stays cumulative over the process
+
+
+def peak_rss_mb():
+    # VmHWM resets on exec; ru_maxrss would report the parent's peak in spawned workers
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def phases():
+    return [[route] for route in ROUTES] + [list(ROUTES)]
+
+
+def phase_name(routes):
+    return routes[0] if len(routes) == 1 else "mix"
+
+
+# ---------- STATS ----------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, wall, rss_mb):
+    values = sorted(v for route_values in latencies.values() for v in route_values)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    result = {
+        "requests": len(values),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(values) / wall, 1) if wall else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "peak_rss_mb": round(rss_mb, 1),
+    }
+    if len(latencies) > 1:
+        result["by_route"] = {
+            route: {"requests": len(values), "errors": errors[route],
+                    "p50_ms": ms(percentile(sorted(values), 50)), "p95_ms": ms(percentile(sorted(values), 95)),
+                    "p99_ms": ms(percentile(sorted(values), 99))}
+            for route, values in latencies.items()
+        }
+    return result
+
+
+# ---------- MULTI-PROCESS ----------
+def process_worker(workdir, args, index, barrier, results):
+    cura_app, app = boot(workdir, args.llm_latency)
+    for routes in phases():
+        barrier.wait()
+        latencies, errors, wall = run_phase(app, routes, args.requests, args.threads,
+                                            args.users, seed_value=index + 1)
+        results.put((phase_name(routes), index, latencies, errors, wall, peak_rss_mb()))
+    cura_app.passwords.shutdown()
+
+
+def run_processes(workdir, args):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(args.workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=process_worker, args=(workdir, args, i, barrier, results))
+             for i in range(args.workers)]
+    [p.start() for p in procs]
+
+    collected = {}
+    for _ in range(len(phases()) * args.workers):
+        name, _, latencies, errors, wall, rss = results.get()
+        merged = collected.setdefault(name, [{}, {}, 0.0, 0.0])
+        for route, values in latencies.items():
+            merged[0].setdefault(route, []).extend(values)
+            merged[1][route] = merged[1].get(route, 0) + errors[route]
+        merged[2] = max(merged[2], wall)  # phases start together; the slowest worker ends it
+        merged[3] = max(merged[3], rss)
+    [p.join() for p in procs]
+    return {name: summarize(*values) for name, values in collected.items()}
+
+
+# ---------- REPORTING ----------
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(title, results, baseline=None):
+    print(f"\n{title}")
+    print(f"  {'phase':16} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'RSS MB':>7}")
+    for name, r in results.items():
+        line = (f"  {name:16} {r['requests']:6} {r['errors']:4} {r['throughput_rps']:8.1f} "
+                f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['peak_rss_mb']:7.1f}")
+        old = (baseline or {}).get(name)
+        if old and old.get("p95_ms") and old.get("throughput_rps"):
+            line += (f"   p95 {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+6.1f}%"
+                     f"  req/s {(r['throughput_rps'] / old['throughput_rps'] - 1) * 100:+6.1f}%")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--feedback", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90, help="days of seeded activity history")
+    parser.add_argument("--requests", type=int, default=200, help="requests per phase, per process")
+    parser.add_argument("--threads", type=int, default=4, help="client threads per process")
+    parser.add_argument("--workers", type=int, default=4, help="processes for the multi-process run (0 = skip)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub Gemini latency in seconds")
+    parser.add_argument("--out", default=None, help="JSON output path")
+    parser.add_argument("--compare", default=None, help="earlier JSON results to diff against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="cura-load-")
+    cura_app, app = boot(workdir, args.llm_latency)
+    started = time.perf_counter()
+    seed(cura_app, app, args.users, args.feedback, args.days)
+    print(f"seeded {args.users} users, {args.feedback} feedback, {args.days} days of logs "
+          f"in {time.perf_counter() - started:.1f}s ({workdir})")
+
+    in_process = {}
+    for routes in phases():
+        latencies, errors, wall = run_phase(app, routes, args.requests, args.threads, args.users, 0)
+        in_process[phase_name(routes)] = summarize(latencies, errors, wall, peak_rss_mb())
+    multi_process = run_processes(workdir, args) if args.workers else {}
+
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "in_process": in_process,
+        "multi_process": multi_process,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(f"In-process ({args.threads} threads)", in_process, baseline and baseline.get("in_process"))
+    if multi_process:
+        print_table(f"Multi-process ({args.workers} workers x {args.threads} threads)", multi_process,
+                    baseline and baseline.get("multi_process"))
+
+    out = args.out or os.path.join(ROOT, "benchmarks", "results",
+                                   f"loadtest-{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
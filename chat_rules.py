@@ -0,0 +1,230 @@
+import random
+import re
+
+# ---------- CHATBOT RULE TABLE ----------
+# Built once at import time and compiled into a single regex, so /predict
+# scans the message in one pass instead of one `in` check per keyword.
+
+# 🆘 First aid tips (works even in guest mode) — checked in this order
+FIRST_AID_TIPS = {
+    "burn": "🔥 <b>First Aid for Burns</b><br>• Cool burn under running water 20 minutes<br>• Do NOT use ice or toothpaste<br>• Cover with clean cloth<br>• Seek help if blistering or deep burn",
+    "bleeding": "🩸 <b>First Aid for Bleeding</b><br>• Apply firm pressure with cloth<br>• Keep injured part elevated<br>• Do NOT remove soaked cloth—add more<br>• Seek medical help if not stopping",
+    "choking": "🫁 <b>First Aid for Choking</b><br>• Encourage coughing<br>• If unable to breathe: 5 back blows + 5 thrusts<br>• Call emergency services",
+    "fracture": "🦴 <b>First Aid for Fracture</b><br>• Keep injured area still<br>• Do NOT straighten bone<br>• Apply cold pack<br>• Seek medical attention",
+    "faint": "😵 <b>First Aid for Fainting</b><br>• Lay person flat & elevate legs<br>• Loosen clothing<br>• Allow airflow<br>• If unconscious > 1 min, seek help",
+    "snake": "🐍 <b>First Aid for Snake Bite</b><br>• Keep person calm<br>• Immobilize limb<br>• Do NOT suck venom or apply ice<br>• Go to hospital immediately",
+    "asthma": "💨 <b>First Aid for Asthma Attack</b><br>• Sit upright<br>• Use inhaler: 1 puff every 30–60 sec (max 10)<br>• Seek help if no improvement",
+    "heart attack": "❤️ <b>Heart Attack First Aid</b><br>• Call emergency services<br>• Keep person calm & seated<br>• Loosen tight clothes<br>• If unresponsive: start CPR if trained"
+}
+
+# 🚫 Guests asking for protected tools
+GUEST_RESTRICTED_ANSWER = (
+    "⚠️ You're currently exploring Cura as a <b>Guest</b>.<br><br>"
+    "These tools are available only for registered users:<br>"
+    "• Symptom Analyzer<br>"
+    "• Mental Health Hub<br>"
+    "• Diet & Nutrition<br><br>"
+    "👉 Please <a href='/register' style='color:#E0AAFF;'>register here</a> to unlock full access. 💫"
+)
+
+WELLNESS_TIPS = [
+    "💧 Stay hydrated!",
+    "🌙 Sleep 7 hours for better recovery.",
+    "🚶 Walk 20 minutes daily.",
+    "🥦 Eat something green today!",
+    "🧘 Deep breathing lowers stress immediately."
+]
+
+DEFAULT_ANSWER = (
+    "🤖 I’m <b>Cura</b> — your AI health assistant! Ask me:<br>"
+    "• First Aid Tips<br>"
+    "• Show me diet plans<br>"
+    "• Give me a wellness tip<br>"
+    "• How to manage stress"
+)
+
+FIRST_AID_MENU = (
+    "🆘 <b>First Aid</b><br>Tell me what happened — burn, bleeding, choking, fracture, fainting, "
+    "snake bite, asthma or heart attack — and I’ll share the steps.<br>"
+    "In an emergency, call your local emergency number first."
+)
+
+# Each rule: (name, keywords, answer, guest_only).
+# Order is priority: first aid, then the guest restriction, then the features.
+# An answer may be a list, in which case one entry is picked at random.
+RULES = [
+    *[(f"first_aid_{i}", [kw], tip, False) for i, (kw, tip) in enumerate(FIRST_AID_TIPS.items())],
+
+    ("guest_restricted",
+     ["diet", "nutrition", "mental", "health hub", "symptom", "analyze", "checker"],
+     GUEST_RESTRICTED_ANSWER, True),
+
+    ("creators", ["who created", "developer", "made cura"], (
+        "👩‍💻 CURA was developed by a team of students and developers-"
+        " Aadhav Gugan, GYR Saran, Sai Prasad Reddy, SV Manoj Kumar"
+        "to make AI-powered healthcare accessible to everyone."
+    ), False),
+
+    ("about", ["what is cura", "about cura", "tell me about cura"], (
+        "🤖 <b>CURA</b> = Care, Understand, Respond, Assist.<br>"
+        "Your personal AI Health & Wellness Assistant."
+    ), False),
+
+    ("features", ["patient tools", "features", "help", "what can you do"], (
+        "🩺 You can explore these patient tools:<br>"
+        "• <b>Symptom Checker</b><br>"
+        "• <b>Mental Health Hub</b><br>"
+        "• <b>Diet & Nutrition</b><br>"
+        "Would you like me to open one for you?"
+    ), False),
+
+    ("diet", ["diet", "nutrition"], (
+        "🥗 Explore our <b>Diet & Nutrition</b> section for meal plans.<br>"
+        "👉 <a href='/diet_nutrition'>Open Diet Plans</a>"
+    ), False),
+
+    ("symptoms", ["symptom", "doctor", "analyze"], (
+        "🧠 Use our <b>Symptom Analyzer</b> for quick insights.<br>"
+        "👉 <a href='/analyze'>Try Symptom Checker</a>"
+    ), False),
+
+    ("mental", ["mental", "stress", "mood"], (
+        "🧘 Visit the <b>Mental Health Hub</b> for support.<br>"
+        "👉 <a href='/mental'>Open Mental Health Hub</a>"
+    ), False),
+
+    ("wellness_tip", ["wellness tip", "health tip", "motivate", "daily tip"], WELLNESS_TIPS, False),
+
+    ("contact", ["contact", "help center", "support"], (
+        "📩 Contact support anytime:<br>"
+        "<a href='mailto:support@cura.ai'>support@cura.ai</a>"
+    ), False),
+
+    ("register", ["register", "sign up"], (
+        "✨ You can <a href='/register' style='color:#E0AAFF;'>register here</a> "
+        "to unlock all of CURA’s features!"
+    ), False),
+]
+
+
+# 💬 Replies for the intent tags of the NeuralNet model (intents.json). A tag
+# with no entry here is never answered; the health tags reuse their rule's reply.
+_RULE_ANSWERS = {name: answer for name, _, answer, _ in RULES}
+INTENT_ANSWERS = {
+    "greeting": "👋 Hi! I’m <b>Cura</b>. Ask me for first aid tips, diet plans or a wellness tip.",
+    "goodbye": "👋 Take care! Stay healthy and come back anytime.",
+    "thanks": "💜 You’re welcome! Anything else I can help with?",
+    "funny": "😄 Why did the banana go to the doctor? It wasn’t peeling well!",
+    "identity": _RULE_ANSWERS["about"],
+    "first_aid": FIRST_AID_MENU,
+    "symptoms": _RULE_ANSWERS["symptoms"],
+    "diet": _RULE_ANSWERS["diet"],
+    "mental_health": _RULE_ANSWERS["mental"],
+    "wellness_tip": WELLNESS_TIPS,
+}
+GUEST_RESTRICTED_INTENTS = {"symptoms", "diet", "mental_health"}
+
+
+def _trie_pattern(words):
+    # Factor the keywords into a prefix trie ("he(?:alth\ hub|lp(?:\ center)?)")
+    # so the regex engine picks a branch by its first character instead of
+    # trying every keyword at every word start. Longer matches are preferred.
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if "" in node else "")
+
+    return emit(trie)
+
+
+def _compile(rules, guest):
+    # keyword → priority of the best rule it fires. A match on "help center"
+    # also means "help" matched at the same spot, so a keyword inherits the
+    # priority of any shorter keyword that is a prefix of it.
+    own = {}
+    for idx, (_, keywords, _, guest_only) in enumerate(rules):
+        if guest_only and not guest:
+            continue
+        for kw in keywords:
+            own.setdefault(kw, idx)
+
+    priority = {
+        kw: min(idx for other, idx in own.items() if kw.startswith(other))
+        for kw in own
+    }
+
+    # The lookahead keeps `finditer` from consuming text, so keywords that
+    # overlap ("tell me about cura" / "about cura") are all seen. Only the
+    # start is anchored: "burns" still hits "burn" but "heartburn" doesn't.
+    pattern = re.compile(r"\b(?=(" + _trie_pattern(own) + "))")
+
+    # For the keyword-by-keyword scan, best rule first. A keyword that starts
+    # with one of the same or better priority ("help center" / "help") can't
+    # decide anything, so it is left out.
+    scan = [kw for kw in sorted(priority, key=priority.get)
+            if not any(kw != other and kw.startswith(other) and priority[other] <= priority[kw] for other in priority)]
+    return pattern, priority, scan
+
+
+# Messages longer than this (characters) are matched keyword by keyword
+# instead of with the regex; see benchmarks/bench_predict.py.
+SCAN_CUTOFF = 150
+
+# Guest-only rules would shadow later rules sharing a keyword ("diet"),
+# so registered users get their own matcher without them.
+_GUEST_MATCHER = _compile(RULES, guest=True)
+_USER_MATCHER = _compile(RULES, guest=False)
+
+
+def match_rule(user_msg, role="guest"):
+    """Return the highest-priority rule answer for `user_msg`, or None.
+
+    `user_msg` must already be lowercase: the routes lower it once for the
+    rules and the classifier.
+    """
+    pattern, priority, scan = _GUEST_MATCHER if role == "guest" else _USER_MATCHER
+    best = len(RULES)
+    if len(user_msg) > SCAN_CUTOFF:
+        # The regex does Python-level work at every word; on long text one
+        # C-speed find per keyword, best rule first, is cheaper.
+        for keyword in scan:
+            if keyword not in user_msg:
+                continue
+            start = user_msg.find(keyword)
+            # then the regex's \b: keywords start with a letter, so the one before must not be a word char
+            while start > 0 and (user_msg[start - 1].isalnum() or user_msg[start - 1] == "_"):
+                start = user_msg.find(keyword, start + 1)
+            if start != -1:
+                best = priority[keyword]
+                break
+    else:
+        for m in pattern.finditer(user_msg):
+            idx = priority[m.group(1)]
+            if idx < best:
+                best = idx
+                if best == 0:
+                    break
+
+    if best == len(RULES):
+        return None
+
+    answer = RULES[best][2]
+    return random.choice(answer) if isinstance(answer, list) else answer
+
+
+def fallback_answer(intent=None, role="guest"):
+    """Answer for a message no keyword rule matched: the classifier's intent, else the default."""
+    if role == "guest" and intent in GUEST_RESTRICTED_INTENTS:
+        return GUEST_RESTRICTED_ANSWER
+    answer = INTENT_ANSWERS.get(intent) or DEFAULT_ANSWER
+    return random.choice(answer) if isinstance(answer, list) else answer
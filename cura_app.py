@@ -1,73 +1,226 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify, session, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, UserMixin, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import json
+import logging
 import random
-from models import db, User, Feedback,UserLog
+import time
+from functools import cache
+from models import db, User, Feedback,UserLog, LLMCacheEntry, LLMUsage, RateLimitBucket
+from chat_rules import match_rule, fallback_answer
+from intent_model import load_classifier
+from llm_cache import ResponseCache, SQLCacheStore
+from semantic_cache import SemanticCache
+from llm_provider import LLMClient, LLMUnavailable
+from llm_usage import UsageBuffer
+from prompts import PromptBuilder
+from activity import ActivityBuffer, daily_series, series_since, WINDOWS
+from migrations import upgrade as upgrade_schema
+from pagination import cursor_int, keyset_page, page_size
+from feedback_search import ensure_feedback_fts, search_feedback
+from user_cache import UserCache
+from http_cache import StaticAssets, PageCache, compress_response
+from db_engine import database_uri, engine_options, init_engine
+from metrics import Metrics
+from passwords import PasswordHasher, HashingBusy
+from rate_limit import ConcurrencyLimiter, RateLimiter, RateLimited, SQLBucketStore
+from exports import export_rows, FORMATS as EXPORT_FORMATS
+from sqlalchemy import select, text, update
 from datetime import datetime
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks
+    fcntl = None
 
 # ---------- APP CONFIG ----------
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'cura-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(os.getcwd(), 'database', 'cura.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Defaults for create_app(); CURA_* environment variables are read when an
+# app is created, and create_app(config) overrides any of them.
+def configure(app):
+    app.config['SECRET_KEY'] = 'cura-secret-key'
+    app.config['DATABASE_DIR'] = os.path.join(os.getcwd(), 'database')   # cura.db (unless DATABASE_URL), semantic cache, init lock
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_BUSY_TIMEOUT'] = 5000                # ms a writer waits for the lock before "database is locked"
+    app.config['SQLITE_TUNED'] = os.getenv("CURA_SQLITE_TUNED", "1") == "1"  # WAL, synchronous=NORMAL, mmap
+    app.config['SQLITE_MMAP_SIZE'] = 256 * 1024 * 1024
+    app.config['DB_POOL_SIZE'] = int(os.getenv("CURA_DB_POOL_SIZE", "10"))   # server databases only
+    app.config['DB_MAX_OVERFLOW'] = 20
+    app.config['DB_POOL_TIMEOUT'] = 10                  # seconds to wait for a free connection
+    app.config['DB_POOL_RECYCLE'] = 1800                # seconds
+    app.config['DB_POOL_PRE_PING'] = True
+    app.config['INTENT_THRESHOLD'] = float(os.getenv("CURA_INTENT_THRESHOLD", "0.9"))
+    app.config['PREDICT_BATCH_LIMIT'] = 20              # messages per /predict/batch; each one costs a "predict" token, so keep <= its burst
+    app.config['GEMINI_MODEL'] = "gemini-2.0-flash"
+    app.config['LLM_BACKEND'] = os.getenv("CURA_LLM_BACKEND", "gemini")   # "stub" for offline load tests
+    app.config['LLM_STUB_LATENCY'] = float(os.getenv("CURA_STUB_LATENCY", "0.5"))
+    app.config['LLM_STUB_FAILURE_RATE'] = float(os.getenv("CURA_STUB_FAILURE_RATE", "0.0"))
+    app.config['LLM_TIMEOUT'] = 20.0                   # seconds, whole call incl. retries
+    app.config['LLM_ATTEMPT_TIMEOUT'] = 8.0            # seconds, one upstream attempt
+    app.config['LLM_CHUNK_TIMEOUT'] = 5.0              # seconds, longest silence between two streamed chunks
+    app.config['LLM_RETRIES'] = 2
+    app.config['LLM_HEDGE_AFTER'] = None               # e.g. 3.0 to fire a backup request
+    app.config['LLM_BREAKER_THRESHOLD'] = 5
+    app.config['LLM_BREAKER_RESET'] = 30.0
+    app.config['PROMPT_INPUT_TOKENS'] = {               # budget for the user's text in each prompt; longer input is cut
+        "analyze": int(os.getenv("CURA_PROMPT_TOKENS_ANALYZE", "300")),
+        "mental": int(os.getenv("CURA_PROMPT_TOKENS_MENTAL", "200")),
+    }
+    app.config['LLM_MAX_OUTPUT_TOKENS'] = {             # max_output_tokens per call (~150 words = ~200 tokens)
+        "analyze": 300,
+        "mental": 120,
+    }
+    app.config['LLM_PRICES'] = {                        # USD per 1M (input, output) tokens, for the usage view
+        "gemini-2.0-flash": (0.10, 0.40),
+    }
+    app.config['LLM_USAGE_FLUSH_INTERVAL'] = 10.0       # seconds between bulk llm_usage writes
+    app.config['ACTIVITY_BUFFERED'] = os.getenv("CURA_ACTIVITY_BUFFERED", "1") == "1"
+    app.config['ACTIVITY_FLUSH_INTERVAL'] = 5.0        # seconds between bulk UserLog writes
+    app.config['ACTIVITY_FLUSH_SIZE'] = 500            # ...or sooner once this many counters are pending
+    app.config['ACTIVITY_POLL_INTERVAL'] = 30           # seconds between dashboard refreshes via /api/activity; 0 = off
+    app.config['LLM_CACHE_TTL'] = 3600                 # seconds
+    app.config['LLM_CACHE_MAX_ENTRIES'] = 1024
+    app.config['LLM_CACHE_MAX_BYTES'] = 4 * 1024 * 1024
+    app.config['LLM_CACHE_PERSIST'] = os.getenv("CURA_LLM_CACHE_PERSIST") == "1"
+    app.config['SEMANTIC_CACHE'] = os.getenv("CURA_SEMANTIC_CACHE", "0") == "1"   # reuse answers for reworded symptoms; opt-in
+    app.config['SEMANTIC_CACHE_THRESHOLD'] = float(os.getenv("CURA_SEMANTIC_CACHE_THRESHOLD", "0.95"))  # TF-IDF cosine; lower reuses more, but mismatches more
+    app.config['SEMANTIC_CACHE_CAPACITY'] = 100000      # entries; the least recently used one is replaced
+    app.config['SEMANTIC_CACHE_TTL'] = 7 * 24 * 3600    # seconds
+    app.config['USER_CACHE_TTL'] = float(os.getenv("CURA_USER_CACHE_TTL", "60"))  # seconds; 0 = query every request
+    app.config['USER_CACHE_MAX_ENTRIES'] = 10000
+    app.config['USER_CACHE_VERIFY_INTERVAL'] = 1.0       # seconds before a cached user's version is re-checked
+    app.config['STATIC_FINGERPRINT'] = True             # hashed, precompressed static URLs
+    app.config['STATIC_MAX_AGE'] = 365 * 24 * 3600      # seconds; safe because the URL changes with the content
+    app.config['PAGE_CACHE'] = True                     # cache anonymous renders of the static pages
+    app.config['COMPRESS_MIN_SIZE'] = 500               # bytes; smaller responses go out as-is
+    app.config['COMPRESS_LEVEL'] = 6                    # gzip level for dynamic responses
+    app.config['BROTLI_LEVEL'] = 5                      # brotli quality for dynamic responses (if installed)
+    app.config['METRICS_ENABLED'] = os.getenv("CURA_METRICS", "1") == "1"
+    app.config['METRICS_TOKEN'] = os.getenv("CURA_METRICS_TOKEN")   # if set, /metrics needs "Authorization: Bearer <token>"; else loopback or admin only
+    app.config['PROFILE_SLOW_MS'] = float(os.environ["CURA_PROFILE_SLOW_MS"]) if os.getenv("CURA_PROFILE_SLOW_MS") else None
+    app.config['PROFILE_DIR'] = os.path.join(os.getcwd(), "profiles")   # cProfile dumps of slow requests
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv("CURA_PASSWORD_HASH_METHOD", "scrypt")  # e.g. "pbkdf2:sha256:600000"
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv("CURA_PASSWORD_HASH_WORKERS", "2"))  # processes; 0 = inline
+    app.config['PASSWORD_HASH_MAX_PENDING'] = 4         # hashes queued + running in the pool; bounds the CPU logins can take
+    app.config['PASSWORD_HASH_MAX_WAITING'] = 4         # logins waiting for a slot (0 = 503 at once); waiting + pending logins hold request threads
+    app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = 2.0     # seconds a login waits for a slot before a 503
+    app.config['PASSWORD_HASH_TIMEOUT'] = 10.0          # seconds
+    app.config['LLM_MAX_CONCURRENT'] = int(os.getenv("CURA_LLM_MAX_CONCURRENT", "8"))  # Gemini calls in flight per worker
+    app.config['LLM_MAX_WAITING'] = 16                  # calls queued for a slot before new ones get a 429
+    app.config['LLM_QUEUE_TIMEOUT'] = 5.0               # seconds a queued call waits for a slot
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv("CURA_RATE_LIMIT", "1") == "1"
+    app.config['RATE_LIMITS'] = {                       # group: (requests per minute, burst), per user or IP
+        "analyze": (6, 3),
+        "mental": (10, 5),
+        "predict": (60, 20),
+    }
+    app.config['RATE_LIMIT_SHARED'] = os.getenv("CURA_RATE_LIMIT_SHARED") == "1"   # buckets in the DB, shared by workers
+    app.config['REVIEW_BULK_LIMIT'] = 1000               # feedback ids per bulk mark-reviewed; larger sets go by filter
+    app.config['EXPORT_BATCH_ROWS'] = 1000               # rows per server-side cursor fetch in CSV/JSONL exports
+    app.config['WARMUP'] = os.getenv("CURA_WARMUP", "llm,classifier,templates,database,semantic_cache,passwords").split(",")  # create_app() steps before serving; "" = none
 
-os.makedirs("database", exist_ok=True)
-db.init_app(app)
+# ---------- EXTENSIONS ----------
+# Created unbound here; create_app() binds each one with init_app(app).
+
+# Buffered (user, day, metric) counters for the health dashboard
+activity = ActivityBuffer()
 
 # ---------- LOGIN MANAGER ----------
 login_manager = LoginManager()
-login_manager.login_view = 'login'
-login_manager.init_app(app)
+login_manager.login_view = 'main.login'
+
+# ---------- HTTP CACHING + COMPRESSION ----------
+static_assets = StaticAssets()
+page_cache = PageCache()
+
+# Password hashing runs in a bounded process pool
+passwords = PasswordHasher()
+HASHING_BUSY = "⏳ Lots of people are signing in right now. Please try again in a moment."
+
+# Read-only user snapshots so the loader doesn't hit the DB on every request
+user_cache = UserCache()
+
+# ---------- LLM CLIENT + RESPONSE CACHE ----------
+llm = LLMClient(None)  # backend picked from LLM_BACKEND by init_app
+llm_cache = ResponseCache()
+# Nearest earlier symptom question (TF-IDF cosine) → its answer
+symptom_cache = SemanticCache()
+
+# Token budgets in, per-day token / latency accounting out
+prompt_builder = PromptBuilder()
+llm_usage = UsageBuffer()
+
+# ---------- ADMISSION CONTROL (429 + Retry-After) ----------
+llm_slots = ConcurrencyLimiter()
+rate_limiter = RateLimiter()
+
+# ---------- METRICS (/metrics) ----------
+metrics = Metrics()
+
+def is_admin_session():
+    return bool(session.get("admin_verified")) or (current_user.is_authenticated and current_user.role in ["reviewer", "admin"])
+
+# ---------- ROUTES ----------
+# Every view lives on this blueprint, so endpoints are "main.<view>" in url_for
+main = Blueprint("main", __name__, cli_group=None)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(user_id)
 
 # ---------- GUEST LOGIN ----------
-@app.route("/guest")
+@main.route("/guest")
 def guest_login():
     logout_user() 
     session["role"] = "guest"
     flash("You're exploring Cura as a Guest. Register to unlock full features!", "info")
-    return redirect(url_for("index"))
+    return redirect(url_for("main.index"))
 
 # ---------- PROFILE FEATURE ----------
-@app.route("/profile", methods=["GET", "POST"])
+@main.route("/profile", methods=["GET", "POST"])
 @login_required
 def profile():
     if request.method == "POST":
-        current_user.name = request.form.get("name")
-        current_user.phone = request.form.get("phone")
-        current_user.dob = request.form.get("dob")
-        current_user.gender = request.form.get("gender")
+        # current_user is a cached snapshot — edit the real row, then drop the snapshot
+        user = db.session.get(User, current_user.id)
+        user.name = request.form.get("name")
+        user.phone = request.form.get("phone")
+        user.dob = request.form.get("dob")
+        user.gender = request.form.get("gender")
 
         new_password = request.form.get("password")
         if new_password:
-            current_user.password = generate_password_hash(new_password)
+            try:
+                user.password = passwords.hash(new_password)
+            except HashingBusy:
+                db.session.rollback()
+                flash(HASHING_BUSY, "warning")
+                return render_template("profile.html", user=current_user), 503, {"Retry-After": "2"}
 
         db.session.commit()
+        user_cache.invalidate(user.id)
         flash("✅ Profile updated successfully!", "success")
-        return redirect(url_for("profile"))
+        return redirect(url_for("main.profile"))
 
     return render_template("profile.html", user=current_user)
 
 # ---------- STATIC ROUTES ----------
-@app.route("/")
+@main.route("/")
+@page_cache.page
 def index():
     return render_template("base.html")
 
-@app.route("/about")
+@main.route("/about")
+@page_cache.page
 def about():
     return render_template("about.html")
 
-@app.route("/faq")
+@main.route("/faq")
+@page_cache.page
 def faq():
     return render_template("faq.html")
 
 # ---------- CONTACT US ----------
-@app.route("/contact", methods=["GET", "POST"])
+@main.route("/contact", methods=["GET", "POST"])
 def contact():
     if request.method == "POST":
         name = request.form.get("name") or "Anonymous"
@@ -84,262 +237,296 @@ def contact():
                     f"Name: {name}\n"
                     f"Email: {email}\n"
                     f"Phone: {phone}\n\n"
-                    f"Message: {message}"
+                    f"Message: {message}",
+            contact_name=name,
+            contact_email=email or None,
+            contact_phone=phone or None
         )
 
         db.session.add(feedback)
         db.session.commit()
 
         flash("✅ Your message has been sent! Our team will contact you soon.", "success")
-        return redirect(url_for("contact"))
+        return redirect(url_for("main.contact"))
 
     return render_template("contact.html")
 
 
-@app.route("/privacy")
+@main.route("/privacy")
+@page_cache.page
 def privacy():
     return render_template("privacy.html")
 
 # ---------- DIET AND NUTRITION ----------
-@app.route("/diet_nutrition")
+@main.route("/diet_nutrition")
 @login_required
 def diet_nutrition():
-    from datetime import datetime
-
-    log = UserLog(
-        user_id=current_user.id,
-        date=datetime.utcnow().strftime("%a"),
-        diet_visits=1
-    )
-    db.session.add(log)
-    db.session.commit()
-
+    activity.record(current_user.id, "diet_visits")
     return render_template("diet_nutrition.html")
 
+# ---------- GEMINI PROMPTS ----------
+CRISIS_KEYWORDS = ["suicide", "kill myself", "end my life", "die"]
+CRISIS_ALERT = (
+    "🚨 If you are in danger, please contact a trusted person or "
+    "local helpline immediately."
+)
+# Canned answers while the LLM is unavailable (breaker open / retries exhausted)
+ANALYZE_BUSY = ("⚠️ Cura's AI analysis is temporarily unavailable. Please try again in a minute. "
+                "If your symptoms are severe, contact a doctor right away.")
+MENTAL_BUSY = ("💜 I'm having trouble responding right now, but you're not alone. "
+               "Take a slow breath with the exercise below and try again in a moment.")
+
+SYMPTOM_PROMPT = (
+    "User symptoms: {text}\n\n"
+    "You are Cura, a helpful AI assistant. Provide a short summary of possible causes "
+    "and 3 lifestyle tips under 150 words."
+)
+MENTAL_PROMPT = (
+    "The user says: '{text}'. Provide a supportive, gentle, 2–3 line "
+    "message. Do not diagnose. Be comforting."
+)
+
+# User text is normalized and cut to PROMPT_INPUT_TOKENS before it goes in
+def symptom_prompt(symptoms):
+    return prompt_builder.build("analyze", SYMPTOM_PROMPT, symptoms)
+
+def mental_prompt(feeling):
+    return prompt_builder.build("mental", MENTAL_PROMPT, feeling)
+
+def usage_recorder(prompt):
+    # Bound now, in the request thread: streamed answers report after the view returned
+    user_id = current_user.id
+    return lambda usage, seconds: llm_usage.record(user_id, prompt.endpoint, llm.model_name, usage,
+                                                   seconds, truncated=prompt.truncated)
+
+def ask_llm(prompt):
+    # Waits (briefly) for one of the per-worker upstream slots, or raises RateLimited
+    with llm_slots.acquire():
+        return llm.generate(prompt.text, max_tokens=prompt.max_tokens, on_usage=usage_recorder(prompt))
+
+def analyze_symptoms(prompt):
+    # Reworded repeats of an earlier question reuse its answer instead of a Gemini call
+    answer = symptom_cache.lookup(prompt.user_text)
+    if answer is None:
+        answer = ask_llm(prompt)
+        symptom_cache.add(prompt.user_text, answer)
+    return answer
+
+def crisis_alert(feeling):
+    return CRISIS_ALERT if any(word in feeling for word in CRISIS_KEYWORDS) else None
+
+def log_symptom_analysis():
+    # ✅ Log user activity (Symptom Analyzer usage)
+    if current_user.is_authenticated:
+        activity.record(current_user.id, "symptoms_analyzed")
+
+# ---------- STREAMING (Server-Sent Events) ----------
+def sse(data, event=None):
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+def stream_answer(label, prompt, error_text, busy_text, alert=None, on_complete=None, similar=False):
+    """Stream a Gemini answer as SSE: optional `alert` event, text chunks, then `done`.
+
+    Cached answers arrive as one chunk. Crisis (alert) answers skip the cache.
+    With `similar` the semantic cache is tried too, on the prompt's user text.
+    Anything else needs an upstream slot, taken before the response starts so
+    an overloaded worker can still answer 429.
+    """
+    model_name = llm.model_name
+    use_cache = alert is None
+    cached = llm_cache.lookup(model_name, prompt.text) if use_cache else None
+    if cached is None and similar:
+        cached = symptom_cache.lookup(prompt.user_text)
+    slot = llm_slots.acquire() if cached is None else None
+    on_usage = usage_recorder(prompt) if cached is None else None
+
+    @stream_with_context
+    def events():
+        start = time.perf_counter()
+        ttft = None
+        parts = []
+        if alert:
+            yield sse({"text": alert}, event="alert")
+        try:
+            for text in ([cached] if cached is not None else llm.stream(prompt.text, prompt.max_tokens, on_usage)):
+                if not text:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                parts.append(text)
+                yield sse({"text": text})
+
+            answer = "".join(parts).strip()
+            if use_cache and cached is None and answer:
+                llm_cache.save(model_name, prompt.text, answer)
+                if similar:
+                    symptom_cache.add(prompt.user_text, answer)
+            if on_complete:
+                on_complete()
+
+            total = time.perf_counter() - start
+            current_app.logger.info("%s stream: ttft=%.0fms total=%.0fms cached=%s",
+                                    label, (ttft or total) * 1000, total * 1000, cached is not None)
+            yield sse({"ttft_ms": round((ttft or total) * 1000), "total_ms": round(total * 1000),
+                       "cached": cached is not None}, event="done")
+        except LLMUnavailable as e:
+            current_app.logger.warning("%s stream: LLM unavailable (%s)", label, e)
+            yield sse({"text": busy_text}, event="error")
+        except Exception as e:
+            current_app.logger.warning("%s stream failed after %.0fms: %s", label, (time.perf_counter() - start) * 1000, e)
+            yield sse({"text": error_text.format(e=e)}, event="error")
+        finally:
+            if slot:
+                slot.release()
+
+    response = Response(events(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    if slot:
+        response.call_on_close(slot.release)  # the client may leave before the stream starts
+    return response
+
+# Over a rate limit or out of upstream slots: forms get their page back, fetch calls get JSON
+RATE_LIMITED_PAGES = {"main.analyze": ("analyze.html", "analysis"), "main.mental_health": ("mental_health.html", "ai_response")}
+
+@main.app_errorhandler(RateLimited)
+def rate_limited(e):
+    headers = {"Retry-After": str(e.retry_after)}
+    message = f"⏳ {e.description} Try again in {e.retry_after}s."
+    if request.endpoint in RATE_LIMITED_PAGES:
+        template, field = RATE_LIMITED_PAGES[request.endpoint]
+        return render_template(template, **{field: message}), 429, headers
+    return jsonify({"error": message, "retry_after": e.retry_after}), 429, headers
+
 # ---------- SYMPTOM ANALYZER ----------
-@app.route("/analyze", methods=["GET", "POST"])
+@main.route("/analyze", methods=["GET", "POST"])
 @login_required
+@rate_limiter.limit("analyze")
 def analyze():
-    import google.generativeai as genai
     analysis = None
 
     if request.method == "POST":
         symptoms = request.form["symptoms"].strip()
         try:
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            prompt = (
-                f"User symptoms: {symptoms}\n\n"
-                "You are Cura, a helpful AI assistant. Provide a short summary of possible causes "
-                "and 3 lifestyle tips under 150 words."
-            )
-            response = model.generate_content(prompt)
-            analysis = getattr(response, "text", "⚠️ Unable to read response.")
-
-            # ✅ Log user activity (Symptom Analyzer usage)
-            if current_user.is_authenticated:
-                log_entry = UserLog(
-                    user_id=current_user.id,
-                    date=datetime.utcnow().strftime("%a"),
-                    symptoms_analyzed=1  # count one usage
-                )
-                db.session.add(log_entry)
-                db.session.commit()
-
+            prompt = symptom_prompt(symptoms)
+            generate = lambda: analyze_symptoms(prompt)
+            analysis = llm_cache.get_or_compute(llm.model_name, prompt.text, generate) or "⚠️ Unable to read response."
+            log_symptom_analysis()
+
+        except RateLimited:
+            raise
+        except LLMUnavailable:
+            analysis = ANALYZE_BUSY
         except Exception as e:
             analysis = f"⚠️ Error during analysis: {e}"
 
     return render_template("analyze.html", analysis=analysis)
 
+@main.route("/analyze/stream", methods=["POST"])
+@login_required
+@rate_limiter.limit("analyze")
+def analyze_stream():
+    symptoms = request.form["symptoms"].strip()
+    return stream_answer("analyze", symptom_prompt(symptoms), "⚠️ Error during analysis: {e}",
+                         ANALYZE_BUSY, on_complete=log_symptom_analysis, similar=True)
+
 # ---------- MENTAL HEALTH HUB ----------
-@app.route("/mental", methods=["GET", "POST"])
+@main.route("/mental", methods=["GET", "POST"])
 @login_required
+@rate_limiter.limit("mental")
 def mental_health():
-    import google.generativeai as genai
-    from datetime import datetime
-
     alert = None
     ai_response = None
 
     # --- Log MENTAL VISIT ---
-    today = datetime.utcnow().strftime("%a")
-    log = UserLog.query.filter_by(user_id=current_user.id, date=today).first()
-
-    if not log:
-        log = UserLog(
-            user_id=current_user.id,
-            date=today,
-            mental_visits=1
-        )
-        db.session.add(log)
-    else:
-        log.mental_visits += 1
-
-    db.session.commit()
-    # ------------------------
+    activity.record(current_user.id, "mental_visits")
 
     # If user submitted a message
     if request.method == "POST":
         feeling = request.form["feeling"].lower()
 
         # Crisis detection
-        crisis_keywords = ["suicide", "kill myself", "end my life", "die"]
-        if any(word in feeling for word in crisis_keywords):
-            alert = (
-                "🚨 If you are in danger, please contact a trusted person or "
-                "local helpline immediately."
-            )
-
-        # Generate supportive AI reply
-        try:
-            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
-            prompt = (
-                f"The user says: '{feeling}'. Provide a supportive, gentle, 2–3 line "
-                "message. Do not diagnose. Be comforting."
-            )
-
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            response = model.generate_content(prompt)
-
-            ai_response = response.text.strip()
+        alert = crisis_alert(feeling)
 
+        # Generate supportive AI reply (crisis messages always get a fresh answer)
+        try:
+            prompt = mental_prompt(feeling)
+            generate = lambda: (ask_llm(prompt) or "").strip() or None
+            ai_response = llm_cache.get_or_compute(llm.model_name, prompt.text, generate, bypass=alert is not None)
+
+        except RateLimited:
+            raise
+        except LLMUnavailable:
+            ai_response = MENTAL_BUSY
         except Exception:
             ai_response = "⚠️ Could not process your message."
 
     return render_template("mental_health.html", alert=alert, ai_response=ai_response)
 
+@main.route("/mental/stream", methods=["POST"])
+@login_required
+@rate_limiter.limit("mental")
+def mental_stream():
+    # The page visit was already logged when /mental was rendered
+    feeling = request.form["feeling"].lower()
+    return stream_answer("mental", mental_prompt(feeling), "⚠️ Could not process your message.",
+                         MENTAL_BUSY, alert=crisis_alert(feeling))
+
 # ---------- CHATBOT ----------
-@app.route("/predict", methods=["POST"])
+# int8 NeuralNet weights (intents.int8.npz) served with NumPy, loaded once per process (warm-up or first message)
+@cache
+def intent_classifier():
+    return load_classifier()
+
+def answer_messages(messages, role):
+    # Keyword rules first (first aid → guest restriction → CURA features).
+    # Whatever they miss goes through the classifier in one batched forward pass.
+    answers = [match_rule(m, role) for m in messages]
+    misses = [i for i, a in enumerate(answers) if a is None]
+
+    classifier = intent_classifier() if misses else None
+    if classifier is not None:
+        threshold = current_app.config['INTENT_THRESHOLD']
+        predictions = classifier.predict_batch([messages[i] for i in misses])
+        for i, (tag, prob) in zip(misses, predictions):
+            answers[i] = fallback_answer(tag if prob >= threshold else None, role)
+
+    return [a or fallback_answer(role=role) for a in answers]
+
+def current_role():
+    return session.get("role") or ("guest" if not current_user.is_authenticated else current_user.role)
+
+@main.route("/predict", methods=["POST"])
+@rate_limiter.limit("predict")
 def predict():
-    import random
-    from flask import session, jsonify
-    from flask_login import current_user
-
     data = request.get_json()
     user_msg = data.get("message", "").lower()
-    role = session.get("role") or ("guest" if not current_user.is_authenticated else current_user.role)
-
-    # -----------------------------------------------------------
-    # 🆘 FIRST AID EMERGENCY SYSTEM (Works even in guest mode)
-    # -----------------------------------------------------------
-    first_aid_tips = {
-        "burn": "🔥 <b>First Aid for Burns</b><br>• Cool burn under running water 20 minutes<br>• Do NOT use ice or toothpaste<br>• Cover with clean cloth<br>• Seek help if blistering or deep burn",
-        "bleeding": "🩸 <b>First Aid for Bleeding</b><br>• Apply firm pressure with cloth<br>• Keep injured part elevated<br>• Do NOT remove soaked cloth—add more<br>• Seek medical help if not stopping",
-        "choking": "🫁 <b>First Aid for Choking</b><br>• Encourage coughing<br>• If unable to breathe: 5 back blows + 5 thrusts<br>• Call emergency services",
-        "fracture": "🦴 <b>First Aid for Fracture</b><br>• Keep injured area still<br>• Do NOT straighten bone<br>• Apply cold pack<br>• Seek medical attention",
-        "faint": "😵 <b>First Aid for Fainting</b><br>• Lay person flat & elevate legs<br>• Loosen clothing<br>• Allow airflow<br>• If unconscious > 1 min, seek help",
-        "snake": "🐍 <b>First Aid for Snake Bite</b><br>• Keep person calm<br>• Immobilize limb<br>• Do NOT suck venom or apply ice<br>• Go to hospital immediately",
-        "asthma": "💨 <b>First Aid for Asthma Attack</b><br>• Sit upright<br>• Use inhaler: 1 puff every 30–60 sec (max 10)<br>• Seek help if no improvement",
-        "heart attack": "❤️ <b>Heart Attack First Aid</b><br>• Call emergency services<br>• Keep person calm & seated<br>• Loosen tight clothes<br>• If unresponsive: start CPR if trained"
-    }
-
-    for keyword, tip in first_aid_tips.items():
-        if keyword in user_msg:
-            return jsonify({"answer": tip})
-
-    # -----------------------------------------------------------
-    # 🚫 Restrict guest access to protected tools
-    # -----------------------------------------------------------
-    restricted_keywords = ["diet", "nutrition", "mental", "health hub", "symptom", "analyze", "checker"]
-    if role == "guest" and any(k in user_msg for k in restricted_keywords):
-        response = (
-            "⚠️ You're currently exploring Cura as a <b>Guest</b>.<br><br>"
-            "These tools are available only for registered users:<br>"
-            "• Symptom Analyzer<br>"
-            "• Mental Health Hub<br>"
-            "• Diet & Nutrition<br><br>"
-            "👉 Please <a href='/register' style='color:#E0AAFF;'>register here</a> to unlock full access. 💫"
-        )
-        return jsonify({"answer": response})
-
-    # -----------------------------------------------------------
-    # 🤖 CURA Knowledge & Features
-    # -----------------------------------------------------------
-    if any(w in user_msg for w in ["who created", "developer", "made cura"]):
-        response = (
-            "👩‍💻 CURA was developed by a team of students and developers-"
-            " Aadhav Gugan, GYR Saran, Sai Prasad Reddy, SV Manoj Kumar"
-            "to make AI-powered healthcare accessible to everyone."
-        )
-
-    elif any(w in user_msg for w in ["what is cura", "about cura", "tell me about cura"]):
-        response = (
-            "🤖 <b>CURA</b> = Care, Understand, Respond, Assist.<br>"
-            "Your personal AI Health & Wellness Assistant."
-        )
-
-    elif any(w in user_msg for w in ["patient tools", "features", "help", "what can you do"]):
-        response = (
-            "🩺 You can explore these patient tools:<br>"
-            "• <b>Symptom Checker</b><br>"
-            "• <b>Mental Health Hub</b><br>"
-            "• <b>Diet & Nutrition</b><br>"
-            "Would you like me to open one for you?"
-        )
-
-    elif any(w in user_msg for w in ["diet", "nutrition"]):
-        response = (
-            "🥗 Explore our <b>Diet & Nutrition</b> section for meal plans.<br>"
-            "👉 <a href='/diet_nutrition'>Open Diet Plans</a>"
-        )
-
-    elif any(w in user_msg for w in ["symptom", "doctor", "analyze"]):
-        response = (
-            "🧠 Use our <b>Symptom Analyzer</b> for quick insights.<br>"
-            "👉 <a href='/analyze'>Try Symptom Checker</a>"
-        )
-
-    elif any(w in user_msg for w in ["mental", "stress", "mood"]):
-        response = (
-            "🧘 Visit the <b>Mental Health Hub</b> for support.<br>"
-            "👉 <a href='/mental'>Open Mental Health Hub</a>"
-        )
-
-    elif any(w in user_msg for w in ["wellness tip", "health tip", "motivate", "daily tip"]):
-        tips = [
-            "💧 Stay hydrated!",
-            "🌙 Sleep 7 hours for better recovery.",
-            "🚶 Walk 20 minutes daily.",
-            "🥦 Eat something green today!",
-            "🧘 Deep breathing lowers stress immediately."
-        ]
-        response = random.choice(tips)
-
-    elif any(w in user_msg for w in ["contact", "help center", "support"]):
-        response = (
-            "📩 Contact support anytime:<br>"
-            "<a href='mailto:support@cura.ai'>support@cura.ai</a>"
-        )
-
-    elif "register" in user_msg or "sign up" in user_msg:
-        response = (
-            "✨ You can <a href='/register' style='color:#E0AAFF;'>register here</a> "
-            "to unlock all of CURA’s features!"
-        )
-
-    # -----------------------------------------------------------
-    # DEFAULT FALLBACK RESPONSE
-    # -----------------------------------------------------------
-    else:
-        response = (
-            "🤖 I’m <b>Cura</b> — your AI health assistant! Ask me:<br>"
-            "• First Aid Tips<br>"
-            "• Show me diet plans<br>"
-            "• Give me a wellness tip<br>"
-            "• How to manage stress"
-        )
-
-    return jsonify({"answer": response})
+    reply = {"answer": answer_messages([user_msg], current_role())[0]}
+    if isinstance(data.get("client_id"), str):
+        reply["client_id"] = data["client_id"][:64]  # echoed so the chat widget can match replies
+    return jsonify(reply)
+
+@main.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    data = request.get_json(silent=True) or {}
+    messages = data.get("messages")
+    if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+        return jsonify({"error": "Expected JSON body {\"messages\": [\"...\", ...]}"}), 400
+    if len(messages) > current_app.config['PREDICT_BATCH_LIMIT']:
+        return jsonify({"error": f"At most {current_app.config['PREDICT_BATCH_LIMIT']} messages per batch"}), 400
+    rate_limiter.hit("predict", cost=max(1, len(messages)))  # same budget as one /predict per message
+
+    answers = answer_messages([m.lower() for m in messages], current_role())
+    return jsonify({"answers": answers})
 
 # ---------- REGISTER ----------
-@app.route("/register", methods=["GET", "POST"])
+@main.route("/register", methods=["GET", "POST"])
 def register():
 
     # If user is logged in (NOT guest), block registration
     if current_user.is_authenticated and session.get("role") != "guest":
         flash("You already have an account. Please log in instead.", "warning")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
 
     # If in guest mode → allow registration (remove guest mode)
     if session.get("role") == "guest":
@@ -353,48 +540,68 @@ def register():
         # Email already exists — redirect to login
         if User.query.filter_by(email=email).first():
             flash("This email already exists. Please log in.", "danger")
-            return redirect(url_for("login"))
+            return redirect(url_for("main.login"))
 
-        hashed_pw = generate_password_hash(password)
+        try:
+            hashed_pw = passwords.hash(password)
+        except HashingBusy:
+            flash(HASHING_BUSY, "warning")
+            return render_template("register.html"), 503, {"Retry-After": "2"}
         user = User(name=name, email=email, password=hashed_pw)
         db.session.add(user)
         db.session.commit()
 
         flash("Registration successful! Please log in.", "success")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
 
     return render_template("register.html")
 
 # ---------- LOGIN ----------
-@app.route("/login", methods=["GET", "POST"])
+@main.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         email = request.form["email"]
         password = request.form["password"]
 
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        try:
+            valid = user is not None and passwords.verify(user.password, password)
+        except HashingBusy:
+            flash(HASHING_BUSY, "warning")
+            return render_template("login.html"), 503, {"Retry-After": "2"}
+
+        if valid and passwords.needs_rehash(user.password):
+            # Stored with older hash settings — upgrade while we have the plain password
+            try:
+                user.password = passwords.hash(password)
+                db.session.commit()
+            except HashingBusy:
+                pass  # keep the old hash; it gets upgraded on a later login
+
+        if valid:
             # ✅ Clear guest status
             session.pop("role", None)
             login_user(user)
+            user_cache.invalidate(user.id)
             flash("Login successful!", "success")
-            return redirect(url_for("dashboard"))
+            return redirect(url_for("main.dashboard"))
         else:
             flash("Invalid credentials.", "danger")
     return render_template("login.html")
 
 # ---------- LOGOUT ----------
-@app.route("/logout")
+@main.route("/logout")
 def logout():
     if current_user.is_authenticated:
+        user_cache.invalidate(current_user.id)
         logout_user()
     session.clear()  # ✅ Always clears guest flags
     flash("You have been logged out.", "info")
     session.pop("admin_verified", None)
-    return redirect(url_for("index"))
+    return redirect(url_for("main.index"))
 
 # ---------- FEEDBACK DASHBOARD ----------
-@app.route("/dashboard", methods=["GET", "POST"])
+@main.route("/dashboard", methods=["GET", "POST"])
 @login_required
 def dashboard():
     if request.method == "POST":
@@ -403,40 +610,128 @@ def dashboard():
         db.session.add(new_feedback)
         db.session.commit()
         flash("Feedback submitted successfully!", "success")
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("main.dashboard"))
 
     feedbacks = Feedback.query.filter_by(user_id=current_user.id).order_by(Feedback.date_submitted.desc()).all()
     return render_template("dashboard.html", name=current_user.name, feedbacks=feedbacks)
 
 # ---------- REVIEWER DASHBOARD ----------
-@app.route("/reviewer", methods=["GET", "POST"])
+FEEDBACK_STATUS = {"pending": False, "reviewed": True}
+FEEDBACK_SOURCE = ("guest", "registered")
+
+def parse_feedback_cursor(values):
+    return [datetime.fromisoformat(values[0]), cursor_int(values[1])]
+
+def form_ids(values):
+    """Row ids from form values; anything that isn't a plain positive 64-bit integer is skipped."""
+    return [int(v) for v in values if v.isascii() and v.isdigit() and 0 < int(v) < 2 ** 63]
+
+def feedback_filters(status, source):
+    conditions = []
+    if status in FEEDBACK_STATUS:
+        conditions.append(Feedback.reviewed == FEEDBACK_STATUS[status])
+    if source == "guest":
+        conditions.append(Feedback.user_id == 0)
+    elif source == "registered":
+        conditions.append(Feedback.user_id != 0)
+    return conditions
+
+def mark_reviewed(conditions):
+    """One UPDATE for every matching pending row; returns how many changed."""
+    stmt = update(Feedback).where(Feedback.reviewed.is_(False), *conditions).values(reviewed=True)
+    count = db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    db.session.commit()
+    return count
+
+def is_reviewer():
+    return getattr(current_user, "role", "user") == "reviewer"
+
+@main.route("/reviewer", methods=["GET", "POST"])
 @login_required
 def reviewer_dashboard():
-    if getattr(current_user, "role", "user") != "reviewer":
+    if not is_reviewer():
         flash("Access denied. Reviewer only.", "danger")
-        return redirect(url_for("dashboard"))
+        return redirect(url_for("main.dashboard"))
 
     if request.method == "POST":
-        fid = request.form.get("feedback_id")
-        fb = Feedback.query.get(fid)
-        if fb:
-            fb.reviewed = True
-            db.session.commit()
+        fid = request.form.get("feedback_id", type=int)
+        marked = mark_reviewed([Feedback.id == fid]) if fid else 0
+
+        # Marked from the page with fetch() → no full reload
+        if request.headers.get("X-Requested-With") == "fetch":
+            return jsonify({"ok": marked > 0, "id": fid})
+        if marked:
             flash(f"Feedback #{fid} marked as reviewed.", "success")
-        return redirect(url_for("reviewer_dashboard"))
+        return redirect(url_for("main.reviewer_dashboard", **request.args))
+
+    status = request.args.get("status", "all")
+    source = request.args.get("source", "all")
 
-    feedbacks = Feedback.query.order_by(Feedback.date_submitted.desc()).all()
-    return render_template("reviewer_dashboard.html", feedbacks=feedbacks)
+    page = keyset_page(
+        Feedback.query.filter(*feedback_filters(status, source)), [Feedback.date_submitted, Feedback.id],
+        cursor=request.args.get("cursor"), size=page_size(request.args.get("limit")),
+        parse=parse_feedback_cursor,
+    )
+    return render_template("reviewer_dashboard.html", feedbacks=page.items, page=page,
+                           status=status, source=source)
+
+@main.route("/reviewer/bulk", methods=["POST"])
+@login_required
+def reviewer_bulk():
+    """Mark the posted feedback ids, or everything matching status/source, reviewed."""
+    if not is_reviewer():
+        return jsonify({"error": "Access denied."}), 403
+
+    if request.form.get("scope") == "filter":
+        conditions = feedback_filters(request.form.get("status", "all"), request.form.get("source", "all"))
+    else:
+        ids = form_ids(request.form.getlist("feedback_id"))
+        if len(ids) > current_app.config['REVIEW_BULK_LIMIT']:
+            return jsonify({"error": f"At most {current_app.config['REVIEW_BULK_LIMIT']} ids per request; "
+                                     "mark by filter instead."}), 400
+        conditions = [Feedback.id.in_(ids)] if ids else None
+    marked = mark_reviewed(conditions) if conditions is not None else 0
+
+    if request.headers.get("X-Requested-With") == "fetch":
+        return jsonify({"ok": True, "marked": marked})
+    flash(f"{marked} feedback message{'s' if marked != 1 else ''} marked as reviewed.", "success")
+    return redirect(url_for("main.reviewer_dashboard", status=request.form.get("status", "all"),
+                            source=request.form.get("source", "all")))
+
+@main.route("/reviewer/search")
+@login_required
+def reviewer_search():
+    if not is_reviewer():
+        flash("Access denied. Reviewer only.", "danger")
+        return redirect(url_for("main.dashboard"))
+
+    q = request.args.get("q", "").strip()
+    results = search_feedback(q, cursor=request.args.get("cursor"),
+                              size=page_size(request.args.get("limit")))
+    return render_template("reviewer_dashboard.html", feedbacks=results.items, page=results,
+                           q=q, status="all", source="all")
 
 # ---------- ADMIN PANEL ----------
-@app.route("/admin", methods=["GET", "POST"])
+USER_ROLES = ("user", "reviewer", "admin")
+
+@main.route("/admin", methods=["GET", "POST"])
 @login_required
 def admin_panel():
 
     # STEP 1: If already verified admin / reviewer → show table
     if session.get("admin_verified") or current_user.role in ["reviewer", "admin"]:
-        users = User.query.order_by(User.id.asc()).all()
-        return render_template("admin_panel.html", users=users)
+        role = request.args.get("role", "all")
+        query = User.query
+        if role in USER_ROLES:
+            query = query.filter(User.role == role)
+
+        page = keyset_page(
+            query, [User.id], cursor=request.args.get("cursor"),
+            size=page_size(request.args.get("limit")), descending=False,
+            parse=lambda values: [cursor_int(values[0])],
+        )
+        return render_template("admin_panel.html", users=page.items, page=page,
+                               role=role, roles=USER_ROLES, verified=True)
 
     # STEP 2: Not verified yet → Show password screen
     if request.method == "POST":
@@ -444,61 +739,237 @@ def admin_panel():
 
         if password == "curaadmin123":
             # Upgrade user to reviewer (one-time upgrade)
-            current_user.role = "reviewer"
+            user = db.session.get(User, current_user.id)
+            user.role = "reviewer"
             db.session.commit()
+            user_cache.invalidate(user.id)
 
             # Remember admin session until logout
             session["admin_verified"] = True
 
             flash("✅ Admin access verified successfully!", "success")
-            return redirect(url_for("admin_panel"))
+            return redirect(url_for("main.admin_panel"))
         else:
             flash("❌ Incorrect Admin password.", "danger")
 
     # Show the admin password form
-    return render_template("admin_panel.html", users=None)
-
-# ---------- USER HEALTH DASHBOARD ----------
-@app.route("/user_dashboard")
+    return render_template("admin_panel.html", users=None, verified=False)
+
+# ---------- DATA EXPORTS (CSV / JSON Lines) ----------
+EXPORTS = {
+    "users": [User.id, User.name, User.email, User.phone, User.dob, User.gender, User.role],  # no password hashes
+    "feedback": [Feedback.id, Feedback.user_id, Feedback.message, Feedback.reviewed, Feedback.date_submitted,
+                 Feedback.contact_name, Feedback.contact_email, Feedback.contact_phone],
+    "user_logs": [UserLog.id, UserLog.user_id, UserLog.date, UserLog.symptoms_analyzed,
+                  UserLog.diet_visits, UserLog.mental_visits],
+    "llm_usage": [LLMUsage.id, LLMUsage.day, LLMUsage.user_id, LLMUsage.endpoint, LLMUsage.model, LLMUsage.calls,
+                  LLMUsage.prompt_tokens, LLMUsage.output_tokens, LLMUsage.latency_ms, LLMUsage.truncated],
+}
+
+@main.route("/admin/export/<dataset>.<fmt>")
 @login_required
-def user_dashboard():
-    logs = UserLog.query.filter_by(user_id=current_user.id).order_by(UserLog.id.asc()).all()
+def export_data(dataset, fmt):
+    if not (session.get("admin_verified") or current_user.role in ["reviewer", "admin"]):
+        return jsonify({"error": "Access denied."}), 403
+    if dataset not in EXPORTS or fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unknown export {dataset}.{fmt}"}), 404
+
+    columns = EXPORTS[dataset]
+    stmt = select(*columns).order_by(columns[0])  # primary key order: stable and index-backed
+    if dataset == "feedback":
+        stmt = stmt.where(*feedback_filters(request.args.get("status", "all"), request.args.get("source", "all")))
+    elif dataset == "users" and request.args.get("role") in USER_ROLES:
+        stmt = stmt.where(User.role == request.args["role"])
+    elif dataset == "user_logs":
+        activity.flush()  # include counters that haven't been written yet
+    elif dataset == "llm_usage":
+        llm_usage.flush()
+
+    filename = f"cura-{dataset}-{datetime.utcnow():%Y%m%d}.{fmt}"
+    rows = export_rows(db.engine, stmt, fmt, batch=current_app.config['EXPORT_BATCH_ROWS'])
+    return Response(stream_with_context(rows), mimetype=EXPORT_FORMATS[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+# ---------- LLM CACHE STATS ----------
+@main.route("/admin/cache_stats")
+@login_required
+def cache_stats():
+    if not (session.get("admin_verified") or current_user.role in ["reviewer", "admin"]):
+        return jsonify({"error": "Access denied."}), 403
+    return jsonify({**llm_cache.stats(), "user_cache": user_cache.stats(), "llm_slots": llm_slots.stats(),
+                    "symptom_cache": symptom_cache.stats(), "warmup": current_app.extensions.get("warmup")})
+
+# ---------- LLM USAGE + COST ----------
+@main.route("/admin/usage")
+@login_required
+def usage_report():
+    if not (session.get("admin_verified") or current_user.role in ["reviewer", "admin"]):
+        flash("Access denied. Reviewer only.", "danger")
+        return redirect(url_for("main.dashboard"))
 
-    grouped = {}  
-    # example structure:
-    # { 
-    #   "Fri": {"diet": 2, "symptoms": 1, "mental": 3}
-    # }
+    days = request.args.get("days", 30, type=int)
+    if days not in WINDOWS:
+        days = 30
+    llm_usage.flush()  # include calls that haven't been written yet
+    report = llm_usage.report(days)
 
-    for log in logs:
-        day = log.date
+    if request.args.get("format") == "json":
+        return jsonify({**report, "start": report["start"].isoformat(), "end": report["end"].isoformat(),
+                        "by_day": [{**row, "day": row["day"].isoformat()} for row in report["by_day"]]})
+    return render_template("admin_usage.html", report=report, days=days, windows=WINDOWS,
+                           prices=current_app.config['LLM_PRICES'])
 
-        if day not in grouped:
-            grouped[day] = {
-                "diet": 0,
-                "symptoms": 0,
-                "mental": 0
-            }
+# ---------- USER HEALTH DASHBOARD ----------
+@main.route("/user_dashboard")
+@login_required
+def user_dashboard():
+    activity.flush()  # include counters that haven't been written yet
 
-        grouped[day]["diet"] += log.diet_visits
-        grouped[day]["symptoms"] += log.symptoms_analyzed
-        grouped[day]["mental"] += log.mental_visits 
+    days = request.args.get("days", 7, type=int)
+    if days not in WINDOWS:
+        days = 7
 
-    dates = list(grouped.keys())
-    diet_visits = [grouped[d]["diet"] for d in dates]
-    symptom_uses = [grouped[d]["symptoms"] for d in dates]
-    mental_visits = [grouped[d]["mental"] for d in dates] 
+    # One indexed range read of the window's daily rows — cost depends on the window, not on lifetime activity
+    series = daily_series(current_user.id, days)
 
     return render_template(
         "user_dashboard.html",
-        dates=dates,
-        diet_visits=diet_visits,
-        symptom_uses=symptom_uses,
-        mental_visits=mental_visits 
+        days=days,
+        windows=WINDOWS,
+        poll_interval=current_app.config['ACTIVITY_POLL_INTERVAL'],
+        **series
     )
 
+@main.route("/api/activity")
+@login_required
+def activity_api():
+    """Chart series as JSON, for the dashboard to poll.
+
+    ?days=7|30|90 picks the window; ?since=YYYY-MM-DD (the last `cursor`)
+    returns only that day onwards, so the client replaces its last point and
+    appends new days. The ETag changes when one of the rows is written, and
+    If-None-Match gets a 304 without building the body. No flush here: polls
+    see counters once the buffer writes them (ACTIVITY_FLUSH_INTERVAL).
+    """
+    days = request.args.get("days", 7, type=int)
+    if days not in WINDOWS:
+        days = 7
+    since = request.args.get("since")
+    if since:
+        try:
+            since = datetime.strptime(since, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "since must be YYYY-MM-DD"}), 400
+
+    series, tag = series_since(current_user.id, days, since or None)
+    # Weak: the same data may go out gzipped or not (compress_response)
+    headers = {"ETag": f'W/"{tag}"', "Cache-Control": "private, no-cache", "Vary": "Cookie"}
+    if request.if_none_match.contains_weak(tag):
+        return Response(status=304, headers=headers)
+    return jsonify({"days": days, "cursor": series["iso_dates"][-1], **series}), 200, headers
+
+# ---------- DATABASE SETUP ----------
+def init_db():
+    directory = current_app.config['DATABASE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    # Workers started together would race on CREATE/ALTER TABLE, so one at a time
+    with open(os.path.join(directory, ".init.lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        db.create_all()
+        upgrade_schema(db.engine, db.metadata)
+        ensure_feedback_fts(db.engine)
+
+@main.cli.command("init-db")
+def init_db_command():
+    """Create missing tables and upgrade old ones."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # show what was upgraded
+    init_db()
+
+# ---------- STARTUP (create_app + warm-up) ----------
+# create_app() is what a server should load (e.g. gunicorn
+# "cura_app:create_app()"): it builds the app from configure() plus the
+# `config` overrides, binds the extensions, creates / upgrades the schema and
+# runs the WARMUP steps in the worker that will serve traffic, so one-time
+# costs (Gemini SDK import, classifier weights, template compilation, hash
+# worker processes...) are paid before the first request instead of by it.
+#
+# The extensions are module globals, so the last app created is the one they
+# serve: one live app per process (tests build a fresh one per test).
+def warm_templates():
+    for name in current_app.jinja_env.list_templates(extensions=["html"]):
+        current_app.jinja_env.get_template(name)  # compiled once, then served from Jinja's cache
+
+def warm_database():
+    db.session.execute(text("SELECT 1"))  # opens a pooled connection and applies the pragmas
+    db.session.remove()
+
+def warm_classifier():
+    classifier = intent_classifier()
+    if classifier is not None:
+        classifier.predict("hello")  # the first stem() imports nltk
+
+WARMUP_STEPS = {
+    "llm": llm.warm_up,
+    "classifier": warm_classifier,
+    "templates": warm_templates,
+    "database": warm_database,
+    "semantic_cache": symptom_cache.warm_up,
+    "passwords": passwords.warm_up,
+}
+
+def warm_up(steps=None):
+    """Run warm-up steps by name in the app context; returns {step: seconds}. A failing step is logged, not fatal."""
+    timings = {}
+    for name in filter(None, (s.strip() for s in (current_app.config['WARMUP'] if steps is None else steps))):
+        if name not in WARMUP_STEPS:
+            current_app.logger.warning("Unknown warm-up step %r (known: %s)", name, ", ".join(WARMUP_STEPS))
+            continue
+        started = time.perf_counter()
+        try:
+            WARMUP_STEPS[name]()
+        except Exception as e:
+            current_app.logger.warning("Warm-up step %s failed: %s", name, e)
+        timings[name] = time.perf_counter() - started
+    current_app.logger.info("Warm-up: %s", ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in timings.items()) or "off")
+    current_app.extensions["warmup"] = timings
+    return timings
+
+def create_app(config=None):
+    """Build the app: defaults and CURA_* variables, then `config` on top; schema and warm-up included."""
+    app = Flask(__name__)
+    configure(app)
+    app.config.update(config or {})
+    # Paths and engine options follow whatever the overrides picked
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', database_uri(os.path.join(app.config['DATABASE_DIR'], 'cura.db')))
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    app.config.setdefault('SEMANTIC_CACHE_DIR', os.path.join(app.config['DATABASE_DIR'], "semantic_cache"))  # None = memory only
+    app.config.setdefault('STATIC_CACHE_DIR', os.path.join(app.instance_path, "static_cache"))  # None = compress on every start
+
+    db.init_app(app)
+    init_engine(app, db)
+    activity.init_app(app)
+    login_manager.init_app(app)
+    static_assets.init_app(app)
+    page_cache.init_app(app)
+    app.after_request(compress_response)
+    passwords.init_app(app)
+    user_cache.init_app(app)
+    llm.init_app(app)
+    llm_cache.init_app(app, store=SQLCacheStore(db, LLMCacheEntry) if app.config['LLM_CACHE_PERSIST'] else None)
+    symptom_cache.init_app(app, model_name=llm.model_name)
+    prompt_builder.init_app(app)
+    llm_usage.init_app(app)
+    llm_slots.init_app(app)
+    rate_limiter.init_app(app, store=SQLBucketStore(db, RateLimitBucket) if app.config['RATE_LIMIT_SHARED'] else None)
+    metrics.init_app(app, db, llm, is_admin=is_admin_session)
+    app.register_blueprint(main)
+
+    with app.app_context():
+        init_db()
+        warm_up()
+    return app
+
 # ---------- MAIN ----------
 if __name__ == "__main__":
-    with app.app_context():
-        db.create_all()  
-    app.run(debug=True)
+    create_app().run(debug=True)
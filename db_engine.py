@@ -0,0 +1,67 @@
+import os
+
+from sqlalchemy import event
+
+# ---------- DATABASE ENGINE CONFIG ----------
+# Engine options come from app.config so the same code runs on the bundled
+# SQLite file or a pooled server database (DATABASE_URL=postgresql://...).
+# create_app(config) derives them after applying `config`, so an override of
+# the URI or DB_POOL_SIZE there reaches the engine too.
+#
+# SQLite: WAL lets readers keep going while one process writes, and
+# busy_timeout makes a second writer wait for the lock instead of failing
+# straight away with "database is locked".
+
+
+def database_uri(default_path):
+    return os.getenv("DATABASE_URL") or "sqlite:///" + default_path
+
+
+def is_sqlite(uri):
+    return uri.startswith("sqlite")
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database."""
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    if is_sqlite(uri):
+        # pysqlite's own timeout is the busy timeout for the connection
+        return {"connect_args": {"timeout": config.get("DB_BUSY_TIMEOUT", 5000) / 1000}}
+
+    return {
+        "pool_size": config.get("DB_POOL_SIZE", 10),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 10),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),  # drop connections before the server does
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+
+
+def sqlite_pragmas(config):
+    if not config.get("SQLITE_TUNED", True):
+        return {}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",  # durable at WAL checkpoints; safe with WAL, far fewer fsyncs
+        "busy_timeout": int(config.get("DB_BUSY_TIMEOUT", 5000)),
+        "mmap_size": int(config.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    }
+
+
+def init_engine(app, db):
+    """Apply per-connection settings to the app's engine (call after db.init_app)."""
+    if not is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, "connect", on_connect)
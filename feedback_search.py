@@ -0,0 +1,172 @@
+import logging
+import re
+
+from sqlalchemy import inspect, text
+
+from models import db, Feedback
+from pagination import cursor_int, decode_cursor, encode_cursor
+
+log = logging.getLogger(__name__)
+
+# ---------- FEEDBACK FULL-TEXT SEARCH (SQLite FTS5) ----------
+# feedback_fts is an external-content FTS5 index over Feedback, kept in sync
+# by triggers. Contact form fields are parsed once, when the message is
+# written, into their own columns so they can be searched and shown directly.
+
+CONTACT_HEADER = "📩 Contact Form Submission"
+_CONTACT_FIELD = re.compile(r"^(Name|Email|Phone): ?(.*)$", re.MULTILINE)
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+FTS_COLUMNS = ("message", "contact_name", "contact_email", "contact_phone")
+# bm25 column weights: a hit on the contact name / email counts more than one in the body
+BM25 = "bm25(feedback_fts, 1.0, 4.0, 4.0, 2.0)"
+
+
+def parse_contact(message):
+    """Return (name, email, phone) from a formatted contact message, or Nones."""
+    if not message or not message.startswith(CONTACT_HEADER):
+        return None, None, None
+    fields = {k: (v.strip() or None) for k, v in _CONTACT_FIELD.findall(message)}
+    fields = {k: (None if v == "None" else v) for k, v in fields.items()}
+    return fields.get("Name"), fields.get("Email"), fields.get("Phone")
+
+
+def fts_available(engine):
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_feedback_fts(engine):
+    """Create the FTS5 table + sync triggers (idempotent) and backfill parsed contact fields."""
+    with engine.begin() as conn:
+        # Older rows were written before the contact columns existed
+        rows = conn.execute(text(
+            "SELECT id, message FROM feedback WHERE contact_email IS NULL AND message LIKE :prefix"
+        ), {"prefix": CONTACT_HEADER + "%"}).all()
+        for row in rows:
+            name, email, phone = parse_contact(row.message)
+            conn.execute(text(
+                "UPDATE feedback SET contact_name = :name, contact_email = :email, contact_phone = :phone "
+                "WHERE id = :id"
+            ), {"id": row.id, "name": name, "email": email, "phone": phone})
+
+    if not fts_available(engine) or "feedback_fts" in inspect(engine).get_table_names():
+        return
+
+    cols = ", ".join(FTS_COLUMNS)
+    new_vals = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_vals = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE feedback_fts USING fts5({cols}, content='feedback', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER feedback_fts_ai AFTER INSERT ON feedback BEGIN "
+            f"INSERT INTO feedback_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER feedback_fts_ad AFTER DELETE ON feedback BEGIN "
+            f"INSERT INTO feedback_fts(feedback_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END"
+        ))
+        # Only text changes touch the index — marking feedback reviewed doesn't
+        conn.execute(text(
+            f"CREATE TRIGGER feedback_fts_au AFTER UPDATE OF {cols} ON feedback BEGIN "
+            f"INSERT INTO feedback_fts(feedback_fts, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+            f"INSERT INTO feedback_fts(rowid, {cols}) VALUES (new.id, {new_vals}); END"
+        ))
+        conn.execute(text("INSERT INTO feedback_fts(feedback_fts) VALUES ('rebuild')"))
+    log.info("Created feedback_fts search index")
+
+
+def fts_query(q, prefix=False):
+    """Turn free text into a safe FTS5 query where every word must match.
+
+    With `prefix`, the last word also matches as a prefix ("head" → "headache").
+    """
+    tokens = _TOKEN.findall(q or "")[:12]
+    terms = [f'"{t}"' for t in tokens]
+    if prefix and terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class SearchPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+# bm25 has to score every match before it can sort, so a word that appears in
+# half the table would cost a full pass. Only the newest RANK_WINDOW matches
+# are ranked; the window's lowest rowid is carried in the cursor so later
+# pages rank the same set.
+RANK_WINDOW = 5000
+
+
+def _ranked_ids(match, size, after=None, floor=None):
+    if floor is None:
+        floor = db.session.execute(text(
+            "SELECT min(rowid) FROM (SELECT rowid FROM feedback_fts WHERE feedback_fts MATCH :match "
+            "ORDER BY rowid DESC LIMIT :window)"
+        ), {"match": match, "window": RANK_WINDOW}).scalar()
+        if floor is None:
+            return [], None
+
+    params = {"match": match, "floor": floor, "limit": size + 1}
+    keyset = ""
+    if after:
+        keyset = f"AND ({BM25} > :rank OR ({BM25} = :rank AND feedback_fts.rowid > :id))"
+        params.update(rank=after[0], id=after[1])
+
+    rows = db.session.execute(text(
+        f"SELECT feedback_fts.rowid AS id, {BM25} AS rank FROM feedback_fts "
+        f"WHERE feedback_fts MATCH :match AND feedback_fts.rowid >= :floor {keyset} "
+        f"ORDER BY rank, feedback_fts.rowid LIMIT :limit"
+    ), params).all()
+    return rows, floor
+
+
+def search_feedback(q, cursor=None, size=25):
+    """Ranked (bm25) search over feedback; keyset-paginated on (rank, id)."""
+    if not fts_query(q):
+        return SearchPage([], None)
+
+    if not fts_available(db.engine):
+        return _search_like(q, cursor, size)
+
+    values = decode_cursor(cursor, (float, cursor_int, bool, cursor_int))
+    if values:
+        rank, last_id, prefix, floor = values
+        rows, floor = _ranked_ids(fts_query(q, prefix), size, (rank, last_id), floor)
+    else:
+        # Exact words first (cheap); widen the last word to a prefix only if that can't fill a page
+        prefix = False
+        rows, floor = _ranked_ids(fts_query(q), size)
+        if len(rows) <= size and fts_query(q, True) != fts_query(q):
+            prefix = True
+            rows, floor = _ranked_ids(fts_query(q, True), size)
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor([rows[-1].rank, rows[-1].id, prefix, floor])
+
+    by_id = {fb.id: fb for fb in Feedback.query.filter(Feedback.id.in_([r.id for r in rows]))}
+    return SearchPage([by_id[r.id] for r in rows if r.id in by_id], next_cursor)
+
+
+def _search_like(q, cursor, size):
+    # Other databases: unranked substring search, newest first
+    query = Feedback.query
+    for token in _TOKEN.findall(q)[:12]:
+        query = query.filter(Feedback.message.ilike(f"%{token}%"))
+    values = decode_cursor(cursor, (cursor_int,))
+    if values:
+        query = query.filter(Feedback.id < values[0])
+    rows = query.order_by(Feedback.id.desc()).limit(size + 1).all()
+    next_cursor = encode_cursor([rows[size - 1].id]) if len(rows) > size else None
+    return SearchPage(rows[:size], next_cursor)
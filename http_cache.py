@@ -0,0 +1,285 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+try:
+    import brotli
+except ImportError:  # optional — without it only gzip is offered
+    brotli = None
+
+# ---------- HTTP CACHING + COMPRESSION ----------
+# 1. StaticAssets: at startup every file under static/ gets a content-hashed
+#    URL (style.3f9a1c2b7e.css) and gzip/brotli copies, served with a one-year
+#    immutable Cache-Control. url_for('static', ...) picks the hashed name.
+#    The max-level copies are slow to make, so they are kept in
+#    STATIC_CACHE_DIR under the file's content hash: only new or changed
+#    files are compressed again, by the first worker that starts.
+# 2. PageCache: rendered HTML of the anonymous static pages, with ETag /
+#    Last-Modified so repeat visits get a 304.
+# 3. compress_response: gzip/brotli for every other HTML/JSON response.
+
+# Already-compressed formats gain nothing from another pass
+SKIP_COMPRESS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".ico", ".woff", ".woff2", ".gz", ".br", ".zip"}
+COMPRESSIBLE_TYPES = ("text/html", "text/css", "text/plain", "application/javascript",
+                      "text/javascript", "application/json", "image/svg+xml")
+
+
+def accepted_encodings():
+    header = request.headers.get("Accept-Encoding", "").lower()
+    accepted = {part.split(";")[0].strip() for part in header.split(",")}
+    return [enc for enc in ("br", "gzip") if enc in accepted and (enc != "br" or brotli)]
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=min(level, 9), mtime=0)
+
+
+def encoded_variants(data, gzip_level, brotli_level):
+    variants = {"identity": data}
+    gz = compress(data, "gzip", gzip_level)
+    if len(gz) < len(data):
+        variants["gzip"] = gz
+    if brotli:
+        br = compress(data, "br", brotli_level)
+        if len(br) < len(data):
+            variants["br"] = br
+    return variants
+
+
+def pick_variant(variants):
+    for encoding in accepted_encodings():
+        if encoding in variants:
+            return encoding, variants[encoding]
+    return "identity", variants["identity"]
+
+
+def fingerprint(path, digest):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest}{ext}"
+
+
+class _Asset:
+    def __init__(self, path, variants, digest, mtime):
+        self.path = path
+        self.variants = variants
+        self.etag = digest
+        self.mtime = mtime
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+# ---------- 1. FINGERPRINTED, PRECOMPRESSED STATIC FILES ----------
+class StaticAssets:
+    def __init__(self, app=None, cache_dir=None):
+        self.manifest = {}  # "style.css" -> "style.<hash>.css"
+        self.assets = {}    # "style.<hash>.css" -> _Asset
+        self.cache_dir = cache_dir  # compressed copies by content hash; None = compress in memory
+        self._folder = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        if not app.config.get("STATIC_FINGERPRINT", True):
+            return
+        self.cache_dir = app.config.get("STATIC_CACHE_DIR", self.cache_dir)
+        if self._folder != app.static_folder:
+            self.build(app.static_folder)
+        app.url_defaults(self._hashed_url)
+        self._fallback = app.view_functions["static"]
+        app.view_functions["static"] = self.serve
+
+    def build(self, folder):
+        """Hash and precompress every file under `folder` (runs once per process)."""
+        started = time.perf_counter()
+        self._compressed = 0
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                rel = os.path.relpath(full, folder).replace(os.sep, "/")
+                with open(full, "rb") as f:
+                    data = f.read()
+
+                content_hash = hashlib.sha256(data).hexdigest()
+                digest = content_hash[:10]
+                ext = os.path.splitext(filename)[1].lower()
+                if ext in SKIP_COMPRESS:
+                    variants = {"identity": data}
+                else:
+                    variants = self._variants(data, content_hash)
+
+                hashed = fingerprint(rel, digest)
+                self.manifest[rel] = hashed
+                self.assets[hashed] = _Asset(rel, variants, digest, os.path.getmtime(full))
+        self._folder = folder
+        self.app.logger.info("Fingerprinted %d static files in %.0f ms (%d copies compressed, others from the cache)",
+                             len(self.assets), (time.perf_counter() - started) * 1000, self._compressed)
+
+    def _variants(self, data, content_hash):
+        """gzip-9 / brotli-11 copies of `data`, reusing the ones an earlier start left in cache_dir."""
+        variants = {"identity": data}
+        for encoding, level in (("gzip", 9), ("br", 11)):
+            if encoding == "br" and not brotli:
+                continue
+            path = os.path.join(self.cache_dir, f"{content_hash}.{encoding}{level}") if self.cache_dir else None
+            body = self._read_cached(path)
+            if body is None:
+                body = compress(data, encoding, level)
+                self._compressed += 1
+                self._write_cached(path, body)
+            if len(body) < len(data):
+                variants[encoding] = body
+        return variants
+
+    @staticmethod
+    def _read_cached(path):
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_cached(self, path, body):
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so a worker starting alongside never reads half a file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.app.logger.warning("Could not cache %s: %s", path, e)
+
+    def _hashed_url(self, endpoint, values):
+        if endpoint == "static" and values.get("filename") in self.manifest:
+            values["filename"] = self.manifest[values["filename"]]
+
+    def serve(self, filename):
+        asset = self.assets.get(filename)
+        if asset is None:
+            # Unhashed or unknown names still work, just without the long cache lifetime
+            return self._fallback(filename=filename)
+
+        encoding, body = pick_variant(asset.variants)
+        response = self.app.response_class(body, mimetype=asset.mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = f"public, max-age={self.app.config.get('STATIC_MAX_AGE', 31536000)}, immutable"
+        response.set_etag(f"{asset.etag}-{encoding}")
+        response.last_modified = asset.mtime
+        return response.make_conditional(request)
+
+
+# ---------- 2. ANONYMOUS PAGE CACHE ----------
+class PageCache:
+    """Cache the rendered HTML of pages that look the same for every anonymous visitor.
+
+    Logged-in users, guests and anyone with a pending flash message get a
+    fresh render, since base.html changes for them.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._pages = {}  # path -> (variants, etag, last_modified)
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("PAGE_CACHE", True) and not app.debug
+        self.clear()
+
+    def cacheable(self):
+        return self.enabled and request.method == "GET" and not session and not current_user.is_authenticated
+
+    def page(self, view):
+        """Decorator for views whose output depends only on the path for anonymous users."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.cacheable():
+                return view(*args, **kwargs)
+
+            key = request.path  # query strings are ignored, so they can't fill the cache
+            with self._lock:
+                entry = self._pages.get(key)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                body = view(*args, **kwargs).encode("utf-8")
+                config = self.app.config
+                entry = (
+                    encoded_variants(body, config.get("COMPRESS_LEVEL", 6), config.get("BROTLI_LEVEL", 5)),
+                    hashlib.sha256(body).hexdigest()[:16],
+                    time.time(),
+                )
+                with self._lock:
+                    self._pages[key] = entry
+            else:
+                with self._lock:
+                    self.hits += 1
+
+            variants, etag, last_modified = entry
+            encoding, body = pick_variant(variants)
+            response = self.app.response_class(body, mimetype="text/html")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+            # Same URL renders differently once logged in, so caches must revalidate and key on the cookie
+            response.headers["Cache-Control"] = "no-cache"
+            response.headers["Vary"] = "Accept-Encoding, Cookie"
+            response.set_etag(f"{etag}-{encoding}")
+            response.last_modified = last_modified
+            return response.make_conditional(request)
+
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "pages": len(self._pages)}
+
+
+# ---------- 3. DYNAMIC RESPONSE COMPRESSION ----------
+def compress_response(response):
+    """after_request hook: compress HTML/JSON bodies the client can decode."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config.get("COMPRESS_MIN_SIZE", 500):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encodings = accepted_encodings()
+    if not encodings:
+        return response
+
+    encoding = encodings[0]
+    if encoding == "br":
+        level = current_app.config.get("BROTLI_LEVEL", 5)
+    else:
+        level = current_app.config.get("COMPRESS_LEVEL", 6)
+    response.set_data(compress(data, encoding, level))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
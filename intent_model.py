@@ -0,0 +1,148 @@
+import io
+import logging
+import os
+import zipfile
+
+import numpy as np
+
+from nltk_utils import bag_of_words_batch
+
+# ---------- TORCH-FREE INTENT CLASSIFIER ----------
+# NeuralNet (model.py) is trained and saved with torch, but serving it is just
+# three small matmuls on plain NumPy arrays, so the app never imports torch.
+#
+# train_intents.py retrains it on intents.json and writes MODEL_PATH: int8
+# weights with one float scale per output row, plus the frozen vocabulary.
+# That artifact is the only one the app serves. data.npz (WEIGHTS_PATH) is the
+# float32 export of the old data.pth checkpoint; it is kept as a fixture for
+# benchmarks/bench_classifier.py, which checks NumPy against torch.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_PATH = os.path.join(BASE_DIR, "data.pth")
+WEIGHTS_PATH = os.path.join(BASE_DIR, "data.npz")
+MODEL_PATH = os.path.join(BASE_DIR, "intents.int8.npz")
+
+log = logging.getLogger(__name__)
+
+
+def export_checkpoint(pth_path=CHECKPOINT_PATH, npz_path=WEIGHTS_PATH):
+    import torch
+
+    data = torch.load(pth_path, map_location="cpu")
+    state = {k: v.detach().cpu().numpy() for k, v in data["model_state"].items()}
+    np.savez(
+        npz_path,
+        l1_weight=state["l1.weight"], l1_bias=state["l1.bias"],
+        l2_weight=state["l2.weight"], l2_bias=state["l2.bias"],
+        l3_weight=state["l3.weight"], l3_bias=state["l3.bias"],
+        all_words=np.array(data["all_words"]),
+        tags=np.array(data["tags"]),
+    )
+    return npz_path
+
+
+# ---------- INT8 ARTIFACT ----------
+def quantize(w):
+    """Symmetric per-output-row int8: w ≈ q * scale[:, None]."""
+    scale = np.abs(w).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.round(w / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def _strings(values):
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def write_npz(path, arrays):
+    # np.savez stamps every member with the current time; fixed stamps keep the bytes reproducible
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, array in arrays.items():
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.ascontiguousarray(array), allow_pickle=False)
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, buffer.getvalue())
+    return path
+
+
+def export_int8(path, weights, all_words, tags):
+    """Save [(weight, bias), ...] as int8 + scales, with the vocabulary and tags as UTF-8 text."""
+    arrays = {}
+    for i, (w, b) in enumerate(weights, 1):
+        arrays[f"l{i}_weight_q"], arrays[f"l{i}_scale"] = quantize(np.asarray(w, dtype=np.float32))
+        arrays[f"l{i}_bias"] = np.asarray(b, dtype=np.float32)
+    arrays["vocab"] = _strings(all_words)  # row i of l1 is word i: the index is frozen with the weights
+    arrays["tags"] = _strings(tags)
+    return write_npz(path, arrays)
+
+
+class IntentClassifier:
+    def __init__(self, weights, all_words, tags):
+        # Stored transposed so a batch is simply X @ W + b
+        self.layers = [(np.ascontiguousarray(w.T), b) for w, b in weights]
+        self.all_words = list(all_words)
+        self.tags = list(tags)
+        self.word_index = {w: i for i, w in enumerate(self.all_words)}
+
+    @classmethod
+    def load(cls, npz_path=MODEL_PATH):
+        with np.load(npz_path) as data:
+            if "vocab" in data:  # int8 artifact: dequantized once here, matmuls stay float32
+                weights = [
+                    (data[f"l{i}_weight_q"].astype(np.float32) * data[f"l{i}_scale"][:, None], data[f"l{i}_bias"])
+                    for i in (1, 2, 3)
+                ]
+                words, tags = (bytes(data[k]).decode("utf-8").split("\n") for k in ("vocab", "tags"))
+                return cls(weights, words, tags)
+            weights = [
+                (data[f"l{i}_weight"].astype(np.float32), data[f"l{i}_bias"].astype(np.float32))
+                for i in (1, 2, 3)
+            ]
+            return cls(weights, data["all_words"].tolist(), data["tags"].tolist())
+
+    def forward(self, x):
+        out = x
+        last = len(self.layers) - 1
+        for i, (w, b) in enumerate(self.layers):
+            out = out @ w + b
+            if i != last:
+                np.maximum(out, 0, out=out)  # ReLU
+        return out
+
+    def predict_batch(self, sentences):
+        """Return [(tag, probability), ...] for every sentence in one matmul pass."""
+        if not sentences:
+            return []
+        bags = bag_of_words_batch(sentences, self.word_index)
+        logits = self.forward(bags)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        # A sentence with no known words only sees the biases — don't trust it
+        known = bags.any(axis=1)
+        return [
+            (self.tags[i], float(probs[row, i])) if known[row] else (None, 0.0)
+            for row, i in enumerate(best)
+        ]
+
+    def predict(self, sentence):
+        return self.predict_batch([sentence])[0]
+
+
+def load_classifier(npz_path=MODEL_PATH):
+    """Load the trained int8 model.
+
+    Returns None when the file is missing, truncated or not a model, so
+    /predict keeps working on the keyword rules alone.
+    """
+    try:
+        return IntentClassifier.load(npz_path)
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        log.warning("Intent classifier disabled, can't load %s: %s", npz_path, e)
+        return None
+
+
+if __name__ == "__main__":
+    print(f"Exported {CHECKPOINT_PATH} → {export_checkpoint()}")
@@ -0,0 +1,202 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# ---------- GEMINI RESPONSE CACHE ----------
+# In-process LRU (TTL + entry/byte limits) with an optional SQLite tier and
+# single-flight: concurrent identical prompts share one upstream call.
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt):
+    return _WS_RE.sub(" ", prompt).strip().lower()
+
+
+def cache_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SQLCacheStore:
+    """Persistent tier backed by the LLMCacheEntry table."""
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def get(self, key, ttl):
+        row = self.db.session.get(self.model, key)
+        if row is None or row.created_at < datetime.utcnow() - timedelta(seconds=ttl):
+            return None
+        return row.response
+
+    def set(self, key, model_name, value):
+        try:
+            self.db.session.merge(self.model(key=key, model=model_name, response=value,
+                                             created_at=datetime.utcnow()))
+            self.db.session.commit()
+        except Exception:
+            # The in-process tier still holds the answer; losing the write is fine
+            self.db.session.rollback()
+
+
+class ResponseCache:
+    def __init__(self, ttl=3600, max_entries=1024, max_bytes=4 * 1024 * 1024, store=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._bytes = 0
+        self._inflight = {}
+
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def init_app(self, app, store=None):
+        self.ttl = app.config.get("LLM_CACHE_TTL", self.ttl)
+        self.max_entries = app.config.get("LLM_CACHE_MAX_ENTRIES", self.max_entries)
+        self.max_bytes = app.config.get("LLM_CACHE_MAX_BYTES", self.max_bytes)
+        self.store = store
+        self.clear()  # answers cached for a previous app
+
+    # ----- LRU -----
+    def _get_fresh(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return item[1]
+
+    def _drop(self, key):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    def _put(self, key, value):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    # ----- public -----
+    def get_or_compute(self, model_name, prompt, compute, bypass=False):
+        """Return the cached answer for (model, prompt) or call `compute()` once.
+
+        `compute` returns the response text; None or an exception is never cached.
+        """
+        if bypass:
+            with self._lock:
+                self.bypassed += 1
+            return compute()
+
+        key = cache_key(model_name, prompt)
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self.store.get(key, self.ttl) if self.store else None
+            if value is not None:
+                with self._lock:
+                    self.persistent_hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                if value is not None and self.store:
+                    self.store.set(key, model_name, value)
+
+            if value is not None:
+                with self._lock:
+                    self._put(key, value)
+            flight.value = value
+            return value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def lookup(self, model_name, prompt):
+        """Plain cache read (no single-flight), for callers that stream the miss themselves."""
+        key = cache_key(model_name, prompt)
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+        value = self.store.get(key, self.ttl) if self.store else None
+        with self._lock:
+            if value is not None:
+                self.persistent_hits += 1
+                self._put(key, value)
+            else:
+                self.misses += 1
+        return value
+
+    def save(self, model_name, prompt, value):
+        key = cache_key(model_name, prompt)
+        if self.store:
+            self.store.set(key, model_name, value)
+        with self._lock:
+            self._put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.persistent_hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,387 @@
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import NamedTuple
+
+from prompts import estimate_tokens
+
+# ---------- LLM PROVIDER ----------
+# One long-lived client for every Gemini call: configured once, per-call
+# deadlines, bounded retries with jitter, a circuit breaker that fails fast,
+# optional hedged requests, and a local stub backend for offline load tests.
+#
+# Backends return (text, usage) from generate() and yield (text, usage) pairs
+# from stream(); usage is None when the upstream doesn't report token counts,
+# and the client then estimates them from the text.
+
+
+class LLMUnavailable(Exception):
+    """Raised when the breaker is open or every attempt failed before the deadline."""
+
+
+class Usage(NamedTuple):
+    prompt_tokens: int
+    output_tokens: int
+    estimated: bool = False
+
+
+# ---------- BACKENDS ----------
+class GeminiBackend:
+    def __init__(self, model_name, api_key=None):
+        self.name = model_name
+        self.api_key = api_key
+        self._model = None
+        self._lock = threading.Lock()
+
+    def model(self):
+        # Import + configure the SDK once per process, on first use
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key or os.getenv("GEMINI_API_KEY"))
+                    self._model = genai.GenerativeModel(self.name)
+        return self._model
+
+    def warm_up(self):
+        self.model()
+
+    @staticmethod
+    def _options(max_tokens):
+        return {"max_output_tokens": max_tokens} if max_tokens else None
+
+    @staticmethod
+    def _usage(response):
+        meta = getattr(response, "usage_metadata", None)
+        if not meta or not getattr(meta, "prompt_token_count", 0):
+            return None
+        return Usage(meta.prompt_token_count, getattr(meta, "candidates_token_count", 0) or 0)
+
+    def generate(self, prompt, timeout, max_tokens=None):
+        response = self.model().generate_content(prompt, generation_config=self._options(max_tokens),
+                                                 request_options={"timeout": timeout})
+        return getattr(response, "text", None), self._usage(response)
+
+    def stream(self, prompt, timeout, max_tokens=None):
+        response = self.model().generate_content(prompt, stream=True, generation_config=self._options(max_tokens),
+                                                 request_options={"timeout": timeout})
+        for chunk in response:
+            # usage_metadata is cumulative; the last chunk carries the totals
+            yield getattr(chunk, "text", ""), self._usage(chunk)
+
+
+class StubBackend:
+    """Offline stand-in with configurable latency and failure rate."""
+
+    name = "stub"
+
+    def __init__(self, latency=0.5, jitter=0.1, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        pass
+
+    def _roll(self):
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.failure_rate
+        return delay, failed
+
+    def _answer(self, prompt, max_tokens=None):
+        answer = ("(stub) Based on what you shared, this is a placeholder answer from Cura's "
+                  f"offline backend. Prompt length: {len(prompt)} characters. "
+                  "Stay hydrated, rest well and see a doctor if things get worse.")
+        return answer[:max_tokens * 4] if max_tokens else answer
+
+    def generate(self, prompt, timeout, max_tokens=None):
+        delay, failed = self._roll()
+        time.sleep(min(delay, timeout))
+        if delay > timeout:
+            raise TimeoutError(f"stub backend exceeded {timeout:.1f}s")
+        if failed:
+            raise ConnectionError("stub backend injected failure")
+        return self._answer(prompt, max_tokens), None
+
+    def stream(self, prompt, timeout, max_tokens=None):
+        delay, failed = self._roll()
+        words = self._answer(prompt, max_tokens).split(" ")
+        per_word = delay / len(words)
+        if failed:
+            time.sleep(min(delay / 2, timeout))
+            raise ConnectionError("stub backend injected failure")
+        started = time.monotonic()
+        for word in words:
+            time.sleep(per_word)
+            if time.monotonic() - started > timeout:
+                raise TimeoutError(f"stub backend exceeded {timeout:.1f}s")
+            yield word + " ", None
+
+
+# ---------- CIRCUIT BREAKER ----------
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Truthy if a call may go upstream: True, or "probe" for the one half-open trial call."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True  # let exactly one probe through
+                return "probe"
+            return False
+
+    def release_probe(self):
+        """The probe ended without a verdict (e.g. the client left); let the next call probe."""
+        with self._lock:
+            if self.state == "half_open":
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+# ---------- CLIENT ----------
+_END = object()
+
+
+class LLMClient:
+    def __init__(self, backend, timeout=20.0, attempt_timeout=8.0, retries=2, backoff=0.5,
+                 backoff_cap=4.0, hedge_after=None, breaker=None, max_workers=16, chunk_timeout=None):
+        self.backend = backend
+        self.timeout = timeout                  # overall deadline per call, retries included
+        self.attempt_timeout = attempt_timeout  # deadline for a single upstream attempt
+        self.chunk_timeout = chunk_timeout or attempt_timeout  # longest gap between two streamed chunks
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.hedge_after = hedge_after  # seconds before a duplicate request is fired; None = off
+        self.breaker = breaker or CircuitBreaker()
+        self.observer = None  # called as observer(kind, outcome, seconds) after every call
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def init_app(self, app):
+        self.configure(app.config)
+
+    def configure(self, config):
+        """Pick the backend, deadlines and breaker from LLM_* config."""
+        self.backend = build_backend(config)
+        self.timeout = config.get("LLM_TIMEOUT", 20.0)
+        self.attempt_timeout = config.get("LLM_ATTEMPT_TIMEOUT", 8.0)
+        self.chunk_timeout = config.get("LLM_CHUNK_TIMEOUT") or self.attempt_timeout
+        self.retries = config.get("LLM_RETRIES", 2)
+        self.hedge_after = config.get("LLM_HEDGE_AFTER")
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.get("LLM_BREAKER_THRESHOLD", 5),
+            reset_after=config.get("LLM_BREAKER_RESET", 30.0),
+        )
+
+    @property
+    def model_name(self):
+        return self.backend.name
+
+    def _observe(self, kind, outcome, started):
+        if self.observer is not None:
+            self.observer(kind, outcome, time.monotonic() - started)
+
+    def _sleep_before_retry(self, attempt, deadline):
+        # Exponential backoff with full jitter, never past the deadline
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff * 2 ** attempt))
+        time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+
+    @staticmethod
+    def _report(on_usage, prompt, text, usage, started):
+        # Called in the caller's thread, so it can still read the request / current user
+        if on_usage is not None:
+            on_usage(usage or Usage(estimate_tokens(prompt), estimate_tokens(text), estimated=True),
+                     time.monotonic() - started)
+
+    def _attempt(self, prompt, remaining, max_tokens):
+        futures = [self._pool.submit(self.backend.generate, prompt, remaining, max_tokens)]
+        deadline = time.monotonic() + remaining
+
+        if self.hedge_after is not None and self.hedge_after < remaining:
+            done, _ = wait(futures, timeout=self.hedge_after)
+            if not done:
+                futures.append(self._pool.submit(self.backend.generate, prompt, deadline - time.monotonic(),
+                                                 max_tokens))
+
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        raise error or TimeoutError(f"LLM call exceeded {remaining:.1f}s")
+
+    @staticmethod
+    def _pump(chunks, out, stop):
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                out.put(chunk)
+            out.put(_END)
+        except BaseException as e:
+            out.put(e)
+
+    def _timed_chunks(self, prompt, first_timeout, max_tokens):
+        """The backend's stream, read on a pool thread so a stalled upstream raises
+        TimeoutError (first chunk: `first_timeout`, then chunk_timeout) instead of hanging."""
+        out, stop = queue.SimpleQueue(), threading.Event()
+        self._pool.submit(self._pump, self.backend.stream(prompt, first_timeout, max_tokens), out, stop)
+        wait_for = first_timeout
+        try:
+            while True:
+                try:
+                    item = out.get(timeout=wait_for)
+                except queue.Empty:
+                    raise TimeoutError(f"no stream data for {wait_for:.1f}s") from None
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+                wait_for = self.chunk_timeout
+        finally:
+            stop.set()
+
+    def warm_up(self):
+        """Do the backend's one-time setup (SDK import, client) now instead of on the first call."""
+        self.backend.warm_up()
+
+    def generate(self, prompt, max_tokens=None, on_usage=None):
+        """Return the response text, or raise LLMUnavailable.
+
+        `max_tokens` caps the output; `on_usage(usage, seconds)` is called once
+        the call succeeds.
+        """
+        started = time.monotonic()
+        if not self.breaker.allow():
+            self._observe("generate", "circuit_open", started)
+            raise LLMUnavailable("circuit open")
+
+        deadline = started + self.timeout
+        error = None
+        for attempt in range(self.retries + 1):
+            remaining = min(self.attempt_timeout, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            try:
+                text, usage = self._attempt(prompt, remaining, max_tokens)
+                self.breaker.record_success()
+                self._observe("generate", "ok", started)
+                self._report(on_usage, prompt, text, usage, started)
+                return text
+            except Exception as e:
+                error = e
+                self.breaker.record_failure()
+                if attempt == self.retries or not self.breaker.allow():
+                    break
+                self._sleep_before_retry(attempt, deadline)
+        self._observe("generate", "timeout" if error is None or isinstance(error, TimeoutError) else "error", started)
+        raise LLMUnavailable(str(error or "deadline exceeded")) from error
+
+    def stream(self, prompt, max_tokens=None, on_usage=None):
+        """Yield text chunks. Retries only happen before the first chunk is sent.
+
+        `on_usage` is called when the stream ends, or with what was sent so far
+        if the client goes away.
+        """
+        started = time.monotonic()
+        allowed = self.breaker.allow()
+        if not allowed:
+            self._observe("stream", "circuit_open", started)
+            raise LLMUnavailable("circuit open")
+
+        deadline = started + self.timeout
+        settled = False  # success or failure recorded on the breaker
+        try:
+            for attempt in range(self.retries + 1):
+                sent = False
+                parts, usage = [], None
+                try:
+                    timeout = max(0.1, min(self.attempt_timeout, deadline - time.monotonic()))
+                    for text, chunk_usage in self._timed_chunks(prompt, timeout, max_tokens):
+                        usage = chunk_usage or usage
+                        if not text:
+                            continue
+                        sent = True
+                        parts.append(text)
+                        yield text
+                    self.breaker.record_success()
+                    settled = True
+                    self._observe("stream", "ok", started)
+                    self._report(on_usage, prompt, "".join(parts), usage, started)
+                    return
+                except GeneratorExit:
+                    # The client went away mid-answer; what was generated is still billed
+                    self._observe("stream", "cancelled", started)
+                    if sent:
+                        self._report(on_usage, prompt, "".join(parts), usage, started)
+                    raise
+                except Exception as e:
+                    self.breaker.record_failure()
+                    settled = True
+                    allowed = None
+                    if sent or attempt == self.retries or time.monotonic() >= deadline \
+                            or not (allowed := self.breaker.allow()):
+                        self._observe("stream", "timeout" if isinstance(e, TimeoutError) else "error", started)
+                        raise LLMUnavailable(str(e)) from e
+                    settled = False
+                    self._sleep_before_retry(attempt, deadline)
+        finally:
+            # A half-open probe that was cancelled would otherwise keep the breaker shut for good
+            if not settled and allowed == "probe":
+                self.breaker.release_probe()
+
+
+def build_backend(config):
+    if config.get("LLM_BACKEND") == "stub":
+        return StubBackend(
+            latency=config.get("LLM_STUB_LATENCY", 0.5),
+            failure_rate=config.get("LLM_STUB_FAILURE_RATE", 0.0),
+        )
+    return GeminiBackend(config.get("GEMINI_MODEL", "gemini-2.0-flash"))
+
+
+def build_client(config):
+    client = LLMClient(None)
+    client.configure(config)
+    return client
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from activity import CounterBuffer, today
+from models import db, User, LLMUsage
+
+# ---------- LLM USAGE ACCOUNTING ----------
+# Token counts and latency of every Gemini call, summed per day, user,
+# endpoint and model in memory and written in bulk like the activity
+# counters. Cost is derived at read time from LLM_PRICES, so a price change
+# re-prices history without touching rows.
+
+USAGE_METRICS = ("calls", "prompt_tokens", "output_tokens", "latency_ms", "truncated")
+
+
+class UsageBuffer(CounterBuffer):
+    def __init__(self, app=None, **kwargs):
+        self.prices = {}
+        super().__init__(app, LLMUsage, keys=("day", "user_id", "endpoint", "model"), metrics=USAGE_METRICS,
+                         config_prefix="LLM_USAGE", **kwargs)
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.prices = app.config.get("LLM_PRICES", self.prices)
+
+    def record(self, user_id, endpoint, model, usage, seconds, truncated=False, day=None):
+        self.add((day or today(), user_id, endpoint, model), {
+            "calls": 1,
+            "prompt_tokens": usage.prompt_tokens,
+            "output_tokens": usage.output_tokens,
+            "latency_ms": round(seconds * 1000),
+            "truncated": int(truncated),
+        })
+
+    # ----- reports -----
+    def _cost(self):
+        """USD as a SQL expression: tokens x the model's price per million."""
+        def price(i):
+            whens = {model: p[i] for model, p in self.prices.items()}
+            return db.case(whens, value=LLMUsage.model, else_=0.0) if whens else db.literal(0.0)
+        return db.func.sum(LLMUsage.prompt_tokens * price(0) + LLMUsage.output_tokens * price(1)) / 1e6
+
+    def _totals(self):
+        return (
+            db.func.sum(LLMUsage.calls).label("calls"),
+            db.func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            db.func.sum(LLMUsage.output_tokens).label("output_tokens"),
+            db.func.sum(LLMUsage.latency_ms).label("latency_ms"),
+            db.func.sum(LLMUsage.truncated).label("truncated"),
+            self._cost().label("cost"),
+        )
+
+    def report(self, days=30, top_users=50, end=None):
+        """Totals for the last `days` days: overall, per day, per endpoint + model, and the costliest users."""
+        end = end or today()
+        start = end - timedelta(days=days - 1)
+        window = (LLMUsage.day >= start, LLMUsage.day <= end)
+        rows = lambda stmt: [dict(r._mapping) for r in db.session.execute(stmt)]
+
+        return {
+            "start": start,
+            "end": end,
+            "total": rows(db.select(*self._totals()).where(*window))[0],
+            "by_day": rows(db.select(LLMUsage.day, *self._totals()).where(*window)
+                           .group_by(LLMUsage.day).order_by(LLMUsage.day)),
+            "by_endpoint": rows(db.select(LLMUsage.endpoint, LLMUsage.model, *self._totals()).where(*window)
+                                .group_by(LLMUsage.endpoint, LLMUsage.model).order_by(db.desc("cost"))),
+            "by_user": rows(db.select(LLMUsage.user_id, User.name, User.email, *self._totals())
+                            .join(User, User.id == LLMUsage.user_id).where(*window)
+                            .group_by(LLMUsage.user_id, User.name, User.email)
+                            .order_by(db.desc("cost"), db.desc("output_tokens")).limit(top_users)),
+        }
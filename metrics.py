@@ -0,0 +1,268 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+from flask import Response, abort, before_render_template, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+
+# ---------- REQUEST METRICS ----------
+# Per-route latency, DB queries/time per request (SQLAlchemy cursor events),
+# template render time and LLM call duration/outcome, exposed at /metrics in
+# the Prometheus text format. Each worker process keeps its own numbers
+# (scrape every worker, or run one per host). Recording is a perf_counter
+# call and a short locked update, so it stays on in production.
+#
+# Opt-in: with PROFILE_SLOW_MS set, requests are run under cProfile (one at
+# a time) and any that exceed the threshold are dumped to PROFILE_DIR.
+#
+# /metrics leaks route names and traffic, so it isn't public: with
+# METRICS_TOKEN set it needs "Authorization: Bearer <token>"; without one
+# only a scraper on the same host (loopback, not forwarded by a proxy) or an
+# admin session gets it.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+LOOPBACK = ("127.0.0.1", "::1")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((values, list(series)) for values, series in self._series.items())
+        for values, series in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += n
+                le = ("le", bound if bound == "+Inf" else repr(float(bound)))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+class _RequestStats:
+    __slots__ = ("start", "db_queries", "db_seconds", "render_depth", "render_start",
+                 "render_seconds", "profiler", "handed_off")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.render_depth = 0
+        self.render_start = 0.0
+        self.render_seconds = 0.0
+        self.profiler = None
+        self.handed_off = False  # finish() owns the stats once the response is built
+
+
+class Metrics:
+    def __init__(self, app=None, db=None, llm=None):
+        self.enabled = True
+        self.metrics = []
+
+        self.request_seconds = self._add(Histogram(
+            "cura_request_duration_seconds", "Time from request start to response close.",
+            ("route", "method", "status")))
+        self.request_db_queries = self._add(Histogram(
+            "cura_request_db_queries", "SQL statements executed per request.",
+            ("route",), QUERY_COUNT_BUCKETS))
+        self.request_db_seconds = self._add(Histogram(
+            "cura_request_db_seconds", "Time spent in SQL per request.", ("route",), DB_BUCKETS))
+        self.render_seconds = self._add(Histogram(
+            "cura_template_render_seconds", "Jinja render time per template.", ("template",), DB_BUCKETS))
+        self.llm_seconds = self._add(Histogram(
+            "cura_llm_call_seconds", "Gemini call duration, retries included.", ("kind", "outcome")))
+        self.slow_profiles = self._add(Counter(
+            "cura_slow_request_profiles_total", "cProfile dumps written for slow requests.", ("route",)))
+
+        self._profile_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db, llm)
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def init_app(self, app, db, llm=None, is_admin=None):
+        self.app = app
+        self.is_admin = is_admin or (lambda: False)
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        self.token = app.config.get("METRICS_TOKEN")
+        self.slow_ms = app.config.get("PROFILE_SLOW_MS")
+        self.profile_dir = app.config.get("PROFILE_DIR", "profiles")
+
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+        before_render_template.connect(self._render_start, app)
+        template_rendered.connect(self._render_end, app)
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._query_start)
+            event.listen(db.engine, "after_cursor_execute", self._query_end)
+        if llm is not None:
+            llm.observer = self.observe_llm
+        app.add_url_rule("/metrics", "metrics", self.endpoint)
+
+    # ----- hooks -----
+    def _stats(self):
+        return g.get("_metrics") if has_app_context() else None
+
+    def _before(self):
+        if not self.enabled:
+            return
+        stats = g._metrics = _RequestStats()
+        if self.slow_ms is not None and self._profile_lock.acquire(blocking=False):
+            stats.profiler = cProfile.Profile()
+            stats.profiler.enable()
+
+    def _after(self, response):
+        stats = g.get("_metrics")
+        if stats is None:
+            return response
+        stats.handed_off = True  # stays in g so queries made while streaming still count
+
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        method = request.method
+
+        def finish():
+            elapsed = time.perf_counter() - stats.start
+            self.request_seconds.observe(elapsed, route, method, str(response.status_code))
+            self.request_db_queries.observe(stats.db_queries, route)
+            self.request_db_seconds.observe(stats.db_seconds, route)
+            if stats.profiler is not None:
+                stats.profiler.disable()
+                self._profile_lock.release()
+                if elapsed * 1000 >= self.slow_ms:
+                    self._dump_profile(stats.profiler, route, method, elapsed)
+
+        if response.is_streamed:
+            # Time streamed answers to the last byte, when the server closes the response
+            response.call_on_close(finish)
+        else:
+            finish()
+        return response
+
+    def _teardown(self, exc):
+        # after_request didn't run (e.g. a before_request hook raised): don't leak the profiler
+        stats = g.get("_metrics")
+        if stats is not None and not stats.handed_off and stats.profiler is not None:
+            stats.profiler.disable()
+            self._profile_lock.release()
+
+    def _query_start(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+    def _query_end(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["_metrics_query_start"].pop()
+        stats = self._stats()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += time.perf_counter() - started
+
+    def _render_start(self, sender, template, context, **extra):
+        stats = self._stats()
+        if stats is not None:
+            if stats.render_depth == 0:
+                stats.render_start = time.perf_counter()
+            stats.render_depth += 1
+
+    def _render_end(self, sender, template, context, **extra):
+        stats = self._stats()
+        if stats is not None and stats.render_depth:
+            stats.render_depth -= 1
+            if stats.render_depth == 0:
+                elapsed = time.perf_counter() - stats.render_start
+                stats.render_seconds += elapsed
+                self.render_seconds.observe(elapsed, template.name or "<string>")
+
+    def observe_llm(self, kind, outcome, seconds):
+        self.llm_seconds.observe(seconds, kind, outcome)
+
+    # ----- slow request profiles -----
+    def _dump_profile(self, profiler, route, method, elapsed):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r"[^\w]+", "_", route).strip("_") or "root"
+        path = os.path.join(self.profile_dir,
+                            f"{datetime.utcnow():%Y%m%d-%H%M%S}-{method}-{slug}-{elapsed * 1000:.0f}ms.prof")
+        profiler.dump_stats(path)
+        self.slow_profiles.inc(route)
+
+        top = io.StringIO()
+        pstats.Stats(profiler, stream=top).sort_stats("cumulative").print_stats(15)
+        self.app.logger.warning("Slow request %s %s took %.0fms, profile saved to %s\n%s",
+                                method, route, elapsed * 1000, path, top.getvalue())
+
+    # ----- exposition -----
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def allowed(self):
+        if self.token:
+            return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {self.token}")
+        local = request.remote_addr in LOOPBACK and "X-Forwarded-For" not in request.headers
+        return local or bool(self.is_admin())
+
+    def endpoint(self):
+        if not self.allowed():
+            abort(403)
+        return Response(self.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
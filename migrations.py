@@ -0,0 +1,154 @@
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import String, inspect, text
+
+log = logging.getLogger(__name__)
+
+# ---------- SCHEMA UPGRADES ----------
+# Small, idempotent upgrades for databases created by older versions of Cura.
+# Run with `flask --app cura_app init-db` (or automatically by `python cura_app.py`).
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+METRICS = ("symptoms_analyzed", "diet_visits", "mental_visits")
+
+
+def _legacy_day_to_date(value, today):
+    """Old rows only stored a weekday ("Fri"); map it to the latest such day up to today."""
+    if value and ISO_DATE.match(str(value)):
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    if value in WEEKDAYS:
+        return today - timedelta(days=(today.weekday() - WEEKDAYS.index(value)) % 7)
+    return today
+
+
+def upgrade_user_log(engine):
+    """Convert weekday strings to real dates, merge per-day duplicates, add the unique index."""
+    insp = inspect(engine)
+    if "user_log" not in insp.get_table_names():
+        return
+    if any(ix["name"] == "ix_user_log_user_date" for ix in insp.get_indexes("user_log")):
+        return
+
+    today = datetime.utcnow().date()
+    with engine.begin() as conn:
+        rows = conn.execute(text(
+            "SELECT id, user_id, date, symptoms_analyzed, diet_visits, mental_visits "
+            "FROM user_log ORDER BY id"
+        )).all()
+
+        merged = defaultdict(lambda: {"ids": [], **dict.fromkeys(METRICS, 0)})
+        for row in rows:
+            bucket = merged[(row.user_id, _legacy_day_to_date(row.date, today))]
+            bucket["ids"].append(row.id)
+            for m in METRICS:
+                bucket[m] += getattr(row, m) or 0
+
+        for (user_id, day), bucket in merged.items():
+            keep, *extra = bucket["ids"]
+            if extra:
+                conn.execute(text("DELETE FROM user_log WHERE id IN ({})".format(
+                    ", ".join(str(i) for i in extra))))
+            conn.execute(
+                text("UPDATE user_log SET date = :date, symptoms_analyzed = :symptoms_analyzed, "
+                     "diet_visits = :diet_visits, mental_visits = :mental_visits WHERE id = :id"),
+                {"id": keep, "date": day.isoformat(), **{m: bucket[m] for m in METRICS}},
+            )
+
+        conn.execute(text("CREATE UNIQUE INDEX ix_user_log_user_date ON user_log (user_id, date)"))
+
+    log.info("user_log upgraded: %d rows → %d daily rows", len(rows), len(merged))
+
+
+# The old weekday column was a VARCHAR; server databases compare it with DATE
+# parameters only once the column itself is a DATE. SQLite stores dates as ISO
+# text either way, so it keeps the column as it is.
+DATE_COLUMN_SQL = {
+    "postgresql": 'ALTER TABLE user_log ALTER COLUMN "date" TYPE DATE USING "date"::date',
+    "mysql": "ALTER TABLE user_log MODIFY `date` DATE NOT NULL",
+}
+
+
+def convert_user_log_date(engine):
+    """Turn a string user_log.date (rewritten to ISO text by upgrade_user_log) into a DATE column."""
+    sql = DATE_COLUMN_SQL.get(engine.dialect.name)
+    insp = inspect(engine)
+    if sql is None or "user_log" not in insp.get_table_names():
+        return
+    column = next(c for c in insp.get_columns("user_log") if c["name"] == "date")
+    if not isinstance(column["type"], String):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+    log.info("user_log.date converted to DATE")
+
+
+def create_missing_indexes(engine, metadata):
+    """create_all() skips indexes on tables that already exist; add any that are missing."""
+    insp = inspect(engine)
+    existing_tables = set(insp.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in have:
+                index.create(bind=engine)
+                log.info("Created index %s", index.name)
+
+
+def add_missing_columns(engine, metadata):
+    """Add new nullable columns to existing tables (ALTER TABLE ... ADD COLUMN)."""
+    insp = inspect(engine)
+    existing_tables = set(insp.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {col["name"] for col in insp.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in have or not column.nullable:
+                continue
+            col_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'))
+            log.info("Added column %s.%s", table.name, column.name)
+
+
+def widen_string_columns(engine, metadata):
+    """Grow VARCHAR columns that the models now declare longer (e.g. user.password 150 → 255).
+
+    SQLite doesn't enforce VARCHAR lengths, so only server databases need this.
+    """
+    if engine.dialect.name == "sqlite":
+        return
+    insp = inspect(engine)
+    existing_tables = set(insp.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {col["name"]: col["type"] for col in insp.get_columns(table.name)}
+        for column in table.columns:
+            want = getattr(column.type, "length", None)
+            current = getattr(have.get(column.name), "length", None)
+            if not want or not current or current >= want:
+                continue
+            col_type = column.type.compile(dialect=engine.dialect)
+            if engine.dialect.name == "mysql":
+                null = "NULL" if column.nullable else "NOT NULL"
+                sql = f'ALTER TABLE `{table.name}` MODIFY `{column.name}` {col_type} {null}'
+            else:
+                sql = f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" TYPE {col_type}'
+            with engine.begin() as conn:
+                conn.execute(text(sql))
+            log.info("Widened %s.%s to %s", table.name, column.name, col_type)
+
+
+def upgrade(engine, metadata):
+    upgrade_user_log(engine)
+    convert_user_log_date(engine)
+    add_missing_columns(engine, metadata)
+    widen_string_columns(engine, metadata)
+    create_missing_indexes(engine, metadata)
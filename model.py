@@ -10,7 +10,8 @@ class NeuralNet(nn.Module):
         self.relu = nn.ReLU()
 
     def forward(self, x):
-        out = self.l1(x)
+        # Sparse bag-of-words batches skip the zeros in the first (and widest) layer
+        out = torch.sparse.mm(x, self.l1.weight.t()) + self.l1.bias if x.is_sparse else self.l1(x)
         out = self.relu(out)
         out = self.l2(out)
         out = self.relu(out)
@@ -12,11 +12,13 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False)
-    password = db.Column(db.String(150), nullable=False)
+    password = db.Column(db.String(255), nullable=False)  # scrypt hashes are 162 chars
     phone = db.Column(db.String(20))          # ✅ New field for phone number
     dob = db.Column(db.String(20))            # ✅ New field for Date of Birth (string for easy HTML form)
     gender = db.Column(db.String(10))         # ✅ New field for gender
     role = db.Column(db.String(50), default='user', nullable=False)
+    # Bumped by every UPDATE of the row; the user cache compares it to spot stale copies
+    version = db.Column(db.Integer, default=1, onupdate=db.literal_column("coalesce(version, 0) + 1"))
 
     feedbacks = db.relationship(
         'Feedback', backref='user', lazy=True, cascade="all, delete"
@@ -28,26 +30,78 @@ class User(db.Model, UserMixin):
 # ---------- FEEDBACK MODEL ----------
 class Feedback(db.Model):
     __tablename__ = 'feedback'
+    __table_args__ = (
+        # Reviewer dashboard: newest first, optionally only (un)reviewed — keyset on (date_submitted, id).
+        # These also serve plain lookups on `reviewed` and `date_submitted`.
+        db.Index("ix_feedback_reviewed_date", "reviewed", "date_submitted", "id"),
+        db.Index("ix_feedback_date_id", "date_submitted", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
-        db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False
+        db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False, index=True
     )
     message = db.Column(db.Text, nullable=False)
     reviewed = db.Column(db.Boolean, default=False, nullable=False)
     date_submitted = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
+    # Parsed from contact form submissions when they are saved (None for plain feedback)
+    contact_name = db.Column(db.String(150))
+    contact_email = db.Column(db.String(150))
+    contact_phone = db.Column(db.String(30))
+
     def __repr__(self):
         return f"<Feedback {self.id} (User {self.user_id})>"
 
 # ---------- USER ACTIVITY LOG (for charts/dashboard) ----------
+# One row per user per day; the counters are incremented in place (see activity.py)
 class UserLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_user_log_user_date", "user_id", "date", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
-    date = db.Column(db.String(20))  # Example: "Fri", "Sat"
+    date = db.Column(db.Date, nullable=False, default=lambda: datetime.utcnow().date())
     symptoms_analyzed = db.Column(db.Integer, default=0)
     diet_visits = db.Column(db.Integer, default=0)
     mental_visits = db.Column(db.Integer, default=0)  # ✅ NEW FIELD
+    version = db.Column(db.Integer, default=0)        # bumped on every write; the dashboard API's ETag
+
+# ---------- LLM USAGE (tokens + latency per day, see llm_usage.py) ----------
+# One row per day, user, endpoint and model; counters are incremented in place
+class LLMUsage(db.Model):
+    __tablename__ = 'llm_usage'
+    __table_args__ = (
+        db.Index("ix_llm_usage_key", "day", "user_id", "endpoint", "model", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    endpoint = db.Column(db.String(30), nullable=False)   # "analyze", "mental", ...
+    model = db.Column(db.String(50), nullable=False)
+
+    calls = db.Column(db.Integer, default=0)
+    prompt_tokens = db.Column(db.BigInteger, default=0)
+    output_tokens = db.Column(db.BigInteger, default=0)
+    latency_ms = db.Column(db.BigInteger, default=0)      # summed; divide by calls for the mean
+    truncated = db.Column(db.Integer, default=0)          # calls whose user text was cut to the budget
+
+# ---------- GEMINI RESPONSE CACHE (optional persistent tier) ----------
+class LLMCacheEntry(db.Model):
+    __tablename__ = 'llm_cache'
+
+    key = db.Column(db.String(64), primary_key=True)   # sha256 of model + normalized prompt
+    model = db.Column(db.String(50), nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+# ---------- RATE LIMIT BUCKETS (optional, shared by every worker) ----------
+class RateLimitBucket(db.Model):
+    __tablename__ = 'rate_limit_bucket'
 
-    # REMOVE mood_score, steps_walked if unused
+    key = db.Column(db.String(255), primary_key=True)  # "<group>:user:<id>" or "<group>:ip:<addr>"
+    tokens = db.Column(db.Float, nullable=False)
+    updated = db.Column(db.Float, nullable=False)       # unix time of the last take
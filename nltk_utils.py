@@ -0,0 +1,51 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Importing nltk costs ~100 ms, so the stemmer is made on first use (or by the app's warm-up)
+_stemmer = None
+
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem.porter import PorterStemmer
+
+        _stemmer = PorterStemmer()
+    return _stemmer
+
+# Same splits as nltk.word_tokenize for chat-sized input ("what's" → "what", "'s"),
+# without needing the punkt data download at serve time.
+_TOKEN_RE = re.compile(r"'\w+|\w+|[^\w\s]")
+
+
+def tokenize(sentence):
+    return _TOKEN_RE.findall(sentence)
+
+
+@lru_cache(maxsize=8192)
+def stem(word):
+    return get_stemmer().stem(word.lower())
+
+
+def bag_of_words(tokenized_sentence, all_words):
+    """
+    return bag of words array:
+    1 for each known word that exists in the sentence, 0 otherwise
+    example:
+    sentence = ["hello", "how", "are", "you"]
+    words = ["hi", "hello", "I", "you", "bye", "thank", "cool"]
+    bog   = [  0 ,    1 ,    0 ,   1 ,    0 ,    0 ,      0]
+    """
+    sentence_words = {stem(word) for word in tokenized_sentence}
+    return np.array([1 if w in sentence_words else 0 for w in all_words], dtype=np.float32)
+
+
+def bag_of_words_batch(sentences, word_index):
+    """Vectorize many raw sentences into one (n, vocab) float32 matrix."""
+    bags = np.zeros((len(sentences), len(word_index)), dtype=np.float32)
+    for row, sentence in enumerate(sentences):
+        cols = [word_index[s] for s in map(stem, tokenize(sentence)) if s in word_index]
+        bags[row, cols] = 1.0
+    return bags
@@ -0,0 +1,93 @@
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+# ---------- KEYSET (CURSOR) PAGINATION ----------
+# Pages are fetched with `WHERE (sort columns) < last row seen` instead of
+# OFFSET, so page N costs the same as page 1 however big the table gets.
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, types=None):
+    """The cursor's values, or None if it doesn't decode. With `types` (one converter
+    per value) the values are also converted, and a cursor that doesn't fit is None too:
+    cursors come back from the client, so they may be stale or tampered with."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list):
+        return None
+    if types is not None:
+        if len(values) != len(types):
+            return None
+        try:
+            values = [convert(value) for convert, value in zip(types, values)]
+        except (ValueError, TypeError, OverflowError):
+            return None
+    return values
+
+
+def cursor_int(value):
+    """int() that also refuses what a 64-bit database column can't hold."""
+    number = int(value)
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise OverflowError("cursor value out of range")
+    return number
+
+
+def page_size(value):
+    try:
+        return max(1, min(MAX_PAGE_SIZE, int(value)))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+class Page:
+    def __init__(self, items, next_cursor, size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.size = size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def keyset_page(query, columns, cursor=None, size=DEFAULT_PAGE_SIZE, descending=True, parse=None):
+    """Fetch one page of `query` ordered by `columns` (all DESC or all ASC).
+
+    `parse` converts the decoded cursor values back to column types (e.g. datetimes).
+    A cursor it can't convert is ignored like one that doesn't decode: page 1.
+    """
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(columns) and parse:
+        try:
+            values = parse(values)
+        except (ValueError, TypeError, IndexError, OverflowError):
+            values = None
+    if values is not None and len(values) == len(columns):
+        key = tuple_(*columns) if len(columns) > 1 else columns[0]
+        bound = tuple_(*values) if len(columns) > 1 else values[0]
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*order).limit(size + 1).all()
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return Page(rows, next_cursor, size)
@@ -0,0 +1,157 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.util import Finalize
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# ---------- PASSWORD HASHING ----------
+# Hashing is deliberately slow and CPU-bound. Running it inline lets a burst
+# of logins occupy every request thread, so /predict and friends queue up
+# behind it. Here it runs in a small process pool (own CPU, own GIL) with a
+# cap on how many hashes may be in the pool. Past the cap a few callers wait
+# briefly for a slot (a login burst drains at pool speed); the rest, and
+# those that waited too long, get HashingBusy and the route answers 503.
+# A slot is held until its hash has actually finished, even when the caller
+# gave up waiting, so the cap really bounds CPU use.
+#
+# Stored hashes carry their own parameters ("scrypt:32768:8:1$salt$hash"),
+# so the method can be changed in config and users are rehashed on login.
+# Note the default scrypt hash is 162 characters: User.password was
+# String(150), which only worked because SQLite doesn't enforce lengths.
+
+
+class HashingBusy(Exception):
+    """Raised when too many hashes are already queued."""
+
+
+def _method_of(stored):
+    return stored.split("$", 1)[0] if stored and "$" in stored else None
+
+
+def stored_method(method):
+    """The prefix generate_password_hash(method=`method`) writes: "scrypt" -> "scrypt:32768:8:1"."""
+    # Same defaults as werkzeug.security._hash_internal
+    name, *args = method.split(":")
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method {method!r}")
+
+
+class PasswordHasher:
+    def __init__(self, app=None, method="scrypt", workers=2, max_pending=4, timeout=10.0,
+                 max_waiting=4, queue_timeout=2.0):
+        self.method = method
+        self.workers = workers          # 0 = hash inline (tests, one-off scripts)
+        self.max_pending = max_pending  # hashes queued + running in the pool
+        self.timeout = timeout
+        self.max_waiting = max_waiting      # callers (request threads) allowed to wait for a slot
+        self.queue_timeout = queue_timeout  # seconds a caller waits for a slot before HashingBusy
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._waiting = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", self.max_pending)
+        self.timeout = app.config.get("PASSWORD_HASH_TIMEOUT", self.timeout)
+        self.max_waiting = app.config.get("PASSWORD_HASH_MAX_WAITING", self.max_waiting)
+        self.queue_timeout = app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", self.queue_timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        stored_method(self.method)  # a typo in PASSWORD_HASH_METHOD fails at startup, not at the first login
+
+    # ----- pool (one per process, created lazily so forked workers get their own) -----
+    def _executor(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # forkserver/spawn: hash workers don't inherit this process's threads and held locks
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(method))
+                    self._pid = os.getpid()
+                    # The workers aren't daemons: without this, interpreter exit waits on them forever.
+                    # atexit for a normal process; Finalize for a multiprocessing child, which skips
+                    # atexit and joins its children first. The priority puts it ahead of the pool's
+                    # own call-queue finalizer (10), which would otherwise swallow the stop sentinels.
+                    atexit.unregister(self.shutdown)
+                    atexit.register(self.shutdown)
+                    Finalize(self, self.shutdown, exitpriority=100)
+        return self._pool
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            if self._waiting >= self.max_waiting or self.queue_timeout <= 0:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._acquire_slot():
+            raise HashingBusy(f"{self.max_pending} password hashes already queued")
+        pool = self._executor()
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the hash ends (or is cancelled at shutdown), not when we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy(f"password hash took longer than {self.timeout:.0f}s")
+        except BrokenProcessPool:
+            # A hash worker died; drop the pool (its other workers too), start a
+            # fresh one next time and answer this call inline
+            with self._lock:
+                if self._pool is pool:
+                    self._pool, self._pid = None, None
+            pool.shutdown(wait=False, cancel_futures=True)
+            return fn(*args)
+
+    # ----- public -----
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        return self._run(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        """True if `stored` was made with other parameters than PASSWORD_HASH_METHOD."""
+        return _method_of(stored) != stored_method(self.method)
+
+    def warm_up(self):
+        """Start this process's hash workers before the first login."""
+        if self.workers:
+            self._executor().submit(int).result(timeout=self.timeout)
+
+    def shutdown(self):
+        # wait=True: returning early lets multiprocessing's exit handler close the call
+        # queue before the workers get their stop signal, and then join them forever
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pid = None
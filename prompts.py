@@ -0,0 +1,81 @@
+import math
+import re
+import unicodedata
+from typing import NamedTuple
+
+# ---------- PROMPT BUDGETS ----------
+# User text goes into Gemini prompts only after it is normalized (NFKC, no
+# control characters, single spaces) and cut to a per-endpoint token budget,
+# and every call carries a cap on the tokens it may generate. A pasted essay
+# costs the same as a sentence, and the cache keys stay stable.
+#
+# Tokens are estimated at ~4 characters each (Gemini's own rule of thumb for
+# English); the usage table records the real counts when the API reports them.
+
+CHARS_PER_TOKEN = 4
+ELLIPSIS = "…"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", text or "")
+    # Control / format characters (zero-width, bidi overrides, NUL...) become spaces
+    text = "".join(" " if unicodedata.category(c)[0] == "C" else c for c in text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def truncate(text, max_tokens):
+    """Cut `text` to about `max_tokens`, at a word boundary where there is one. Returns (text, truncated)."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text, False
+    cut = text[:limit - len(ELLIPSIS)]
+    space = cut.rfind(" ")
+    if space > limit // 2:
+        cut = cut[:space]
+    return cut.rstrip() + ELLIPSIS, True
+
+
+def fit(text, max_tokens):
+    """normalize() + truncate(). Huge inputs are cut before normalizing, so a pasted
+    megabyte costs about as much as a paragraph."""
+    raw_limit = 4 * max_tokens * CHARS_PER_TOKEN  # room for whitespace runs that normalize() collapses
+    text = text or ""
+    clipped = len(text) > raw_limit
+    text, truncated = truncate(normalize(text[:raw_limit]), max_tokens)
+    if clipped and not truncated:
+        text, truncated = text + ELLIPSIS, True
+    return text, truncated
+
+
+class Prompt(NamedTuple):
+    endpoint: str      # budget / usage group, e.g. "analyze"
+    text: str          # what is sent to the model (and the response cache key)
+    user_text: str     # the user's part after normalizing and truncating
+    max_tokens: int    # output cap for this call; None = model default
+    truncated: bool
+
+
+class PromptBuilder:
+    def __init__(self, app=None, input_tokens=None, output_tokens=None, default_input_tokens=500):
+        self.input_tokens = input_tokens or {}    # endpoint -> token budget for the user's text
+        self.output_tokens = output_tokens or {}  # endpoint -> max output tokens
+        self.default_input_tokens = default_input_tokens
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.input_tokens = app.config.get("PROMPT_INPUT_TOKENS", self.input_tokens)
+        self.output_tokens = app.config.get("LLM_MAX_OUTPUT_TOKENS", self.output_tokens)
+
+    def build(self, endpoint, template, user_text):
+        """Fill `template`'s {text} with the budgeted user text."""
+        budget = self.input_tokens.get(endpoint, self.default_input_tokens)
+        user_text, truncated = fit(user_text, budget)
+        return Prompt(endpoint, template.format(text=user_text), user_text,
+                      self.output_tokens.get(endpoint), truncated)
@@ -0,0 +1,240 @@
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from flask_login import current_user
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from werkzeug.exceptions import TooManyRequests
+
+# ---------- ADMISSION CONTROL ----------
+# Two guards in front of the LLM-backed endpoints, both answering a fast 429
+# with Retry-After instead of letting requests pile up on worker threads:
+#
+#   ConcurrencyLimiter  caps upstream Gemini calls in flight per worker; a few
+#                       more may wait (bounded queue, deadline), the rest are
+#                       turned away at once.
+#   RateLimiter         token bucket per user (or per IP for anonymous
+#                       callers) and per endpoint group. Buckets live in
+#                       process memory, or in a DB table shared by every
+#                       worker when RATE_LIMIT_SHARED is on.
+
+
+class RateLimited(TooManyRequests):
+    def __init__(self, description=None, retry_after=1.0):
+        super().__init__(description, retry_after=max(1, math.ceil(retry_after)))
+
+
+# ---------- CONCURRENCY LIMIT (upstream LLM calls) ----------
+class _Slot:
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self._held = True
+
+    def release(self):
+        # Idempotent: streamed answers release from the generator *and* on response close
+        if self._held:
+            self._held = False
+            self._limiter._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit=8, max_waiting=16, wait_timeout=5.0):
+        self.limit = limit
+        self.max_waiting = max_waiting    # callers allowed to queue for a slot
+        self.wait_timeout = wait_timeout  # seconds a queued caller waits before giving up
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._timed_out = 0
+
+    def init_app(self, app, config_prefix="LLM"):
+        self.limit = app.config.get(f"{config_prefix}_MAX_CONCURRENT", self.limit)
+        self.max_waiting = app.config.get(f"{config_prefix}_MAX_WAITING", self.max_waiting)
+        self.wait_timeout = app.config.get(f"{config_prefix}_QUEUE_TIMEOUT", self.wait_timeout)
+
+    def acquire(self):
+        """Return a slot (release it, or use it as a context manager), or raise RateLimited."""
+        with self._cond:
+            if self._active < self.limit:
+                self._active += 1
+                return _Slot(self)
+            if self._waiting >= self.max_waiting:
+                self._rejected += 1
+                raise RateLimited("Too many AI requests in progress.", self.wait_timeout)
+
+            deadline = time.monotonic() + self.wait_timeout
+            self._waiting += 1
+            try:
+                while self._active >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timed_out += 1
+                        raise RateLimited("Too many AI requests in progress.", self.wait_timeout)
+                    self._cond.wait(remaining)
+                self._active += 1
+                return _Slot(self)
+            finally:
+                self._waiting -= 1
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"active": self._active, "waiting": self._waiting, "limit": self.limit,
+                    "rejected": self._rejected, "timed_out": self._timed_out}
+
+
+# ---------- TOKEN BUCKETS ----------
+class MemoryBucketStore:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now, cost=1):
+        """Take `cost` tokens. Returns 0 if allowed, else seconds until enough are available."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            if bucket is None and len(self._buckets) >= self.max_keys:
+                self._prune(now, rate, burst)
+            self._buckets[key] = [tokens - cost, now]
+            return 0
+
+    def _prune(self, now, rate, burst):
+        # A refilled bucket is the same as no bucket; drop those first, then the oldest
+        full = [k for k, (tokens, updated) in self._buckets.items() if tokens + (now - updated) * rate >= burst]
+        for k in full:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            oldest = sorted(self._buckets, key=lambda k: self._buckets[k][1])[:len(self._buckets) // 10 + 1]
+            for k in oldest:
+                del self._buckets[k]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLBucketStore:
+    """Shared buckets in the RateLimitBucket table, one atomic upsert per request."""
+
+    def __init__(self, db, model, idle_after=3600.0, cleanup_every=1000):
+        self.db = db
+        self.model = model
+        self.idle_after = idle_after        # rows idle this long are full again and get deleted
+        self.cleanup_every = cleanup_every  # takes between cleanups (per process)
+        self._takes = 0
+
+    def take(self, key, rate, burst, now, cost=1):
+        table = self.model.__table__
+        with self.db.engine.begin() as conn:  # own transaction, never the request's session
+            dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(conn.dialect.name)
+            if dialect is not None:
+                wait = self._take_upsert(conn, dialect, table, key, rate, burst, now, cost)
+            else:
+                wait = self._take_portable(conn, table, key, rate, burst, now, cost)
+
+            self._takes += 1
+            if self._takes % self.cleanup_every == 0:
+                conn.execute(delete(table).where(table.c.updated < now - self.idle_after))
+        return wait
+
+    def _take_upsert(self, conn, dialect, table, key, rate, burst, now, cost):
+        refilled = table.c.tokens + (now - table.c.updated) * rate
+        refilled = case((refilled > burst, burst), else_=refilled)
+        stmt = dialect.insert(table).values(key=key, tokens=burst - cost, updated=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"tokens": refilled - cost, "updated": now},
+            where=refilled >= cost,
+        ).returning(table.c.tokens)
+        if conn.execute(stmt).first() is not None:
+            return 0
+        # Conflict row was left alone: not enough tokens
+        tokens = conn.execute(select(refilled).where(table.c.key == key)).scalar() or 0
+        return (cost - tokens) / rate
+
+    def _take_portable(self, conn, table, key, rate, burst, now, cost):
+        row = conn.execute(select(table.c.tokens, table.c.updated)
+                           .where(table.c.key == key).with_for_update()).first()
+        if row is None:
+            conn.execute(insert(table).values(key=key, tokens=burst - cost, updated=now))
+            return 0
+        tokens = min(burst, row.tokens + (now - row.updated) * rate)
+        if tokens < cost:
+            return (cost - tokens) / rate
+        conn.execute(update(table).where(table.c.key == key).values(tokens=tokens - cost, updated=now))
+        return 0
+
+    def clear(self):
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(self.model.__table__))
+
+
+class RateLimiter:
+    def __init__(self, app=None, store=None):
+        self.store = store or MemoryBucketStore()
+        self.enabled = True
+        self.rules = {}  # group -> (tokens per second, burst)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, store=None):
+        self.store = store or MemoryBucketStore()
+        self.enabled = app.config.get("RATE_LIMIT_ENABLED", True)
+        self.rules = {group: (per_minute / 60.0, burst)
+                      for group, (per_minute, burst) in app.config.get("RATE_LIMITS", {}).items()}
+        if isinstance(self.store, SQLBucketStore) and self.rules:
+            # Never delete a row before its bucket could have refilled
+            self.store.idle_after = max(self.store.idle_after,
+                                        max(burst / rate for rate, burst in self.rules.values()))
+
+    def client_key(self):
+        if current_user.is_authenticated:
+            return f"user:{current_user.id}"
+        # Behind a proxy this is the proxy's address unless ProxyFix is configured
+        return f"ip:{request.remote_addr}"
+
+    def hit(self, group, key=None, cost=1):
+        """Take `cost` tokens from `group`'s bucket for this client, or raise RateLimited.
+
+        `cost` must not exceed the group's burst, or the request can never pass.
+        """
+        if not self.enabled or group not in self.rules:
+            return
+        rate, burst = self.rules[group]
+        try:
+            wait = self.store.take(f"{group}:{key or self.client_key()}", rate, burst, time.time(), cost)
+        except Exception as e:
+            # Fail open: a broken shared store shouldn't take the endpoints down with it
+            current_app.logger.warning("Rate limit store failed: %s", e)
+            return
+        if wait:
+            raise RateLimited("You're sending requests too quickly. Please slow down.", wait)
+
+    def limit(self, group):
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if request.method == "POST":
+                    self.hit(group)
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
@@ -0,0 +1,404 @@
+import atexit
+import json
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from nltk_utils import stem, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, assume a single process
+    fcntl = None
+
+# ---------- SEMANTIC ANSWER CACHE ----------
+# Reworded symptom questions ("headache and fever" / "fever with a
+# headache") miss the exact-prompt cache. This index keeps TF-IDF vectors of
+# past questions and returns the stored answer of the nearest one when the
+# cosine similarity clears a threshold.
+#
+# Layout: every entry is one row of `terms_per_entry` (hashed term, weight)
+# slots, i.e. a fixed-width sparse matrix. Lookups find candidates through an
+# inverted index over a snapshot of the rows (see _rebuild) plus the rows
+# written since, then score them exactly; the snapshot is rebuilt once enough
+# rows have changed. When full, the least recently used entry is replaced.
+#
+# With a directory set the arrays are .npy memory maps and answers live in an
+# append-only answers.bin, so the cache survives restarts. One worker owns the
+# files (flock); other workers start from a private copy and don't write back.
+
+DIM = 1 << 20  # hashed term space; collisions are negligible for a symptom vocabulary
+FORMAT_VERSION = 1
+
+# Fillers, question phrasing and time words; negations ("no", "not", "without")
+# and severity are kept on purpose
+STOP_WORDS = frozenset("""
+a an the and or but with of for in on at to from by about as so than then also just
+i i'm im me my mine we our you your it its this that these those there here
+am is are was were be been being have has had having do does did get got getting
+feel feeling felt really very bit little quite some lot lots since like kind sort
+what could can might may should would it's why how any please help know tell
+symptom symptoms suffering suffer
+today yesterday tonight ago last past few couple one two three four five six seven
+hour hours day days week weeks month months year years morning night now recently
+""".split())
+
+
+def term_counts(text):
+    """Hashed, stemmed term -> count for one question."""
+    counts = {}
+    for word in tokenize(text.lower()):
+        if not word[0].isalnum() or word in STOP_WORDS:
+            continue
+        term = zlib.crc32(stem(word).encode("utf-8")) % DIM
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class SemanticCache:
+    def __init__(self, app=None, model_name="", directory=None, capacity=100000, threshold=0.95,
+                 ttl=None, terms_per_entry=16, rebuild_every=2048):
+        self.model_name = model_name
+        self.directory = directory        # None = memory only
+        self.capacity = capacity
+        self.threshold = threshold        # minimum cosine similarity for a hit
+        self.ttl = ttl                    # seconds; None = entries only leave when evicted
+        self.k = terms_per_entry
+        self.rebuild_every = rebuild_every  # changed rows before the inverted index is rebuilt
+        self.enabled = True
+        self.logger = None
+
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._pid = None
+        self._hits = self._misses = self._evictions = 0
+
+        if app is not None:
+            self.init_app(app, model_name)
+
+    def init_app(self, app, model_name=None):
+        self.model_name = model_name if model_name is not None else self.model_name
+        self.enabled = app.config.get("SEMANTIC_CACHE", self.enabled)
+        self.directory = app.config.get("SEMANTIC_CACHE_DIR", self.directory)
+        self.capacity = app.config.get("SEMANTIC_CACHE_CAPACITY", self.capacity)
+        self.threshold = app.config.get("SEMANTIC_CACHE_THRESHOLD", self.threshold)
+        self.ttl = app.config.get("SEMANTIC_CACHE_TTL", self.ttl)
+        self.logger = app.logger
+        if self._pid == os.getpid():
+            self.close()
+            self._pid = None  # reopened on first use, from this app's directory
+        atexit.unregister(self.close)
+        atexit.register(self.close)
+
+    # ----- storage (opened lazily, once per process) -----
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._persistent = False
+            self._blob = None
+            arrays = None
+            if self.directory:
+                try:
+                    arrays = self._open_files()
+                except Exception as e:
+                    if self.logger:
+                        self.logger.warning("Semantic cache at %s unavailable, using memory: %s", self.directory, e)
+            if arrays is None:
+                arrays = [np.zeros(shape, dtype) for shape, dtype in self._layout().values()]
+            self._header, self._terms, self._weights, self._stamps, self._spans, self._df = arrays
+
+            self._private = {}  # slot -> answer, for answers not in answers.bin
+            self._fresh = []    # rows written since the inverted index was built
+            self._is_fresh = np.zeros(self.capacity, dtype=bool)
+            self._base = None   # (sorted terms, rows, threshold it was built for)
+            self._query = np.zeros(DIM + 1, dtype=np.float32)  # scratch for _score, used under the lock
+            self._pid = os.getpid()
+
+    def _layout(self):
+        return {
+            "header": ((2,), np.int64),                           # rows used, dead bytes in answers.bin
+            "terms": ((self.capacity, self.k), np.int32),         # hashed term ids, -1 = empty slot
+            "weights": ((self.capacity, self.k), np.float32),     # L2-normalized TF-IDF weights
+            "stamps": ((self.capacity, 2), np.float64),           # created, last used
+            "spans": ((self.capacity, 2), np.int64),              # answer offset, length (-1 = private)
+            "df": ((DIM,), np.int32),                             # document frequency per term
+        }
+
+    def _open_files(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, ".lock"), "a")
+        owner = True
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                owner = False
+
+        meta = {"version": FORMAT_VERSION, "model": self.model_name, "capacity": self.capacity,
+                "terms_per_entry": self.k, "dim": DIM}
+        meta_path = os.path.join(self.directory, "meta.json")
+        try:
+            with open(meta_path) as f:
+                current = json.load(f) == meta
+        except (OSError, ValueError):
+            current = False
+
+        layout = self._layout()
+        paths = {name: os.path.join(self.directory, f"{name}.npy") for name in layout}
+        blob_path = os.path.join(self.directory, "answers.bin")
+        if not current:
+            if not owner:
+                lock_file.close()
+                return None
+            # New cache, or one written for another model/shape: start over
+            for name, (shape, dtype) in layout.items():
+                np.lib.format.open_memmap(paths[name], mode="w+", dtype=dtype, shape=shape).flush()
+            open(blob_path, "wb").close()
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+
+        arrays = [np.lib.format.open_memmap(paths[name], mode="r+" if owner else "r") for name in layout]
+        if not owner:
+            arrays = [np.array(a) for a in arrays]  # private copy; the owner keeps writing the files
+        self._blob = open(blob_path, "a+b" if owner else "rb")
+        self._lock_file = lock_file
+        self._persistent = owner
+        return arrays
+
+    def _read_answer(self, slot):
+        if slot in self._private:
+            return self._private[slot]
+        offset, length = self._spans[slot]
+        return os.pread(self._blob.fileno(), int(length), int(offset)).decode("utf-8")
+
+    def _write_answer(self, slot, answer):
+        if not self._persistent:
+            self._private[slot] = answer
+            self._spans[slot] = (-1, 0)
+            return
+        data = answer.encode("utf-8")
+        self._blob.seek(0, os.SEEK_END)
+        offset = self._blob.tell()
+        self._blob.write(data)
+        self._blob.flush()
+        self._spans[slot] = (offset, len(data))
+
+    # ----- vectors -----
+    def _idf(self, ids):
+        n = max(int(self._header[0]), 1)
+        return np.log((1.0 + n) / (1.0 + self._df[ids])) + 1.0
+
+    def _vector(self, counts, limit=None):
+        ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))) * self._idf(ids)
+        if limit is not None and len(ids) > limit:
+            keep = np.argpartition(-weights, limit)[:limit]
+            ids, weights = ids[keep], weights[keep]
+        return ids, weights / np.linalg.norm(weights)
+
+    # ----- inverted index -----
+    def _rebuild(self, wait=False):
+        if not self._rebuild_lock.acquire(blocking=wait):
+            return  # another thread is already rebuilding
+        try:
+            threshold = self.threshold
+            with self._lock:
+                used = int(self._header[0])
+                terms = np.array(self._terms[:used])
+                weights = np.array(self._weights[:used])
+                snapshot = len(self._fresh)
+
+            # Prefix filtering: if a row and the query share none of the row's heaviest
+            # terms, the score is at most the norm of the row's remaining terms. So each
+            # row is only indexed under its heaviest terms up to the point where the
+            # rest weighs < threshold², usually one or two rare terms per row.
+            order = np.argsort(-weights, axis=1)
+            weights = np.take_along_axis(weights, order, axis=1).astype(np.float64)
+            terms = np.take_along_axis(terms, order, axis=1)
+            before = np.cumsum(weights ** 2, axis=1) - weights ** 2
+            indexed = (1.0 - before > threshold ** 2 - 1e-6) & (terms >= 0)
+
+            rows = np.nonzero(indexed)[0].astype(np.int32)
+            terms = terms[indexed]
+            by_term = np.argsort(terms, kind="stable")
+            base = (terms[by_term], rows[by_term], threshold)
+            with self._lock:
+                self._base = base
+                self._is_fresh[self._fresh[:snapshot]] = False
+                self._fresh = self._fresh[snapshot:]  # rows written during the rebuild stay fresh
+                self._is_fresh[self._fresh] = True
+        finally:
+            self._rebuild_lock.release()
+
+    def _score(self, rows, ids, weights):
+        """Exact cosine of each row against the query."""
+        # Dense term -> query weight table; its extra last cell stays 0 for empty (-1) slots
+        self._query[ids] = weights
+        try:
+            return (self._weights[rows] * self._query[self._terms[rows]]).sum(axis=1)
+        finally:
+            self._query[ids] = 0.0
+
+    def _candidates(self, ids, weights):
+        """Rows scoring >= threshold against the query, as (rows, scores)."""
+        rows = []
+        sorted_terms, term_rows, _ = self._base
+        if len(sorted_terms):
+            lo = np.searchsorted(sorted_terms, ids, "left")
+            hi = np.searchsorted(sorted_terms, ids, "right")
+            found = [term_rows[start:stop] for start, stop in zip(lo, hi) if stop > start]
+            if found:
+                found = np.unique(np.concatenate(found))
+                rows.append(found[~self._is_fresh[found]])  # rewritten since the snapshot: added below
+        if self._fresh:
+            rows.append(np.unique(self._fresh))
+        if not rows:
+            return np.empty(0, np.int64), np.empty(0)
+
+        rows = np.concatenate(rows)
+        scores = self._score(rows, ids, weights)
+        best = scores >= self.threshold
+        rows, scores = rows[best], scores[best]
+        # Every query term must appear in the row: a stored question that covers
+        # three of the four symptoms asked about scores close to 1 but is a
+        # different question.
+        covered = (self._terms[rows][:, :, None] == ids).any(axis=1).all(axis=1)
+        return rows[covered], scores[covered]
+
+    # ----- public -----
+    def warm_up(self):
+        """Open the files and build the index now rather than on the first lookup."""
+        if self.enabled:
+            self._open()
+            self._rebuild(wait=True)
+
+    def lookup(self, text):
+        """Answer stored for the most similar earlier question, or None."""
+        if not self.enabled:
+            return None
+        counts = term_counts(text)
+        self._open()
+        if self._base is None or self._base[2] != self.threshold:
+            self._rebuild(wait=True)  # first lookup, or the threshold the index was built for changed
+
+        with self._lock:
+            if not counts or not self._header[0]:
+                self._misses += 1
+                return None
+            rows, scores = self._candidates(*self._vector(counts, limit=self.k))  # truncated like the stored rows
+            now = time.time()
+            for row in rows[np.argsort(-scores)]:
+                if self.ttl is not None and self._stamps[row, 0] < now - self.ttl:
+                    continue
+                self._stamps[row, 1] = now
+                self._hits += 1
+                return self._read_answer(int(row))
+            self._misses += 1
+            return None
+
+    def add(self, text, answer):
+        if not self.enabled or not answer:
+            return
+        counts = term_counts(text)
+        if not counts:
+            return
+        self._open()
+
+        with self._lock:
+            slot = self._allocate()
+            ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            self._df[ids] += 1
+            ids, weights = self._vector(counts, limit=self.k)
+
+            self._write_answer(slot, answer)
+            self._terms[slot] = -1
+            self._terms[slot, :len(ids)] = ids
+            self._weights[slot] = 0
+            self._weights[slot, :len(ids)] = weights
+            now = time.time()
+            self._stamps[slot] = (now, now)
+
+            self._fresh.append(slot)
+            self._is_fresh[slot] = True
+            stale = len(self._fresh) >= self.rebuild_every
+
+        if stale:
+            # Off the request thread; lookups use the old index plus the fresh rows meanwhile
+            threading.Thread(target=self._rebuild, name="semantic-cache-rebuild", daemon=True).start()
+
+    def _allocate(self):
+        used = int(self._header[0])
+        if used < self.capacity:
+            self._header[0] = used + 1
+            return used
+
+        slot = int(np.argmin(self._stamps[:, 1]))  # least recently used
+        old = self._terms[slot]
+        np.subtract.at(self._df, old[old >= 0], 1)
+        if slot in self._private:
+            del self._private[slot]
+        else:
+            self._header[1] += self._spans[slot, 1]
+            self._maybe_compact()
+        self._evictions += 1
+        return slot
+
+    def _maybe_compact(self):
+        # answers.bin is append-only; rewrite it once most of it belongs to evicted entries
+        size = self._blob.seek(0, os.SEEK_END)
+        dead = int(self._header[1])
+        if dead < 16 * 1024 * 1024 or dead * 2 < size:
+            return
+        path = self._blob.name
+        used = int(self._header[0])
+        with open(path + ".tmp", "wb") as out:
+            for slot in range(used):
+                offset, length = self._spans[slot]
+                if offset >= 0:
+                    data = os.pread(self._blob.fileno(), int(length), int(offset))
+                    self._spans[slot, 0] = out.tell()
+                    out.write(data)
+        os.replace(path + ".tmp", path)
+        self._blob.close()
+        self._blob = open(path, "a+b")
+        self._header[1] = 0
+
+    def clear(self):
+        self._open()
+        with self._lock:
+            self._header[:] = 0
+            self._df[:] = 0
+            self._private.clear()
+            self._fresh = []
+            self._is_fresh[:] = False
+            self._base = (np.empty(0, np.int32), np.empty(0, np.int32), self.threshold)
+            if self._persistent:
+                self._blob.truncate(0)
+
+    def close(self):
+        if self._pid == os.getpid() and self._persistent:
+            with self._lock:
+                for array in (self._header, self._terms, self._weights, self._stamps, self._spans, self._df):
+                    array.flush()
+
+    def stats(self):
+        if self._pid != os.getpid():
+            return {"entries": 0, "hits": 0, "misses": 0, "evictions": 0}
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "entries": int(self._header[0]),
+                "capacity": self.capacity,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "evictions": self._evictions,
+                "pending_rows": len(self._fresh),
+                "persistent": self._persistent,
+            }
@@ -1,81 +1,203 @@
+// ---------- CHATBOX ----------
+// Each message becomes one DOM node, added once. The list is flex
+// column-reverse, so the newest node goes first. Only the latest messages are
+// kept in the DOM; older ones stay in a capped in-memory history and are
+// rendered back with "Show earlier messages".
+//
+// Every /predict call carries a client id that the server echoes. A reply fills
+// the placeholder created when its question was sent, so replies stay in order
+// however they arrive; one echoing another id turns it into an error rather
+// than leaving it pending. In-flight calls have an AbortController: they are
+// cancelled after a timeout, or when too many are already waiting.
+
+const MAX_HISTORY = 200;          // messages kept in memory
+const RENDER_WINDOW = 50;         // messages kept in the DOM
+const RENDER_MORE = 25;           // rendered per "Show earlier messages" click
+const REQUEST_TIMEOUT_MS = 15000;
+const MAX_IN_FLIGHT = 3;
+const BOT = "S.P.A.R.K";
+
 class Chatbox {
-    constructor() {
-        this.args = {
-            openButton: document.querySelector('.chatbox__button'),
-            chatBox: document.querySelector('.chatbox__support'),
-            sendButton: document.querySelector('.send__button') // FIXED
-        }
-
-        this.state = false;
-        this.messages = [];
-    }
-
-    display() {
-        const {openButton, chatBox, sendButton} = this.args;
-
-        openButton.addEventListener('click', () => this.toggleState(chatBox))
-        sendButton.addEventListener('click', () => this.onSendButton(chatBox))
-
-        const node = chatBox.querySelector('input');
-        node.addEventListener("keyup", ({key}) => {
-            if (key === "Enter") {
-                this.onSendButton(chatBox)
-            }
-        })
-    }
-
-    toggleState(chatbox) {
-        this.state = !this.state;
-        if(this.state) {
-            chatbox.classList.add('chatbox--active')
-        } else {
-            chatbox.classList.remove('chatbox--active')
-        }
-    }
-
-    onSendButton(chatbox) {
-        var textField = chatbox.querySelector('input');
-        let text1 = textField.value
-        if (text1 === "") return;
-
-        let msg1 = { name: "User", message: text1 }
-        this.messages.push(msg1);
-
-        fetch('/predict', { // FIXED: removed $SCRIPT_ROOT
-            method: 'POST',
-            body: JSON.stringify({ message: text1 }),
-            headers: {
-              'Content-Type': 'application/json'
-            },
-      })
-      .then(r => r.json())
-      .then(r => {
-            let msg2 = { name: "S.P.A.R.K", message: r.answer };
-            this.messages.push(msg2);
-            this.updateChatText(chatbox)
-            textField.value = ''
-      })
-      .catch((error) => {
-            console.error('Error:', error);
-            this.updateChatText(chatbox)
-            textField.value = ''
-      });
-    }
-
-    updateChatText(chatbox) {
-        var html = '';
-        this.messages.slice().reverse().forEach(function(item) {
-            if (item.name === "S.P.A.R.K") {
-                html += '<div class="messages__item messages__item--visitor">' + item.message + '</div>'
-            } else {
-                html += '<div class="messages__item messages__item--operator">' + item.message + '</div>'
-            }
-        });
-
-        const chatmessage = chatbox.querySelector('.chatbox__messages');
-        chatmessage.innerHTML = html;
-    }
+    constructor({ openButton, chatBox, sendButton, input, list, activeClass, userClass, botClass }) {
+        this.args = { openButton, chatBox, sendButton, input, list };
+        this.activeClass = activeClass;
+        this.userClass = userClass;
+        this.botClass = botClass;
+
+        this.state = false;
+        this.messages = [];          // { id, name, message }, oldest first, at most MAX_HISTORY
+        this.nodes = new Map();      // id -> node, for the newest `nodes.size` messages
+        this.inFlight = new Map();   // client id -> AbortController, oldest first
+        this.session = Math.random().toString(36).slice(2, 8);
+        this.seq = 0;
+
+        this.earlier = document.createElement("button");
+        this.earlier.type = "button";
+        this.earlier.className = "chatbox__earlier";
+        this.earlier.textContent = "Show earlier messages";
+        this.earlier.hidden = true;
+        this.earlier.addEventListener("click", () => this.showEarlier());
+        // column-reverse: the button sits above the messages, below any greeting in the markup
+        list.insertBefore(this.earlier, list.firstChild);
+    }
+
+    // Works with the chat widget in base.html and with the older .chatbox__support markup
+    static fromPage() {
+        const widget = document.getElementById("chatbox");
+        if (widget) {
+            return new Chatbox({
+                openButton: document.querySelector(".chatbox__button button"),
+                chatBox: widget,
+                sendButton: widget.querySelector(".chatbox__footer button"),
+                input: document.getElementById("chatInput"),
+                list: document.getElementById("chatMessages"),
+                activeClass: "open", userClass: "message user", botClass: "message bot",
+            });
+        }
+        const support = document.querySelector(".chatbox__support");
+        if (support) {
+            return new Chatbox({
+                openButton: document.querySelector(".chatbox__button"),
+                chatBox: support,
+                sendButton: document.querySelector(".send__button"),
+                input: support.querySelector("input"),
+                list: support.querySelector(".chatbox__messages"),
+                activeClass: "chatbox--active",
+                userClass: "messages__item messages__item--operator",
+                botClass: "messages__item messages__item--visitor",
+            });
+        }
+        return null;
+    }
+
+    display() {
+        const { openButton, chatBox, sendButton, input } = this.args;
+
+        openButton.addEventListener("click", () => this.toggleState(chatBox));
+        sendButton.addEventListener("click", () => this.onSendButton());
+        input.addEventListener("keyup", ({ key }) => {
+            if (key === "Enter") {
+                this.onSendButton();
+            }
+        });
+        window.addEventListener("pagehide", () => this.inFlight.forEach((controller) => controller.abort()));
+    }
+
+    toggleState(chatbox) {
+        this.state = !this.state;
+        chatbox.classList.toggle(this.activeClass, this.state);
+    }
+
+    async onSendButton() {
+        const { input } = this.args;
+        const text = input.value.trim();
+        if (text === "") return;
+        input.value = "";
+
+        const id = `${this.session}-${++this.seq}`;
+        this.addMessage({ id: `${id}-q`, name: "User", message: text });
+        const reply = this.addMessage({ id, name: BOT, message: "…", pending: true });
+
+        // Too many unanswered questions: give up on the oldest
+        if (this.inFlight.size >= MAX_IN_FLIGHT) {
+            const oldest = this.inFlight.values().next().value;
+            oldest.crowded = true;
+            oldest.abort();
+        }
+        const controller = new AbortController();
+        this.inFlight.set(id, controller);
+        const timer = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS);
+
+        try {
+            const res = await fetch("/predict", {
+                method: "POST",
+                body: JSON.stringify({ message: text, client_id: id }),
+                headers: { "Content-Type": "application/json" },
+                signal: controller.signal,
+            });
+            const data = await res.json();
+            if (data.client_id !== undefined && data.client_id !== id) {
+                this.updateMessage(reply, "⚠️ That reply got mixed up. Please ask again.");
+                return;
+            }
+            this.updateMessage(reply, data.answer || data.error);  // error: rate limited (429)
+        } catch (error) {
+            let message = "⚠️ Could not reach Cura. Please try again.";
+            if (error.name === "AbortError") {
+                message = controller.crowded
+                    ? `⚠️ Too many messages in flight (at most ${MAX_IN_FLIGHT}). Please ask again.`
+                    : "⚠️ That took too long. Please ask again.";
+            }
+            this.updateMessage(reply, message);
+        } finally {
+            clearTimeout(timer);
+            this.inFlight.delete(id);
+        }
+    }
+
+    // ----- rendering -----
+    createNode(item) {
+        const node = document.createElement("div");
+        if (item.name === BOT) {
+            node.className = this.botClass;
+            node.innerHTML = item.message;  // bot answers carry the server's own <b>/<br> markup
+        } else {
+            node.className = this.userClass;
+            node.textContent = item.message;
+        }
+        node.classList.toggle("pending", Boolean(item.pending));
+        return node;
+    }
+
+    addMessage(item) {
+        const { list } = this.args;
+        this.messages.push(item);
+        const node = this.createNode(item);
+        list.prepend(node);
+        this.nodes.set(item.id, node);
+
+        // Drop the oldest rendered node once the window is full...
+        if (this.nodes.size > RENDER_WINDOW) {
+            this.unrender(this.messages[this.messages.length - this.nodes.size]);
+        }
+        // ...and forget the oldest message once the history is full
+        if (this.messages.length > MAX_HISTORY) {
+            this.unrender(this.messages.shift());
+        }
+        this.earlier.hidden = this.messages.length <= this.nodes.size;
+        return item;
+    }
+
+    updateMessage(item, message) {
+        item.message = message;
+        item.pending = false;
+        const node = this.nodes.get(item.id);
+        if (node) {  // still rendered
+            const fresh = this.createNode(item);
+            node.replaceWith(fresh);
+            this.nodes.set(item.id, fresh);
+        }
+    }
+
+    unrender(item) {
+        const node = this.nodes.get(item.id);
+        if (node) {
+            node.remove();
+            this.nodes.delete(item.id);
+        }
+    }
+
+    showEarlier() {
+        const { list } = this.args;
+        const end = this.messages.length - this.nodes.size;  // first message that is rendered
+        for (let i = end - 1; i >= Math.max(0, end - RENDER_MORE); i--) {
+            const node = this.createNode(this.messages[i]);
+            list.insertBefore(node, this.earlier);
+            this.nodes.set(this.messages[i].id, node);
+        }
+        this.earlier.hidden = this.messages.length <= this.nodes.size;
+    }
 }
 
-const chatbox = new Chatbox();
-chatbox.display();
+const chat = Chatbox.fromPage();
+if (chat) chat.display();
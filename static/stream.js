@@ -0,0 +1,81 @@
+// ---------- STREAMING ANSWERS (Server-Sent Events over fetch) ----------
+// Posts the form to its data-stream-url and renders Gemini chunks as they arrive.
+// If streaming isn't available (old browser, network error, not an event stream)
+// the form is submitted normally and the server renders the full page instead.
+
+function streamForm(form, { loader, box, text, alertBox, alertText }) {
+    if (!window.fetch || !window.TextDecoder || !window.ReadableStream) return;
+
+    form.addEventListener("submit", async (event) => {
+        event.preventDefault();
+        const button = form.querySelector("button[type=submit]");
+
+        let res;
+        try {
+            res = await fetch(form.dataset.streamUrl, { method: "POST", body: new FormData(form) });
+        } catch (error) {
+            form.submit();
+            return;
+        }
+        const type = res.headers.get("Content-Type") || "";
+        if (res.status === 429) {
+            // Rate limited: show the server's message; re-posting the form would only be limited again
+            const payload = await res.json().catch(() => ({}));
+            if (loader) loader.style.display = "none";
+            text.textContent = payload.error || "Too many requests. Please wait a moment and try again.";
+            box.style.display = "block";
+            return;
+        }
+        if (!res.ok || !res.body || !type.startsWith("text/event-stream")) {
+            form.submit();
+            return;
+        }
+
+        if (button) button.disabled = true;
+        if (loader) loader.style.display = "block";
+        if (alertBox) alertBox.style.display = "none";
+        text.textContent = "";
+        box.style.display = "none";
+
+        const handle = (frame) => {
+            let name = "message";
+            let data = "";
+            frame.split("\n").forEach((line) => {
+                if (line.startsWith("event:")) name = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            });
+            if (!data) return;
+            const payload = JSON.parse(data);
+
+            if (name === "alert" && alertBox) {
+                alertText.textContent = payload.text;
+                alertBox.style.display = "block";
+            } else if (name === "message" || name === "error") {
+                if (loader) loader.style.display = "none";
+                box.style.display = "block";
+                text.textContent += payload.text;
+            } else if (name === "done") {
+                console.debug(`Cura: first token ${payload.ttft_ms}ms, total ${payload.total_ms}ms`);
+            }
+        };
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                let end;
+                while ((end = buffer.indexOf("\n\n")) >= 0) {
+                    handle(buffer.slice(0, end));
+                    buffer = buffer.slice(end + 2);
+                }
+            }
+        } finally {
+            if (loader) loader.style.display = "none";
+            if (button) button.disabled = false;
+        }
+    });
+}
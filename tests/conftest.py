@@ -0,0 +1,58 @@
+import os
+import sys
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def cura():
+    """The cura_app module (extensions, models); build apps with the `app` fixture."""
+    import cura_app
+    return cura_app
+
+
+@pytest.fixture(scope="session")
+def static_cache(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("static_cache"))
+
+
+@pytest.fixture
+def app(cura, tmp_path, static_cache):
+    """A fresh app on its own throwaway database, offline LLM, no rate limits, inline hashing."""
+    app = cura.create_app({
+        "TESTING": True,
+        "DATABASE_DIR": str(tmp_path / "database"),
+        "LLM_BACKEND": "stub",
+        "RATE_LIMIT_ENABLED": False,
+        "PASSWORD_HASH_WORKERS": 0,
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+        "STATIC_CACHE_DIR": static_cache,
+        "WARMUP": [],
+    })
+    yield app
+    cura.activity.flush()
+    cura.llm_usage.flush()
+    with app.app_context():
+        cura.db.engine.dispose()
+
+
+@pytest.fixture
+def make_user(cura, app):
+    """Creates a user with password "pw" and returns a test client logged in as them."""
+    from werkzeug.security import generate_password_hash
+
+    def make(email, role="user"):
+        with app.app_context():
+            user = cura.User(name=email.split("@")[0], email=email, role=role,
+                             password=generate_password_hash("pw", method="pbkdf2:sha256:1000"))
+            cura.db.session.add(user)
+            cura.db.session.commit()
+            user_id = user.id
+        client = app.test_client()
+        client.post("/login", data={"email": email, "password": "pw"})
+        client.user_id = user_id
+        return client
+    return make
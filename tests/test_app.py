@@ -0,0 +1,27 @@
+def test_each_app_has_its_own_database(cura, tmp_path):
+    first = cura.create_app({"DATABASE_DIR": str(tmp_path / "first"), "LLM_BACKEND": "stub", "WARMUP": []})
+    with first.app_context():
+        cura.db.session.add(cura.User(name="first", email="first@test.local", password="x"))
+        cura.db.session.commit()
+
+    second = cura.create_app({"DATABASE_DIR": str(tmp_path / "second"), "LLM_BACKEND": "stub", "WARMUP": []})
+    assert second is not first
+    assert second.config["SQLALCHEMY_DATABASE_URI"].endswith("second/cura.db")
+    with second.app_context():
+        assert cura.db.session.query(cura.User).count() == 0
+    with first.app_context():
+        assert cura.db.session.query(cura.User).count() == 1
+
+
+def test_config_overrides_defaults(app):
+    assert app.config["LLM_BACKEND"] == "stub"
+    assert app.config["SEMANTIC_CACHE_DIR"].startswith(app.config["DATABASE_DIR"])
+    assert app.test_client().get("/").status_code == 200
+
+
+def test_engine_options_follow_config(cura, tmp_path):
+    app = cura.create_app({"DATABASE_DIR": str(tmp_path), "LLM_BACKEND": "stub", "WARMUP": [],
+                           "DB_BUSY_TIMEOUT": 1500})
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {"connect_args": {"timeout": 1.5}}
+    with app.app_context():
+        assert cura.db.session.execute(cura.text("PRAGMA busy_timeout")).scalar() == 1500
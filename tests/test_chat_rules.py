@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+import chat_rules
+from chat_rules import RULES, match_rule
+
+WORDS = ["burn", "heartburn", "burns", "diet", "dieting", "help", "help center", "support", "stress",
+         "mood", "developer", "about cura", "tell me about cura", "sign up", "signup", "x_burn", "ok",
+         "é", "feeling", "tired", "and"]
+
+
+@pytest.mark.parametrize("role", ["guest", "user"])
+def test_long_message_scan_agrees_with_regex(role, monkeypatch):
+    rng = random.Random(7)
+    messages = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12))) for _ in range(2000)]
+    monkeypatch.setattr(random, "choice", lambda seq: seq[0])  # wellness tips are picked at random
+
+    monkeypatch.setattr(chat_rules, "SCAN_CUTOFF", 10 ** 9)
+    by_regex = [match_rule(m, role) for m in messages]
+    monkeypatch.setattr(chat_rules, "SCAN_CUTOFF", -1)
+    by_scan = [match_rule(m, role) for m in messages]
+    assert by_scan == by_regex
+
+
+def test_long_message_keeps_priority():
+    filler = "i have been feeling a little off lately " * 10
+    assert match_rule(filler + "contact support about my burn", "user") == RULES[0][2]
+    assert match_rule(filler + "heartburn", "user") is None
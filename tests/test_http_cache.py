@@ -0,0 +1,34 @@
+import pytest
+
+from flask import Flask
+
+import http_cache
+from http_cache import StaticAssets
+
+
+def build(folder, cache_dir):
+    assets = StaticAssets(cache_dir=str(cache_dir))
+    assets.app = Flask(__name__)
+    assets.build(str(folder))
+    return assets
+
+
+def test_compressed_copies_are_reused_by_content_hash(tmp_path, monkeypatch):
+    static = tmp_path / "static"
+    static.mkdir()
+    (static / "style.css").write_text("body { color: red; }\n" * 200)
+
+    first = build(static, tmp_path / "cache")
+    assert first._compressed >= 1
+
+    monkeypatch.setattr(http_cache, "compress", lambda *args: pytest.fail("compressed again"))
+    second = build(static, tmp_path / "cache")
+    hashed = second.manifest["style.css"]
+    assert second.manifest == first.manifest
+    assert second.assets[hashed].variants["gzip"] == first.assets[hashed].variants["gzip"]
+    monkeypatch.undo()
+
+    (static / "style.css").write_text("body { color: blue; }\n" * 200)
+    third = build(static, tmp_path / "cache")
+    assert third._compressed >= 1
+    assert third.manifest["style.css"] != hashed
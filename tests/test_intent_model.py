@@ -0,0 +1,45 @@
+import logging
+
+import numpy as np
+import pytest
+
+from intent_model import MODEL_PATH, load_classifier, write_npz
+
+
+def test_shipped_model_loads():
+    classifier = load_classifier()
+    tag, prob = classifier.predict("hello there")
+    assert tag is not None and 0.0 < prob <= 1.0
+
+
+def truncated(path):
+    with open(MODEL_PATH, "rb") as f:
+        path.write_bytes(f.read()[:200])
+
+
+def garbage(path):
+    path.write_bytes(b"not a model at all" * 10)
+
+
+def wrong_arrays(path):
+    write_npz(str(path), {"vocab": np.frombuffer(b"a\nb", dtype=np.uint8)})
+
+
+def bad_shapes(path):
+    with np.load(MODEL_PATH) as data:
+        arrays = dict(data)
+    arrays["l1_scale"] = arrays["l1_scale"][:3]
+    write_npz(str(path), arrays)
+
+
+@pytest.mark.parametrize("corrupt", [truncated, garbage, wrong_arrays, bad_shapes])
+def test_corrupt_model_disables_classifier(tmp_path, caplog, corrupt):
+    path = tmp_path / "intents.int8.npz"
+    corrupt(path)
+    with caplog.at_level(logging.WARNING, logger="intent_model"):
+        assert load_classifier(str(path)) is None
+    assert "Intent classifier disabled" in caplog.text
+
+
+def test_missing_model_disables_classifier(tmp_path):
+    assert load_classifier(str(tmp_path / "missing.npz")) is None
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from llm_provider import CircuitBreaker, LLMClient, LLMUnavailable, StubBackend
+
+
+class FlakyBackend(StubBackend):
+    """Stub that fails while `failing` is set."""
+
+    def __init__(self):
+        super().__init__(latency=0, jitter=0)
+        self.failing = False
+
+    def generate(self, prompt, timeout, max_tokens=None):
+        if self.failing:
+            raise ConnectionError("down")
+        return super().generate(prompt, timeout, max_tokens)
+
+    def stream(self, prompt, timeout, max_tokens=None):
+        if self.failing:
+            raise ConnectionError("down")
+        yield from super().stream(prompt, timeout, max_tokens)
+
+
+class StallingBackend(StubBackend):
+    """Sends one chunk, then goes quiet."""
+
+    def stream(self, prompt, timeout, max_tokens=None):
+        yield "first ", None
+        time.sleep(1.0)
+        yield "late", None
+
+
+def open_breaker(client, backend):
+    backend.failing = True
+    with pytest.raises(LLMUnavailable):
+        client.generate("hi")
+    assert client.breaker.state == "open"
+    backend.failing = False
+
+
+@pytest.fixture
+def flaky():
+    backend = FlakyBackend()
+    client = LLMClient(backend, retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_after=0))
+    return client, backend
+
+
+def test_cancelled_half_open_probe_releases_the_breaker(flaky):
+    client, backend = flaky
+    open_breaker(client, backend)
+
+    stream = client.stream("hi")
+    assert next(stream)           # the half-open probe is under way
+    stream.close()                # ...and the client goes away
+
+    assert client.breaker.state == "half_open"
+    assert client.generate("hi")  # the next call may probe instead of "circuit open"
+    assert client.breaker.state == "closed"
+
+
+def test_cancelled_stream_while_closed_keeps_breaker_closed(flaky):
+    client, _ = flaky
+    stream = client.stream("hi")
+    next(stream)
+    stream.close()
+    assert client.breaker.state == "closed"
+    assert client.generate("hi")
+
+
+def test_failed_probe_reopens_the_breaker(flaky):
+    client, backend = flaky
+    open_breaker(client, backend)
+    client.breaker.reset_after = 60
+
+    backend.failing = True
+    client.breaker.opened_at -= 60  # let exactly one probe through
+    with pytest.raises(LLMUnavailable):
+        list(client.stream("hi"))
+    assert client.breaker.state == "open"
+    with pytest.raises(LLMUnavailable, match="circuit open"):
+        list(client.stream("hi"))
+
+
+def test_stream_times_out_between_chunks():
+    client = LLMClient(StallingBackend(latency=0), retries=0, chunk_timeout=0.1)
+    stream = client.stream("hi")
+    assert next(stream) == "first "
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailable, match="no stream data"):
+        next(stream)
+    assert time.monotonic() - started < 0.5
+
+
+def test_stub_stream_honours_its_timeout():
+    backend = StubBackend(latency=1.0, jitter=0)
+    with pytest.raises(TimeoutError):
+        list(backend.stream("hi", timeout=0.2))
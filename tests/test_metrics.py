@@ -0,0 +1,24 @@
+REMOTE = {"REMOTE_ADDR": "203.0.113.5"}
+
+
+def test_metrics_without_token_is_local_or_admin_only(app, make_user):
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 200  # same host
+    assert client.get("/metrics", environ_base=REMOTE).status_code == 403
+    assert client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.5"}).status_code == 403  # via a local proxy
+
+    user = make_user("metrics-user@test.local")
+    assert user.get("/metrics", environ_base=REMOTE).status_code == 403
+    admin = make_user("metrics-admin@test.local", role="admin")
+    assert admin.get("/metrics", environ_base=REMOTE).status_code == 200
+
+
+def test_metrics_token_is_required_when_set(cura, tmp_path):
+    app = cura.create_app({"DATABASE_DIR": str(tmp_path), "LLM_BACKEND": "stub", "WARMUP": [],
+                           "METRICS_TOKEN": "s3cret"})
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    response = client.get("/metrics", environ_base=REMOTE, headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "cura_request_duration_seconds" in response.get_data(as_text=True)
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, inspect, text
+
+import migrations
+from models import db, UserLog
+
+
+def legacy_engine(path):
+    """A user_log table as older versions created it: weekday strings, several rows per day."""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE user_log (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                          "date VARCHAR(10), symptoms_analyzed INTEGER, diet_visits INTEGER, "
+                          "mental_visits INTEGER)"))
+        conn.execute(text("INSERT INTO user_log (user_id, date, symptoms_analyzed, diet_visits, mental_visits) "
+                          "VALUES (1, 'Mon', 1, 0, 0), (1, 'Mon', 2, 1, NULL), (1, '2024-03-05', 0, 4, 1), "
+                          "(2, 'Fri', 0, 0, 3)"))
+    return engine
+
+
+def test_upgrade_legacy_user_log(tmp_path):
+    engine = legacy_engine(tmp_path / "legacy.db")
+    migrations.upgrade(engine, db.metadata)
+
+    insp = inspect(engine)
+    assert any(ix["name"] == "ix_user_log_user_date" and ix["unique"] for ix in insp.get_indexes("user_log"))
+    assert "version" in {c["name"] for c in insp.get_columns("user_log")}
+
+    today = date.today()
+    monday = today - timedelta(days=today.weekday())
+    table = UserLog.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(db.select(table.c.user_id, table.c.date, table.c.symptoms_analyzed,
+                                      table.c.diet_visits, table.c.mental_visits)
+                            .order_by(table.c.user_id, table.c.date)).all()
+        # Date-typed comparisons, as the dashboard queries make them
+        in_window = conn.execute(db.select(db.func.count()).select_from(table)
+                                 .where(table.c.date >= date(2024, 3, 5), table.c.date <= today)).scalar()
+    by_user = {}
+    for user_id, day, *counts in rows:
+        by_user.setdefault(user_id, []).append((day, counts))
+    assert (monday, [3, 1, 0]) in by_user[1]
+    assert (date(2024, 3, 5), [0, 4, 1]) in by_user[1]
+    assert len(rows) == 3
+    assert in_window == 3
+
+    migrations.upgrade(engine, db.metadata)  # idempotent
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM user_log")).scalar() == 3
+
+
+def test_server_databases_get_a_date_column():
+    assert "TYPE DATE USING" in migrations.DATE_COLUMN_SQL["postgresql"]
+    assert "MODIFY `date` DATE" in migrations.DATE_COLUMN_SQL["mysql"]
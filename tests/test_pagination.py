@@ -0,0 +1,30 @@
+import pytest
+
+from pagination import encode_cursor
+
+
+@pytest.fixture
+def reviewer(make_user):
+    return make_user("reviewer-cursor@test.local", role="reviewer")
+
+
+@pytest.mark.parametrize("values", [["bogus", 1], [None, 1], ["2026-01-01", "x"], [[], {}]])
+def test_tampered_reviewer_cursor_falls_back_to_first_page(reviewer, values):
+    assert reviewer.get("/reviewer?cursor=" + encode_cursor(values)).status_code == 200
+
+
+def test_tampered_admin_cursor_falls_back_to_first_page(make_user):
+    client = make_user("admin-cursor@test.local", role="admin")
+    assert client.get("/admin?cursor=" + encode_cursor([["nested"]])).status_code == 200
+
+
+def test_out_of_range_cursor_falls_back_to_first_page(reviewer, make_user):
+    assert reviewer.get("/reviewer?cursor=" + encode_cursor(["2026-01-01T00:00:00", 10 ** 30])).status_code == 200
+    admin = make_user("admin-overflow@test.local", role="admin")
+    assert admin.get("/admin?cursor=" + encode_cursor([10 ** 30])).status_code == 200
+
+
+@pytest.mark.parametrize("values", [["x", 1, False, 1], [0.5, "x", False, 1], [0.5, 1, False, None],
+                                    [0.5, 1, False, 10 ** 30], [None], [[1]]])
+def test_tampered_search_cursor_falls_back_to_first_page(reviewer, values):
+    assert reviewer.get("/reviewer/search?q=headache&cursor=" + encode_cursor(values)).status_code == 200
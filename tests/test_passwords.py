@@ -0,0 +1,40 @@
+import os
+import signal
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from passwords import PasswordHasher, _method_of, stored_method
+
+
+@pytest.mark.parametrize("method", ["scrypt", "scrypt:16384:8:1", "pbkdf2", "pbkdf2:sha512",
+                                    "pbkdf2:sha256:1000"])
+def test_stored_method_matches_werkzeug(method):
+    assert stored_method(method) == _method_of(generate_password_hash("pw", method))
+
+
+def test_needs_rehash_without_hashing():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=0)
+    hasher._run = None  # needs_rehash must not hash anything
+    assert not hasher.needs_rehash(generate_password_hash("pw", "pbkdf2:sha256:1000"))
+    assert hasher.needs_rehash(generate_password_hash("pw", "pbkdf2:sha256:2000"))
+    assert hasher.needs_rehash("plain-text")
+
+
+def test_broken_pool_is_shut_down_and_replaced():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1)
+    try:
+        broken = hasher._executor()
+        broken.submit(int).result(timeout=30)
+        calls = []
+        shutdown = broken.shutdown
+        broken.shutdown = lambda **kwargs: calls.append(kwargs) or shutdown(**kwargs)
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+
+        stored = hasher.hash("pw")  # answered inline
+        assert hasher.verify(stored, "pw")
+        assert calls == [{"wait": False, "cancel_futures": True}]
+        assert hasher._pool is not broken
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,43 @@
+import pytest
+
+from rate_limit import MemoryBucketStore, SQLBucketStore
+
+
+@pytest.fixture
+def limited(cura, app):
+    limiter = cura.rate_limiter
+    limiter.enabled = True
+    limiter.store.clear()
+    yield app.test_client()
+    limiter.enabled = False
+    limiter.store.clear()
+
+
+def test_memory_bucket_charges_cost():
+    store = MemoryBucketStore()
+    assert store.take("k", 1.0, 5, now=0, cost=3) == 0
+    assert store.take("k", 1.0, 5, now=0, cost=3) == pytest.approx(1.0)  # 2 left, 1 short
+    assert store.take("k", 1.0, 5, now=1, cost=3) == 0
+
+
+def test_sql_bucket_charges_cost(cura, app):
+    store = SQLBucketStore(cura.db, cura.RateLimitBucket)
+    with app.app_context():
+        store.clear()
+        assert store.take("k", 1.0, 5, now=0, cost=3) == 0
+        assert store.take("k", 1.0, 5, now=0, cost=3) == pytest.approx(1.0)
+        assert store.take("k", 1.0, 5, now=1, cost=3) == 0
+        store.clear()
+
+
+def test_batch_is_charged_per_message(app, limited):
+    per_minute, burst = app.config['RATE_LIMITS']["predict"]
+    batch = {"messages": ["hello"] * burst}
+    assert limited.post("/predict/batch", json=batch).status_code == 200
+    response = limited.post("/predict", json={"message": "hello"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_batch_within_rate_limit_burst(app):
+    assert app.config['PREDICT_BATCH_LIMIT'] <= app.config['RATE_LIMITS']["predict"][1]
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture
+def reviewer(make_user):
+    return make_user("reviewer-bulk@test.local", role="reviewer")
+
+
+def add_feedback(cura, app, user_id):
+    with app.app_context():
+        feedback = cura.Feedback(user_id=user_id, message="bulk test")
+        cura.db.session.add(feedback)
+        cura.db.session.commit()
+        return feedback.id
+
+
+@pytest.mark.parametrize("bad", ["9" * 30, "²", "0", "-1", "1.5", ""])
+def test_bulk_skips_ids_that_are_not_plain_integers(cura, app, reviewer, bad):
+    feedback_id = add_feedback(cura, app, reviewer.user_id)
+    response = reviewer.post("/reviewer/bulk", data={"feedback_id": [bad, str(feedback_id)]},
+                             headers={"X-Requested-With": "fetch"})
+    assert response.status_code == 200
+    assert response.get_json() == {"ok": True, "marked": 1}
@@ -0,0 +1,88 @@
+import pytest
+
+from user_cache import UserCache
+
+
+@pytest.fixture
+def user_id(cura, app):
+    with app.app_context():
+        user = cura.User(name="cached", email="cached@test.local", password="x")
+        cura.db.session.add(user)
+        cura.db.session.commit()
+        user_id = user.id
+    yield user_id
+    with app.app_context():
+        cura.db.session.execute(cura.db.delete(cura.User).where(cura.User.id == user_id))
+        cura.db.session.commit()
+
+
+def load(app, cache, user_id):
+    with app.app_context():  # a fresh session, like a new request
+        return cache.load(user_id)
+
+
+def set_role(cura, app, user_id, role):
+    with app.app_context():
+        cura.db.session.get(cura.User, user_id).role = role
+        cura.db.session.commit()
+
+
+def test_miss_then_hit(app, user_id):
+    cache = UserCache(ttl=60)
+    first = load(app, cache, user_id)
+    second = load(app, cache, user_id)
+    assert first.email == "cached@test.local"
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_update_bumps_version(cura, app, user_id):
+    with app.app_context():
+        before = cura.db.session.get(cura.User, user_id).version
+    set_role(cura, app, user_id, "reviewer")
+    with app.app_context():
+        assert cura.db.session.get(cura.User, user_id).version == before + 1
+
+
+def test_change_from_another_worker_is_seen_after_verify_interval(cura, app, user_id):
+    worker_a, worker_b = UserCache(ttl=60, verify_interval=0), UserCache(ttl=60)
+    assert load(app, worker_a, user_id).role == "user"
+    assert load(app, worker_a, user_id).role == "user"  # version unchanged: still a hit
+    assert worker_a.hits == 1
+
+    set_role(cura, app, user_id, "reviewer")
+    worker_b.invalidate(user_id)  # only reaches worker B's own copy
+
+    assert load(app, worker_a, user_id).role == "reviewer"
+    assert worker_a.misses == 2
+
+
+def test_verified_snapshot_is_served_without_a_query(cura, app, user_id):
+    cache = UserCache(ttl=60, verify_interval=60)
+    load(app, cache, user_id)
+    set_role(cura, app, user_id, "reviewer")
+    assert load(app, cache, user_id).role == "user"  # within the interval, by design
+    assert cache.hits == 1
+
+
+def test_invalidate_drops_local_copy(app, user_id):
+    cache = UserCache(ttl=60)
+    load(app, cache, user_id)
+    cache.invalidate(user_id)
+    assert cache.stats()["entries"] == 0
+    load(app, cache, user_id)
+    assert cache.misses == 2
+
+
+def test_ttl_expiry_and_deleted_user(cura, app, user_id):
+    cache = UserCache(ttl=0)
+    load(app, cache, user_id)
+    load(app, cache, user_id)
+    assert cache.hits == 0
+
+    cache.ttl, cache.verify_interval = 60, 0
+    load(app, cache, user_id)
+    with app.app_context():
+        cura.db.session.execute(cura.db.delete(cura.User).where(cura.User.id == user_id))
+        cura.db.session.commit()
+    assert load(app, cache, user_id) is None
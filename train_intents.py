@@ -0,0 +1,227 @@
+"""Train the chatbot intent model on intents.json and export it as int8.
+
+    python train_intents.py [--hidden 32] [--epochs 200] [--seed 0] [--test-size 0.2]
+
+Training runs on CPU with fixed seeds and one thread, so the same data and
+seed give a byte-identical intents.int8.npz. A model trained on a stratified
+split is scored on the held-out part (accuracy, confusion matrix); the
+shipped artifact is then refit on every sentence with the same settings, so
+no pattern in intents.json is left out. Last come size / load time / latency
+of the new artifact next to the float32 data.pth. torch is needed here only; the app serves the artifact
+with NumPy.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from itertools import chain
+
+import numpy as np
+import torch
+
+from intent_model import BASE_DIR, CHECKPOINT_PATH, MODEL_PATH, IntentClassifier, export_int8
+from model import NeuralNet
+from nltk_utils import bag_of_words_batch, stem, tokenize
+
+INTENTS_PATH = os.path.join(BASE_DIR, "intents.json")
+
+
+# ---------- DATA ----------
+def load_intents(path=INTENTS_PATH):
+    with open(path, encoding="utf-8") as f:
+        intents = json.load(f)["intents"]
+    tags = sorted(intent["tag"] for intent in intents)
+    sentences, labels = [], []
+    for intent in intents:
+        sentences.extend(intent["patterns"])
+        labels.extend([tags.index(intent["tag"])] * len(intent["patterns"]))
+    return sentences, np.array(labels), tags
+
+
+def split(labels, test_size, seed):
+    """Stratified train/test indices: `test_size` of every tag (at least one) is held out."""
+    rng = random.Random(seed)
+    train, test = [], []
+    for label in sorted(set(labels.tolist())):
+        idx = np.flatnonzero(labels == label).tolist()
+        rng.shuffle(idx)
+        n_test = max(1, round(len(idx) * test_size))
+        test.extend(idx[:n_test])
+        train.extend(idx[n_test:])
+    return np.array(sorted(train)), np.array(sorted(test))
+
+
+def build_vocabulary(sentences):
+    # Stem each distinct token once, not once per occurrence; punctuation is dropped
+    tokens = set(chain.from_iterable(map(tokenize, sentences)))
+    return sorted({stem(t) for t in tokens if any(c.isalnum() for c in t)})
+
+
+def bag_of_words_sparse(sentences, word_index):
+    """The whole corpus as one sparse (n, vocab) 0/1 matrix."""
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        ids = sorted({word_index[s] for s in map(stem, tokenize(sentence)) if s in word_index})
+        rows.extend([row] * len(ids))
+        cols.extend(ids)
+    indices = torch.tensor([rows, cols], dtype=torch.int64)
+    values = torch.ones(len(cols), dtype=torch.float32)
+    return torch.sparse_coo_tensor(indices, values, (len(sentences), len(word_index)),
+                                   check_invariants=True).coalesce()
+
+
+# ---------- TRAINING ----------
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    torch.set_num_threads(1)  # float sums in a fixed order
+    torch.use_deterministic_algorithms(True)
+
+
+def train(x, y, vocab_size, num_classes, hidden, epochs, lr, seed):
+    seed_everything(seed)
+    net = NeuralNet(vocab_size, hidden, num_classes)
+    optimizer = torch.optim.Adam(net.parameters(), lr=lr, weight_decay=1e-4)
+    loss_fn = torch.nn.CrossEntropyLoss()
+    target = torch.from_numpy(y)
+    for _ in range(epochs):  # full batch: a few hundred sentences
+        optimizer.zero_grad()
+        loss = loss_fn(net(x), target)
+        loss.backward()
+        optimizer.step()
+    net.eval()
+    return net, loss.item()
+
+
+def weights_of(net):
+    return [(getattr(net, f"l{i}").weight.detach().numpy(), getattr(net, f"l{i}").bias.detach().numpy())
+            for i in (1, 2, 3)]
+
+
+# ---------- REPORT ----------
+def confusion(actual, predicted, n):
+    matrix = np.zeros((n, n), dtype=np.int64)
+    np.add.at(matrix, (actual, predicted), 1)
+    return matrix
+
+
+def print_confusion(matrix, tags):
+    width = max(map(len, tags))
+    print(f"  {'actual / predicted':>{width}}  " + " ".join(f"{t[:5]:>5}" for t in tags))
+    for tag, row in zip(tags, matrix):
+        print(f"  {tag:>{width}}  " + " ".join(f"{v:5d}" for v in row))
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def load_pth(path):
+    data = torch.load(path, map_location="cpu")
+    net = NeuralNet(data["input_size"], data["hidden_size"], data["output_size"])
+    net.load_state_dict(data["model_state"])
+    net.eval()
+    return net, {w: i for i, w in enumerate(data["all_words"])}
+
+
+def save_pth(path, net, vocab, tags, hidden):
+    # Same layout as data.pth
+    torch.save({"model_state": net.state_dict(), "input_size": len(vocab), "hidden_size": hidden,
+                "output_size": len(tags), "all_words": vocab, "tags": tags}, path)
+
+
+def compare(artifacts, message="i feel dizzy and my head hurts"):
+    print(f"\n  {'artifact':34} {'size':>8} {'load':>9} {'1 msg, end to end':>18}")
+    for label, path, kind in artifacts:
+        if kind == "pth":
+            load = lambda: load_pth(path)
+            net, word_index = load()
+
+            def infer():
+                with torch.no_grad():
+                    torch.softmax(net(torch.from_numpy(bag_of_words_batch([message], word_index))), dim=1)
+        else:
+            load = lambda: IntentClassifier.load(path)
+            clf = load()
+            infer = lambda: clf.predict_batch([message])
+        print(f"  {label:34} {os.path.getsize(path):6,} B {median_ms(load, 50):6.2f} ms "
+              f"{median_ms(infer, 2000) * 1000:12.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intents", default=INTENTS_PATH)
+    parser.add_argument("--out", default=MODEL_PATH)
+    parser.add_argument("--hidden", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    args = parser.parse_args()
+
+    sentences, labels, tags = load_intents(args.intents)
+    train_idx, test_idx = split(labels, args.test_size, args.seed)
+    vocab = build_vocabulary([sentences[i] for i in train_idx])  # held-out words stay unseen
+    word_index = {w: i for i, w in enumerate(vocab)}
+
+    start = time.perf_counter()
+    x_train = bag_of_words_sparse([sentences[i] for i in train_idx], word_index)
+    x_test = bag_of_words_sparse([sentences[i] for i in test_idx], word_index)
+    featurize_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    net, loss = train(x_train, labels[train_idx], len(vocab), len(tags), args.hidden, args.epochs, args.lr, args.seed)
+    train_s = time.perf_counter() - start
+    print(f"{len(sentences)} sentences, {len(tags)} tags, {len(vocab)} words | "
+          f"train {len(train_idx)} / held out {len(test_idx)} | features {featurize_ms:.0f} ms, "
+          f"{args.epochs} epochs {train_s:.1f} s, final loss {loss:.4f}")
+
+    tmp = tempfile.TemporaryDirectory()
+    dense_test = x_test.to_dense().numpy()
+    with torch.no_grad():
+        float_pred = net(x_test).argmax(dim=1).numpy()
+    split_npz = export_int8(os.path.join(tmp.name, "split.int8.npz"), weights_of(net), vocab, tags)
+    int8_pred = IntentClassifier.load(split_npz).forward(dense_test).argmax(axis=1)
+    unknown = ~dense_test.any(axis=1)  # the app answers these with the default reply, not a guess
+
+    actual = labels[test_idx]
+    print(f"\nheld-out accuracy: float32 {np.mean(float_pred == actual):.1%}   "
+          f"int8 {np.mean(int8_pred == actual):.1%}   (int8 agrees with float32 on {np.mean(int8_pred == float_pred):.1%}; "
+          f"{unknown.sum()} of {len(actual)} held-out sentences have no known word)")
+    print("confusion matrix, int8:")
+    print_confusion(confusion(actual, int8_pred, len(tags)), tags)
+    for i, p, blank in zip(test_idx, int8_pred, unknown):
+        if p != labels[i]:
+            print(f"    missed: {sentences[i]!r} ({tags[labels[i]]} -> {tags[p]}){' - no known words' if blank else ''}")
+
+    # The held-out score is only an estimate: what ships learns from every sentence
+    vocab = build_vocabulary(sentences)
+    x_all = bag_of_words_sparse(sentences, {w: i for i, w in enumerate(vocab)})
+    net, loss = train(x_all, labels, len(vocab), len(tags), args.hidden, args.epochs, args.lr, args.seed)
+    export_int8(args.out, weights_of(net), vocab, tags)
+    with torch.no_grad():
+        train_acc = np.mean(net(x_all).argmax(dim=1).numpy() == labels)
+    print(f"\nrefit on all {len(sentences)} sentences, {len(vocab)} words | final loss {loss:.4f}, "
+          f"training accuracy {train_acc:.1%}")
+
+    with tmp:
+        new_pth = os.path.join(tmp.name, "intents.pth")
+        save_pth(new_pth, net, vocab, tags, args.hidden)
+        compare([
+            ("data.pth (current, float32, torch)", CHECKPOINT_PATH, "pth"),
+            ("new model as float32 .pth, torch", new_pth, "pth"),
+            (f"{os.path.basename(args.out)} (int8, NumPy)", args.out, "npz"),
+        ])
+    print(f"\nwrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import has_request_context, session
+from flask_login import UserMixin
+
+from models import db, User
+
+# ---------- CACHED USER LOADING ----------
+# Flask-Login calls the user loader on every authenticated request (including
+# each /predict from the chat widget). UserCache keeps a read-only snapshot
+# of the row per process for a short TTL instead of querying every time.
+#
+# Workers don't share memory, so changes are tracked two ways:
+# - invalidate() stamps the session with the time of the change, and any
+#   worker holding an older snapshot for that session reloads it at once.
+# - Every UPDATE of the row bumps user.version. A snapshot older than
+#   `verify_interval` re-reads just that column before it is served again,
+#   so other sessions and workers (another browser, an admin's change) see
+#   the change within a second instead of a TTL, while a burst of requests
+#   still costs one query per second.
+
+SNAPSHOT_FIELDS = ("id", "name", "email", "phone", "dob", "gender", "role")
+SESSION_KEY = "user_changed_at"
+
+
+class UserSnapshot(UserMixin):
+    """Read-only copy of a User row, safe to share between requests and threads."""
+
+    def __init__(self, **fields):
+        for field in SNAPSHOT_FIELDS:
+            object.__setattr__(self, field, fields.get(field))
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(**{field: getattr(user, field) for field in SNAPSHOT_FIELDS})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserSnapshot is read-only — load the User row to change it")
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.email}>"
+
+
+class UserCache:
+    def __init__(self, app=None, ttl=60.0, max_entries=10000, verify_interval=1.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.verify_interval = verify_interval  # seconds a snapshot is served before user.version is re-checked
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> [loaded_at, verified_at, version, snapshot]
+        self.hits = 0
+        self.misses = 0
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("USER_CACHE_TTL", self.ttl)
+        self.max_entries = app.config.get("USER_CACHE_MAX_ENTRIES", self.max_entries)
+        self.verify_interval = app.config.get("USER_CACHE_VERIFY_INTERVAL", self.verify_interval)
+        self.clear()  # snapshots loaded from a previous app's database
+
+    def load(self, user_id):
+        """Return a UserSnapshot for `user_id`, or None if the user no longer exists."""
+        user_id = int(user_id)
+        now = time.time()
+        changed_at = session.get(SESSION_KEY, 0) if has_request_context() else 0
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            fresh = entry is not None and now - entry[0] < self.ttl and entry[0] > changed_at
+            if fresh and now - entry[1] < self.verify_interval:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[3]
+
+        if fresh:
+            row = db.session.execute(db.select(User.version).where(User.id == user_id)).first()
+            with self._lock:
+                if row is not None and row[0] == entry[2] and self._entries.get(user_id) is entry:
+                    entry[1] = now
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[3]
+        with self._lock:
+            self.misses += 1
+
+        user = db.session.get(User, user_id)
+        with self._lock:
+            if user is None:
+                self._entries.pop(user_id, None)
+                return None
+            snapshot = UserSnapshot.from_user(user)
+            self._entries[user_id] = [now, now, user.version, snapshot]
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        """Forget the cached copy here, and make every worker reload it for this session."""
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+        if has_request_context():
+            session[SESSION_KEY] = time.time()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }